@@ -4,6 +4,17 @@ TG Error Notifier - Библиотека для уведомлений об ош
 
 from .core.error_manager import ErrorManager
 from .core.config import TelegramNotifierConfig
+from .core.logging_handler import TelegramLoggingHandler
+from .core.transport import Transport, AiogramTransport, HTTPTransport, InMemoryTransport
+from .core.bot_commands import create_history_router
+from .core.context import (
+    bind_context,
+    reset_context,
+    notification_context,
+    current_context,
+    register_detail_provider,
+    unregister_detail_provider
+)
 from .decorators.error_decorators import (
     handle_errors, 
     handle_database_errors,
@@ -11,6 +22,7 @@ from .decorators.error_decorators import (
     handle_cache_errors,
     handle_system_errors
 )
+from .decorators.latency_decorators import monitor_latency
 from .templates.notification_templates import NotificationTemplates
 from .models.error_models import ErrorLevel, ErrorCategory
 from .models.notification_models import ErrorNotification
@@ -22,11 +34,24 @@ __email__ = "Ia12Kotik@yandex.ru"
 __all__ = [
     'ErrorManager',
     'TelegramNotifierConfig',
+    'TelegramLoggingHandler',
+    'Transport',
+    'AiogramTransport',
+    'HTTPTransport',
+    'InMemoryTransport',
+    'create_history_router',
+    'bind_context',
+    'reset_context',
+    'notification_context',
+    'current_context',
+    'register_detail_provider',
+    'unregister_detail_provider',
     'handle_errors',
     'handle_database_errors',
     'handle_telegram_errors', 
     'handle_cache_errors',
     'handle_system_errors',
+    'monitor_latency',
     'NotificationTemplates',
     'ErrorLevel',
     'ErrorCategory',
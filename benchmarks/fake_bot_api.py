@@ -0,0 +1,159 @@
+"""
+Локальный сервер, имитирующий Telegram Bot API для бенчмарков
+
+Поддерживает sendMessage, sendDocument (и любые другие методы с ответом-заглушкой),
+искусственную задержку, ответы 429 с retry_after и ошибки сервера.
+
+Запуск отдельно:
+    python benchmarks/fake_bot_api.py --port 8081 --latency 0.05 --rate-limit-every 100
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from typing import List, Optional
+
+from aiohttp import web
+
+
+class FakeBotAPI:
+    """
+    Имитация Bot API
+
+    Args:
+        latency: Задержка ответа в секундах
+        rate_limit_every: Каждый N-й запрос получает 429 (0 - никогда)
+        retry_after: Значение retry_after в ответе 429
+        failure_rate: Доля запросов, получающих 500
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0,
+                 rate_limit_every: int = 0,
+                 retry_after: int = 1,
+                 failure_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+
+        self.requests = 0
+        self.delivered = 0
+        self.rate_limited = 0
+        self.failed = 0
+        # Доставленные документы (входят в delivered) и их размер в байтах
+        self.documents = 0
+        self.document_bytes = 0
+        # Время приема каждого доставленного сообщения (time.perf_counter)
+        self.delivered_at: List[float] = []
+
+        self._message_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def reset(self):
+        """Сброс счетчиков между сценариями"""
+        self.requests = self.delivered = self.rate_limited = self.failed = 0
+        self.documents = self.document_bytes = 0
+        self.delivered_at = []
+
+    async def start(self) -> "FakeBotAPI":
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        if not self.port:
+            self.port = self._runner.addresses[0][1]
+        return self
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        # aiogram отправляет форму, прямой HTTP-транспорт - JSON
+        data = await request.json() if request.content_type == "application/json" else await request.post()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            self.rate_limited += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after}
+            }, status=429)
+
+        if self.failure_rate and random.random() < self.failure_rate:
+            self.failed += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 500,
+                "description": "Internal Server Error"
+            }, status=500)
+
+        method = request.match_info["method"].lower()
+        if method not in ("sendmessage", "senddocument"):
+            return web.json_response({"ok": True, "result": True})
+
+        self.delivered += 1
+        self.delivered_at.append(time.perf_counter())
+        chat_id = data.get("chat_id", "0")
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id), "type": "supergroup" if str(chat_id).startswith("-") else "private"},
+        }
+        if method == "senddocument":
+            document = data.get("document")
+            # aiogram передает файл отдельным полем, а в document - ссылку attach://<поле>
+            if isinstance(document, str) and document.startswith("attach://"):
+                document = data.get(document[len("attach://"):])
+            size = len(document.file.read()) if isinstance(document, web.FileField) else 0
+            self.documents += 1
+            self.document_bytes += size
+            message["caption"] = data.get("caption", "")
+            message["document"] = {
+                "file_id": f"doc{message['message_id']}",
+                "file_unique_id": f"doc{message['message_id']}",
+                "file_name": getattr(document, "filename", None),
+                "file_size": size,
+            }
+        else:
+            message["text"] = data.get("text", "")
+        return web.json_response({"ok": True, "result": message})
+
+
+async def _serve(args):
+    server = await FakeBotAPI(args.host, args.port, args.latency, args.rate_limit_every,
+                              args.retry_after, args.failure_rate).start()
+    print(f"Fake Bot API: {server.url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,435 @@
+"""
+Бенчмарки tg_error_notifier против локального имитатора Bot API
+
+Запуск (пакет tg_error_notifier должен быть установлен или доступен в PYTHONPATH):
+    python benchmarks/run_benchmarks.py --iterations 5000 --output results.json
+
+Результаты выводятся в JSON: для каждого сценария число операций,
+пропускная способность и задержки p50/p99 в микросекундах.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from tg_error_notifier import (
+    ErrorManager, TelegramNotifierConfig, ErrorCategory, ErrorLevel, InMemoryTransport, handle_errors,
+    monitor_latency, __version__
+)
+
+from fake_bot_api import FakeBotAPI
+
+SCENARIOS: Dict[str, Callable] = {}
+
+# Параметры конфигурации из командной строки, общие для всех сценариев
+CONFIG_DEFAULTS: Dict[str, Any] = {}
+
+# Модули, которые не должны загружаться при импорте пакета и configure()
+HEAVY_MODULES = ("aiogram", "aiohttp", "pydantic")
+
+# Выполняется в отдельном интерпретаторе: замер импорта "с холодного старта"
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter_ns()
+import tg_error_notifier
+imported = time.perf_counter_ns()
+from tg_error_notifier import ErrorManager, TelegramNotifierConfig
+ErrorManager.configure(TelegramNotifierConfig(admin_bot_token="123456:BENCHMARK",
+                                              notification_chat_id="-1001234567890", enable_logging=False))
+configured = time.perf_counter_ns()
+heavy = sorted({name.split(".")[0] for name in sys.modules} & set(json.loads(sys.argv[1])))
+import aiogram.client.session.aiohttp
+print(json.dumps({"import_ns": imported - started, "configure_ns": configured - imported,
+                  "aiogram_ns": time.perf_counter_ns() - configured, "heavy": heavy}))
+"""
+
+
+def scenario(func: Callable) -> Callable:
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize(name: str, samples_ns: List[int], elapsed: float, **extra: Any) -> Dict[str, Any]:
+    """Сводка по замерам одной операции"""
+    samples = sorted(samples_ns)
+    result = {
+        "name": name,
+        "iterations": len(samples),
+        "ops_per_sec": round(len(samples) / elapsed, 1) if elapsed > 0 else None,
+        "mean_us": round(sum(samples) / len(samples) / 1000, 3) if samples else None,
+        "p50_us": round(percentile(samples, 0.50) / 1000, 3),
+        "p99_us": round(percentile(samples, 0.99) / 1000, 3),
+        "max_us": round(samples[-1] / 1000, 3) if samples else None,
+    }
+    result.update(extra)
+    return result
+
+
+@asynccontextmanager
+async def configured(server: FakeBotAPI, transport: Any = None, **overrides: Any):
+    """ErrorManager, отправляющий в имитатор Bot API"""
+    options = dict(
+        admin_bot_token="123456:BENCHMARK",
+        notification_chat_id="-1001234567890",
+        app_name="benchmark",
+        enable_logging=False,
+        api_server=server.url,
+        chat_rate_limit=0,
+        group_rate_limit=0,
+        bot_rate_limit=0,
+        dedup_window=0,
+        retry_backoff_base=0.01,
+        retry_backoff_max=0.1,
+    )
+    options.update(CONFIG_DEFAULTS)
+    options.update(overrides)
+    server.reset()
+    ErrorManager.configure(TelegramNotifierConfig(**options), transport)
+    # Зависимости транспорта импортируются при первой отправке; в замеры это не входит
+    await ErrorManager._notifier.transport.prepare()
+    try:
+        yield ErrorManager._notifier
+    finally:
+        await ErrorManager.close()
+
+
+async def measure(operation: Callable[[int], Any], iterations: int, is_async: bool = True):
+    """Замер каждой операции; возвращает задержки в наносекундах и общее время"""
+    samples = []
+    clock = time.perf_counter_ns
+    started = time.perf_counter()
+    for i in range(iterations):
+        begin = clock()
+        if is_async:
+            await operation(i)
+        else:
+            operation(i)
+        samples.append(clock() - begin)
+    return samples, time.perf_counter() - started
+
+
+def _raise_error():
+    try:
+        raise ValueError("database connection lost: host=db-1 attempt=3")
+    except ValueError as e:
+        return e
+
+
+@scenario
+async def format_message(server: FakeBotAPI, args) -> List[Dict[str, Any]]:
+    async with configured(server) as notifier:
+        notification = notifier.build_notification(
+            ErrorLevel.ERROR, ErrorCategory.DATABASE, "Ошибка при выполнении: load_user",
+            {"function": "load_user", "user_id": 42, "query": "SELECT * FROM users WHERE id = $1"},
+            _raise_error()
+        )
+        samples, elapsed = await measure(lambda i: notifier._format_message(notification),
+                                         args.iterations, is_async=False)
+        return [summarize("format_message", samples, elapsed)]
+
+
+@scenario
+async def notify_error(server: FakeBotAPI, args) -> List[Dict[str, Any]]:
+    async with configured(server, queue_max_size=max(args.iterations, 1)) as notifier:
+        submitted = []
+
+        async def operation(i):
+            submitted.append(time.perf_counter())
+            await ErrorManager.notify_error(ErrorCategory.API, f"request {i} failed", {"attempt": i})
+
+        samples, elapsed = await measure(operation, args.iterations)
+        drain_started = time.perf_counter()
+        flushed = await ErrorManager.flush(args.timeout)
+        drain = time.perf_counter() - drain_started
+
+        # Одна полоса приоритета и один обработчик: сообщения доставляются по порядку
+        end_to_end = sorted(
+            int((delivered - sent) * 1e9) for sent, delivered in zip(submitted, server.delivered_at)
+        )
+        return [summarize(
+            "notify_error", samples, elapsed,
+            flushed=flushed,
+            delivered=server.delivered,
+            dropped=notifier._queue.dropped,
+            delivery_per_sec=round(server.delivered / (elapsed + drain), 1),
+            end_to_end_p50_us=round(percentile(end_to_end, 0.50) / 1000, 3),
+            end_to_end_p99_us=round(percentile(end_to_end, 0.99) / 1000, 3),
+        )]
+
+
+@scenario
+async def notify_info_dropped(server: FakeBotAPI, args) -> List[Dict[str, Any]]:
+    async with configured(server, routing={"info": "drop"}):
+        samples, elapsed = await measure(
+            lambda i: ErrorManager.notify_info(ErrorCategory.API, "dropped"), args.iterations
+        )
+        return [summarize("notify_info_dropped", samples, elapsed)]
+
+
+@scenario
+async def decorators(server: FakeBotAPI, args) -> List[Dict[str, Any]]:
+    results = []
+    async with configured(server, queue_max_size=max(args.iterations, 1)):
+        async def bare(i):
+            return i
+
+        def bare_sync(i):
+            return i
+
+        @handle_errors(ErrorCategory.API)
+        async def async_ok(i):
+            return i
+
+        @handle_errors(ErrorCategory.API)
+        async def async_fail(i):
+            raise ValueError(f"failed {i}")
+
+        @handle_errors(ErrorCategory.API)
+        def sync_ok(i):
+            return i
+
+        @handle_errors(ErrorCategory.API)
+        def sync_fail(i):
+            raise ValueError(f"failed {i}")
+
+        async def call_async_fail(i):
+            try:
+                await async_fail(i)
+            except ValueError:
+                pass
+
+        def call_sync_fail(i):
+            try:
+                sync_fail(i)
+            except ValueError:
+                pass
+
+        @monitor_latency(ErrorCategory.API, budget=1.0)
+        async def async_timed(i):
+            return i
+
+        @monitor_latency(ErrorCategory.API, budget=1.0)
+        def sync_timed(i):
+            return i
+
+        for name, operation, is_async in (
+            ("bare_async_call", bare, True),
+            ("bare_sync_call", bare_sync, False),
+            ("handle_errors_async_success", async_ok, True),
+            ("handle_errors_async_failure", call_async_fail, True),
+            ("handle_errors_sync_success", sync_ok, False),
+            ("handle_errors_sync_failure", call_sync_fail, False),
+            ("monitor_latency_async", async_timed, True),
+            ("monitor_latency_sync", sync_timed, False),
+        ):
+            samples, elapsed = await measure(operation, args.iterations, is_async)
+            results.append(summarize(name, samples, elapsed))
+        await ErrorManager.flush(args.timeout)
+    return results
+
+
+@scenario
+async def error_storm(server: FakeBotAPI, args) -> List[Dict[str, Any]]:
+    """Одновременный всплеск одинаковых ошибок из множества задач"""
+    async with configured(server, dedup_window=60.0) as notifier:
+        async def failing_task(i):
+            begin = time.perf_counter_ns()
+            await ErrorManager.notify_error(ErrorCategory.DATABASE, f"connection refused (pool {i % 4})",
+                                            exc=_raise_error())
+            return time.perf_counter_ns() - begin
+
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(failing_task(i) for i in range(args.iterations)))
+        elapsed = time.perf_counter() - started
+        flushed = await ErrorManager.flush(args.timeout)
+        quiesced = time.perf_counter() - started
+        suppressed = notifier._deduplicator.suppressed if notifier._deduplicator is not None else 0
+        return [summarize(
+            "error_storm", list(samples), elapsed,
+            flushed=flushed,
+            seconds_to_quiesce=round(quiesced, 3),
+            delivered=server.delivered,
+            rate_limited=server.rate_limited,
+            suppressed=suppressed,
+        )]
+
+
+class _FormattingHandler(logging.Handler):
+    """Обработчик, форматирующий записи как настоящий вывод (аргументы подставляются)"""
+
+    def emit(self, record: logging.LogRecord):
+        self.format(record)
+
+
+@scenario
+async def duplicate_failures(server: FakeBotAPI, args) -> List[Dict[str, Any]]:
+    """
+    Повторяющиеся ошибки декорированной функции при включенном логе ERROR
+
+    Проверка: аргументы вызова форматируются только для отправленных
+    уведомлений, подавленные повторы их не трогают.
+    """
+    reprs = 0
+
+    class Payload:
+        def __repr__(self):
+            nonlocal reprs
+            reprs += 1
+            return "<Payload>"
+
+    @handle_errors(ErrorCategory.API)
+    async def failing(payload):
+        raise ValueError("payload rejected")
+
+    async def operation(i):
+        try:
+            await failing(Payload())
+        except ValueError:
+            pass
+
+    library_logger = logging.getLogger("tg_error_notifier")
+    handler = _FormattingHandler()
+    disabled = logging.root.manager.disable
+    propagate = library_logger.propagate
+    logging.disable(logging.NOTSET)
+    library_logger.addHandler(handler)
+    library_logger.propagate = False
+    try:
+        async with configured(server, dedup_window=60.0, enable_logging=True, log_level="ERROR"):
+            samples, elapsed = await measure(operation, args.iterations)
+            await ErrorManager.flush(args.timeout)
+    finally:
+        library_logger.removeHandler(handler)
+        library_logger.propagate = propagate
+        logging.disable(disabled)
+    if reprs > server.delivered:
+        raise AssertionError(f"arguments formatted {reprs} times for {server.delivered} delivered "
+                             f"notifications: deduplicated failures must not format arguments")
+    return [summarize("duplicate_failures", samples, elapsed,
+                      delivered=server.delivered, argument_reprs=reprs)]
+
+
+@scenario
+async def in_memory_delivery(server: FakeBotAPI, args) -> List[Dict[str, Any]]:
+    """Пропускная способность очередей и форматирования без сети"""
+    transport = InMemoryTransport()
+    async with configured(server, transport, queue_max_size=max(args.iterations, 1)):
+        samples, elapsed = await measure(
+            lambda i: ErrorManager.notify_error(ErrorCategory.API, f"request {i} failed", {"attempt": i}),
+            args.iterations
+        )
+        drain_started = time.perf_counter()
+        flushed = await ErrorManager.flush(args.timeout)
+        drain = time.perf_counter() - drain_started
+        return [summarize(
+            "in_memory_delivery", samples, elapsed,
+            flushed=flushed,
+            delivered=len(transport.requests),
+            delivery_per_sec=round(len(transport.requests) / (elapsed + drain), 1),
+        )]
+
+
+@scenario
+async def import_time(server: FakeBotAPI, args) -> List[Dict[str, Any]]:
+    """Время импорта пакета и configure() в новом процессе (aiogram должен загружаться лениво)"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    runs = []
+    for _ in range(args.import_runs):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", _IMPORT_PROBE, json.dumps(HEAVY_MODULES),
+            env=env, stdout=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await process.communicate()
+        runs.append(json.loads(stdout))
+    heavy = sorted({name for run in runs for name in run["heavy"]})
+    return [
+        summarize("import_package", [run["import_ns"] for run in runs], 0.0, heavy_modules_loaded=heavy),
+        summarize("configure", [run["configure_ns"] for run in runs], 0.0),
+        # Для сравнения: что откладывается до первой отправки
+        summarize("import_aiogram_deferred", [run["aiogram_ns"] for run in runs], 0.0),
+    ]
+
+
+async def main(args) -> Dict[str, Any]:
+    server = await FakeBotAPI(latency=args.latency,
+                              rate_limit_every=args.rate_limit_every,
+                              retry_after=args.retry_after,
+                              failure_rate=args.failure_rate).start()
+    CONFIG_DEFAULTS["transport"] = args.transport
+    results = []
+    try:
+        for name in args.scenarios:
+            results.extend(await SCENARIOS[name](server, args))
+    finally:
+        await server.close()
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "transport": args.transport,
+            "server": {
+                "latency": args.latency,
+                "rate_limit_every": args.rate_limit_every,
+                "retry_after": args.retry_after,
+                "failure_rate": args.failure_rate,
+            },
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="tg_error_notifier benchmarks")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated list: {', '.join(SCENARIOS)}")
+    parser.add_argument("--transport", choices=("aiogram", "http"), default="aiogram",
+                        help="Transport used to reach the fake API")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake API response latency, seconds")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer 429 to every N-th request")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--import-runs", type=int, default=5, help="Fresh interpreters for import_time")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Flush timeout per scenario, seconds")
+    parser.add_argument("--output", help="Write JSON results to file instead of stdout")
+    parser.add_argument("--with-logging", action="store_true", help="Keep library logging enabled")
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    return args
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if not arguments.with_logging:
+        logging.disable(logging.CRITICAL)
+    report = asyncio.run(main(arguments))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for result in report["results"]:
+        print(f"{result['name']:<32} {result['ops_per_sec'] or 0:>12.1f} ops/s "
+              f"p50 {result['p50_us']:>9.2f}us  p99 {result['p99_us']:>9.2f}us", file=sys.stderr)
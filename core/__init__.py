@@ -1,5 +1,13 @@
 from .error_manager import ErrorManager
 from .error_notification import ErrorNotifier
 from .config import TelegramNotifierConfig
+from .context import (
+    bind_context, reset_context, notification_context, current_context,
+    register_detail_provider, unregister_detail_provider
+)
+from .transport import Transport, AiogramTransport, HTTPTransport, InMemoryTransport
 
-__all__ = ['ErrorManager', 'ErrorNotifier', 'TelegramNotifierConfig']
\ No newline at end of file
+__all__ = ['ErrorManager', 'ErrorNotifier', 'TelegramNotifierConfig',
+           'Transport', 'AiogramTransport', 'HTTPTransport', 'InMemoryTransport',
+           'bind_context', 'reset_context', 'notification_context', 'current_context',
+           'register_detail_provider', 'unregister_detail_provider']
\ No newline at end of file
@@ -0,0 +1,56 @@
+import gzip
+import pprint
+from typing import Tuple
+
+from ..models.notification_models import ErrorNotification
+
+
+def build_attachment(notification: ErrorNotification, app_name: str,
+                     gzip_threshold: int = 64 * 1024) -> Tuple[str, bytes]:
+    """
+    Полный контекст уведомления для отправки документом
+
+    Файл собирается в памяти: сообщение, все детали без сокращений и
+    трассировка вместе с цепочкой исключений. Если размер превышает
+    gzip_threshold байт, файл сжимается.
+
+    Returns:
+        Имя файла и содержимое
+    """
+    lines = [
+        f"{app_name} - {notification.level.value.upper()}",
+        f"Модуль: {notification.category.value}",
+        f"Сообщение: {notification.message}",
+    ]
+    if notification.timestamp:
+        lines.append(f"Время: {notification.timestamp.isoformat(sep=' ', timespec='seconds')}")
+    if notification.repeat_count > 1:
+        lines.append(f"Повторы: {notification.repeat_count} за последние {notification.repeat_window or 0:.0f}с")
+    if notification.sample_weight > 1:
+        lines.append(f"Выборка: 1 из {notification.sample_weight}")
+
+    details = notification.get_details()
+    if details:
+        lines.append("")
+        lines.append("Детали:")
+        for key, value in details.items():
+            text = value if isinstance(value, str) else pprint.pformat(value, width=100, compact=True)
+            lines.append(f"  {key}: " + text.replace("\n", "\n    "))
+
+    traceback_text = notification.get_traceback()
+    if traceback_text:
+        lines.append("")
+        lines.append("Трассировка:")
+        lines.append(traceback_text)
+
+    data = ("\n".join(lines) + "\n").encode("utf-8")
+    stamp = notification.timestamp.strftime("%Y%m%d-%H%M%S") if notification.timestamp else "notification"
+    filename = f"{_safe_name(app_name)}-{notification.level.value}-{stamp}.txt"
+    if len(data) > gzip_threshold:
+        # mtime=0: одинаковое содержимое дает одинаковый архив
+        return filename + ".gz", gzip.compress(data, compresslevel=6, mtime=0)
+    return filename, data
+
+
+def _safe_name(name: str) -> str:
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in name) or "app"
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """
+    Собственный цикл событий нотификатора в отдельном потоке-демоне
+
+    Используется, когда уведомления приходят из синхронного кода,
+    а цикл событий приложения недоступен.
+    """
+
+    def __init__(self, name: str = "tg-error-notifier"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def is_alive(self) -> bool:
+        """Работает ли поток с циклом событий"""
+        return (self._thread is not None and
+                self._thread.is_alive() and
+                self.loop is not None and
+                self.loop.is_running())
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Запуск потока с циклом событий"""
+        if self.is_alive():
+            return self.loop
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self.loop
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            try:
+                pending = asyncio.all_tasks(self.loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            finally:
+                self.loop.close()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Остановка цикла событий и ожидание завершения потока"""
+        if self.loop is None or self._thread is None:
+            return
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("❌ Поток цикла событий нотификатора не завершился вовремя")
@@ -0,0 +1,163 @@
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional
+
+from ..models.error_models import LEVEL_ORDER, ErrorLevel, ErrorCategory
+from .history import NotificationHistory
+from .rendering import LEVEL_EMOJI
+
+if TYPE_CHECKING:
+    from aiogram import Router
+
+# Ограничение Telegram на длину сообщения
+_MESSAGE_LIMIT = 4096
+
+COMMANDS_HELP = (
+    "/errors [категория] [N] - последние N ошибок (ERROR и CRITICAL)\n"
+    "/top [минуты] - самые частые ошибки (по умолчанию за 60 минут)\n"
+    "/stats [минуты] - число уведомлений по уровням\n"
+    "/trace <отпечаток> - трассировка ошибки"
+)
+
+
+def format_recent(history: NotificationHistory, category: Optional[ErrorCategory] = None,
+                  limit: int = 10) -> str:
+    """Ответ на /errors"""
+    records = history.recent(limit, category, ErrorLevel.ERROR)
+    scope = f" ({category.value})" if category is not None else ""
+    if not records:
+        return f"Ошибок{scope} в журнале нет"
+    lines = [f"Последние ошибки{scope}:"]
+    for record in records:
+        lines.append(f"{LEVEL_EMOJI[record.level]} {history.wall_time(record):%H:%M:%S} "
+                     f"[{record.category.value}] {record.message} #{record.fingerprint[:8]}")
+    return _fit(lines)
+
+
+def format_top(history: NotificationHistory, minutes: float = 60, limit: int = 10) -> str:
+    """Ответ на /top"""
+    ranked = history.top(minutes * 60, limit)
+    if not ranked:
+        return f"За {minutes:g} мин ошибок нет"
+    lines = [f"Самые частые за {minutes:g} мин:"]
+    for record, count in ranked:
+        lines.append(f"×{count} {LEVEL_EMOJI[record.level]} [{record.category.value}] "
+                     f"{record.message} #{record.fingerprint[:8]}")
+    return _fit(lines)
+
+
+def format_stats(history: NotificationHistory, minutes: Optional[float] = None) -> str:
+    """Ответ на /stats"""
+    counts = history.counts(None if minutes is None else minutes * 60)
+    if minutes is not None:
+        title = f"За {minutes:g} мин:"
+    else:
+        age = history.oldest_age()
+        title = f"За {age / 60:.0f} мин (все записи журнала):" if age is not None else "Журнал пуст"
+    lines = [title]
+    for level in reversed(LEVEL_ORDER):
+        lines.append(f"{LEVEL_EMOJI[level]} {level.value.upper()}: {counts[level]}")
+    lines.append(f"Всего с запуска: {history.total}")
+    return "\n".join(lines)
+
+
+def format_trace(history: NotificationHistory, key: str) -> str:
+    """Ответ на /trace"""
+    traceback = history.traceback(key.lstrip("#"))
+    if traceback is None:
+        return "Трассировка не найдена (нет в журнале или нет трассировки)"
+    # Конец трассировки важнее начала
+    if len(traceback) > _MESSAGE_LIMIT:
+        traceback = "…" + traceback[-(_MESSAGE_LIMIT - 1):]
+    return traceback
+
+
+def create_history_router(history: Optional[Callable[[], Optional[NotificationHistory]]] = None,
+                          allowed_chats: Optional[Iterable[str]] = None) -> "Router":
+    """
+    Router aiogram с командами /errors, /top, /stats и /trace
+
+    Подключается к диспетчеру бота приложения:
+        dp.include_router(create_history_router())
+
+    Args:
+        history: Откуда брать журнал (по умолчанию ErrorManager.history)
+        allowed_chats: Чаты, которым отвечают команды; по умолчанию - чаты
+            получателей уведомлений. Остальные сообщения с командами
+            игнорируются: журнал содержит тексты ошибок.
+    """
+    from aiogram import Router
+    from aiogram.filters import Command, CommandObject
+    from aiogram.types import Message
+
+    from .error_manager import ErrorManager
+
+    if history is None:
+        history = ErrorManager.history
+    allowed = {str(chat) for chat in allowed_chats} if allowed_chats is not None else None
+
+    def permitted(message: Message) -> bool:
+        chats = allowed
+        if chats is None:
+            chats = set(ErrorManager.destination_chats())
+        return str(message.chat.id) in chats
+
+    router = Router(name="tg_error_notifier")
+
+    async def answer(message: Message, build: Callable[[NotificationHistory], str]):
+        if not permitted(message):
+            return
+        current = history()
+        text = build(current) if current is not None else "Журнал уведомлений отключен"
+        # Простой текст: в сообщениях ошибок может быть любая разметка
+        await message.answer(text, parse_mode=None)
+
+    @router.message(Command("errors"))
+    async def errors(message: Message, command: CommandObject):
+        category, limit = None, 10
+        for arg in (command.args or "").split():
+            if arg.isdigit():
+                limit = max(1, min(int(arg), 50))
+            else:
+                try:
+                    category = ErrorCategory(arg.lower())
+                except ValueError:
+                    if permitted(message):
+                        await message.answer(
+                            f"Неизвестная категория: {arg}\nКатегории: "
+                            + ", ".join(item.value for item in ErrorCategory), parse_mode=None)
+                    return
+        await answer(message, lambda current: format_recent(current, category, limit))
+
+    @router.message(Command("top"))
+    async def top(message: Message, command: CommandObject):
+        minutes = _minutes(command.args) or 60
+        await answer(message, lambda current: format_top(current, minutes))
+
+    @router.message(Command("stats"))
+    async def stats(message: Message, command: CommandObject):
+        minutes = _minutes(command.args)
+        await answer(message, lambda current: format_stats(current, minutes))
+
+    @router.message(Command("trace"))
+    async def trace(message: Message, command: CommandObject):
+        key = (command.args or "").strip()
+        await answer(message, lambda current: format_trace(current, key) if key else COMMANDS_HELP)
+
+    return router
+
+
+def _minutes(args: Optional[str]) -> Optional[float]:
+    try:
+        value = float((args or "").split()[0])
+    except (IndexError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _fit(lines: List[str]) -> str:
+    """Строки, помещающиеся в одно сообщение"""
+    size = 0
+    for count, line in enumerate(lines):
+        size += len(line) + 1
+        if size > _MESSAGE_LIMIT:
+            return "\n".join(lines[:count])
+    return "\n".join(lines)
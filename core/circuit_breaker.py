@@ -0,0 +1,94 @@
+import time
+from typing import Callable, Optional
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+BREAKER_STATES = (STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для отправки в Telegram
+
+    closed - отправка разрешена; после failure_threshold сбоев подряд
+    переходит в open. open - отправка сразу отклоняется; через
+    recovery_timeout секунд переходит в half_open. half_open - разрешено
+    не более half_open_max_calls пробных отправок: успех возвращает в closed,
+    сбой - снова в open. Переход в half_open происходит при очередной
+    отправке или пробном запросе нотификатора (probe_due).
+
+    Сбоем считаются только ошибки доступности (сеть, таймауты, 5xx),
+    но не ответы 429 и не ошибки запроса. Вызывается из одного цикла событий.
+    """
+
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1,
+                 on_state_change: Optional[Callable[[str, str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = STATE_CLOSED
+        self.failures = 0
+        # Число отклоненных отправок за все время
+        self.rejected = 0
+        self._on_state_change = on_state_change
+        self._clock = clock
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def allow(self) -> bool:
+        """Можно ли выполнить отправку сейчас"""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN:
+            if self._clock() - self._opened_at < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self._transition(STATE_HALF_OPEN)
+        if self._probes >= self.half_open_max_calls:
+            self.rejected += 1
+            return False
+        self._probes += 1
+        return True
+
+    def probe_due(self) -> bool:
+        """Истекла ли пауза разомкнутого предохранителя (без изменения состояния)"""
+        return self.state == STATE_OPEN and self._clock() - self._opened_at >= self.recovery_timeout
+
+    def record_success(self):
+        """Успешная отправка"""
+        self.failures = 0
+        if self.state != STATE_CLOSED:
+            self._transition(STATE_CLOSED)
+
+    def record_failure(self):
+        """Сбой отправки из-за недоступности Telegram"""
+        if not self.enabled:
+            return
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or (
+                self.state == STATE_CLOSED and self.failures >= self.failure_threshold):
+            self._opened_at = self._clock()
+            self._transition(STATE_OPEN)
+
+    def record_release(self):
+        """Пробная отправка завершилась без результата (например, ответ 429)"""
+        if self.state == STATE_HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def _transition(self, state: str):
+        previous, self.state = self.state, state
+        self._probes = 0
+        if state == STATE_CLOSED:
+            self.failures = 0
+        if self._on_state_change is not None:
+            self._on_state_change(previous, state)
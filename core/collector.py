@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+from ..models.notification_models import ErrorNotification
+from .serialization import (
+    FRAME_PREFIX_SIZE, decode_notification, encode_notification, frame, frame_length
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CollectorServer:
+    """
+    Сборщик уведомлений от рабочих процессов через Unix-сокет
+
+    Единственный процесс-отправитель принимает уведомления от всех рабочих
+    процессов и передает их своему нотификатору, который выполняет
+    ограничение частоты, дедупликацию и доставку.
+    """
+
+    def __init__(self, socket_path: str, handler: Callable[[ErrorNotification], Awaitable[None]]):
+        self.socket_path = socket_path
+        self._handler = handler
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Запуск приема соединений"""
+        if self._server is not None:
+            return
+        if os.path.exists(self.socket_path):
+            # Сокет, оставшийся от предыдущего запуска
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        logger.info(f"✅ Сборщик уведомлений слушает {self.socket_path}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                prefix = await reader.readexactly(FRAME_PREFIX_SIZE)
+                payload = await reader.readexactly(frame_length(prefix))
+                try:
+                    notification = decode_notification(payload)
+                except Exception as e:
+                    logger.error(f"Некорректное уведомление от рабочего процесса: {e}")
+                    continue
+                await self._handler(notification)
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка соединения с рабочим процессом: {e}")
+        finally:
+            writer.close()
+
+    async def close(self):
+        """Остановка приема соединений"""
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+        logger.info("✅ Сборщик уведомлений остановлен")
+
+
+class CollectorClient:
+    """
+    Клиент рабочего процесса для передачи уведомлений сборщику
+    """
+
+    def __init__(self, socket_path: str, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.socket_path = socket_path
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def is_available(self) -> bool:
+        """Можно ли сейчас пытаться отправить уведомление сборщику"""
+        return self._writer is not None or time.monotonic() >= self._retry_at
+
+    async def send(self, notification: ErrorNotification) -> bool:
+        """
+        Передача уведомления сборщику
+
+        Returns:
+            False если сборщик недоступен и уведомление нужно отправить напрямую
+        """
+        if not self.is_available():
+            return False
+        try:
+            writer = await self._connect()
+            # Кадр пишется одним вызовом, поэтому параллельные отправки не перемешиваются
+            writer.write(frame(encode_notification(notification)))
+            await writer.drain()
+            self._failures = 0
+            return True
+        except Exception as e:
+            self._on_failure(e)
+            return False
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        if self._writer is not None and not self._writer.is_closing():
+            return self._writer
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                _, self._writer = await asyncio.open_unix_connection(self.socket_path)
+        return self._writer
+
+    def _on_failure(self, error: Exception):
+        if self._failures == 0:
+            logger.warning(f"❌ Сборщик уведомлений недоступен ({error}), отправка напрямую")
+        delay = min(self.max_reconnect_delay, self.reconnect_delay * (2 ** self._failures))
+        self._failures += 1
+        self._retry_at = time.monotonic() + delay
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def close(self):
+        """Закрытие соединения со сборщиком"""
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+            self._writer = None
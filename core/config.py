@@ -1,4 +1,39 @@
 from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from ..models.error_models import ErrorLevel, ErrorCategory
+from .dispatch_queue import OVERFLOW_POLICIES
+from .routing import RouteTable, compile_routes
+from .rendering import normalize_parse_mode
+from .sampling import SamplingTable, compile_sampling
+from .transport import TRANSPORTS
+
+
+@dataclass
+class NotificationDestination:
+    """
+    Дополнительный получатель уведомлений (чат, тема форума, бот)
+    """
+    name: str
+    chat_id: str
+    bot_token: Optional[str] = None
+    message_thread_id: Optional[int] = None
+    min_level: str = "info"
+    categories: Optional[List[str]] = None
+
+    def validate(self):
+        """Проверка получателя"""
+        if not self.name:
+            raise ValueError("destination name is required")
+        if not self.chat_id:
+            raise ValueError(f"chat_id is required for destination {self.name!r}")
+        try:
+            ErrorLevel(self.min_level.lower())
+            for category in self.categories or ():
+                ErrorCategory(category.lower())
+        except ValueError as e:
+            raise ValueError(f"Invalid destination {self.name!r}: {e}")
+
 
 @dataclass
 class TelegramNotifierConfig:
@@ -13,10 +48,124 @@ class TelegramNotifierConfig:
     parse_mode: str = "Markdown"
     disable_notifications: bool = False
     max_message_length: int = 4096
-    
+    queue_max_size: int = 1000
+    queue_workers: int = 1
+    queue_overflow_policy: str = "drop_oldest"
+    dedup_window: float = 60.0
+    dedup_max_fingerprints: int = 10000
+    chat_rate_limit: float = 1.0
+    group_rate_limit: float = 20 / 60
+    bot_rate_limit: float = 30.0
+    max_send_retries: int = 3
+    critical_send_retries: int = 10
+    retry_backoff_base: float = 1.0
+    retry_backoff_max: float = 30.0
+    breaker_failure_threshold: int = 5
+    breaker_recovery_timeout: float = 30.0
+    digest_enabled: bool = False
+    digest_interval: float = 2.0
+    digest_max_items: int = 50
+    collector_socket: Optional[str] = None
+    collector_role: str = "client"
+    spool_dir: Optional[str] = None
+    spool_segment_size: int = 1024 * 1024
+    spool_max_bytes: int = 64 * 1024 * 1024
+    spool_flush_interval: float = 1.0
+    traceback_limit: int = 20
+    history_size: int = 1000
+    history_message_length: int = 200
+    attachments: bool = False
+    attachment_gzip_threshold: int = 64 * 1024
+    routing: Optional[Dict[str, str]] = None
+    sampling: Optional[Dict[str, Union[float, str]]] = None
+    destinations: Optional[List[NotificationDestination]] = None
+    transport: str = "aiogram"
+    http_pool_size: int = 100
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
+    http_keepalive_timeout: float = 60.0
+    api_server: Optional[str] = None
+    metrics_host: str = "127.0.0.1"
+    metrics_port: Optional[int] = None
+    shutdown_fallback_path: Optional[str] = None
+
     def validate(self):
         """Проверка конфигурации"""
         if not self.admin_bot_token:
             raise ValueError("admin_bot_token is required")
         if not self.notification_chat_id:
-            raise ValueError("notification_chat_id is required")
\ No newline at end of file
+            raise ValueError("notification_chat_id is required")
+        normalize_parse_mode(self.parse_mode)
+        if self.max_message_length <= 0:
+            raise ValueError("max_message_length must be positive")
+        if self.queue_max_size <= 0:
+            raise ValueError("queue_max_size must be positive")
+        if self.queue_workers <= 0:
+            raise ValueError("queue_workers must be positive")
+        if self.queue_overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"queue_overflow_policy must be one of: {', '.join(OVERFLOW_POLICIES)}")
+        if self.dedup_window < 0:
+            raise ValueError("dedup_window must not be negative")
+        if self.dedup_max_fingerprints <= 0:
+            raise ValueError("dedup_max_fingerprints must be positive")
+        if min(self.chat_rate_limit, self.group_rate_limit, self.bot_rate_limit) < 0:
+            raise ValueError("rate limits must not be negative")
+        if self.max_send_retries < 0 or self.critical_send_retries < 0:
+            raise ValueError("send retries must not be negative")
+        if self.breaker_failure_threshold < 0 or self.breaker_recovery_timeout <= 0:
+            raise ValueError("breaker_failure_threshold must not be negative, "
+                             "breaker_recovery_timeout must be positive")
+        if self.digest_enabled and (self.digest_interval <= 0 or self.digest_max_items <= 0):
+            raise ValueError("digest_interval and digest_max_items must be positive")
+        if self.collector_role not in ("client", "server"):
+            raise ValueError("collector_role must be 'client' or 'server'")
+        if self.spool_dir and (self.spool_segment_size <= 0 or
+                               self.spool_max_bytes < self.spool_segment_size or
+                               self.spool_flush_interval <= 0):
+            raise ValueError("spool_segment_size and spool_flush_interval must be positive, "
+                             "spool_max_bytes must not be less than spool_segment_size")
+        if self.traceback_limit <= 0:
+            raise ValueError("traceback_limit must be positive")
+        if self.history_size < 0 or self.history_message_length <= 0:
+            raise ValueError("history_size must not be negative, history_message_length must be positive")
+        if self.attachment_gzip_threshold < 0:
+            raise ValueError("attachment_gzip_threshold must not be negative")
+        if self.metrics_port is not None and not 0 <= self.metrics_port <= 65535:
+            raise ValueError("metrics_port must be between 0 and 65535")
+        if self.transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of: {', '.join(TRANSPORTS)}")
+        if self.http_pool_size <= 0:
+            raise ValueError("http_pool_size must be positive")
+        if min(self.http_timeout, self.http_connect_timeout, self.http_keepalive_timeout) <= 0:
+            raise ValueError("http_timeout, http_connect_timeout and http_keepalive_timeout must be positive")
+        names = {"default"}
+        for destination in self.destinations or ():
+            destination.validate()
+            if destination.name in names:
+                raise ValueError(f"Duplicate destination name: {destination.name!r}")
+            names.add(destination.name)
+        self.compile_routes()
+        self.compile_sampling()
+
+    def compile_routes(self) -> RouteTable:
+        """
+        Таблица маршрутизации уровень × категория → действие
+
+        Правила routing задаются как {"<уровень>[+][:<категория>]": "<действие>"},
+        действия: drop (отбросить), log (только лог), send (отправить),
+        page (отправить немедленно, минуя сводку). Например:
+        {"info": "log", "warning+:cache": "send", "warning": "log"}
+        """
+        return compile_routes(self.routing)
+
+    def compile_sampling(self) -> SamplingTable:
+        """
+        Таблица выборки уровень × категория → правило
+
+        Правила sampling задаются ключами как в routing, значение - доля
+        отправляемых сообщений (0.1) или целевое число сообщений в минуту
+        ("30/min"). ERROR и CRITICAL выборке не подлежат, если уровень
+        не указан в ключе явно. Например:
+        {"info": 0.1, "warning:cache": "30/min", "error:network": "60/min"}
+        """
+        return compile_sampling(self.sampling)
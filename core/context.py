@@ -0,0 +1,126 @@
+import contextvars
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+# Значения контекста неизменяемы: bind создает новый словарь, поэтому
+# захват при создании уведомления - просто ссылка, без копирования
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+_context: "contextvars.ContextVar[Mapping[str, Any]]" = contextvars.ContextVar(
+    "tg_error_notifier_context", default=_EMPTY
+)
+
+# Снимок зарегистрированных поставщиков; заменяется целиком при изменении
+_providers: Tuple[Tuple[str, Callable[[], Any]], ...] = ()
+
+
+class CapturedContext:
+    """
+    Контекст на момент создания уведомления
+
+    Значения, привязанные через bind_context, сохраняются сразу (это ссылка
+    на неизменяемый словарь). Поставщики деталей вызываются только в resolve -
+    когда уведомление прошло фильтры и отправляется, - внутри копии контекста
+    места ошибки, поэтому видят те же переменные контекста, что и код,
+    в котором она произошла.
+    """
+
+    __slots__ = ("values", "_providers", "_snapshot")
+
+    def __init__(self, values: Mapping[str, Any],
+                 providers: Tuple[Tuple[str, Callable[[], Any]], ...] = (),
+                 snapshot: Optional[contextvars.Context] = None):
+        self.values = values
+        self._providers = providers
+        self._snapshot = snapshot
+
+    def resolve(self) -> Dict[str, Any]:
+        """Значения контекста и результаты поставщиков (поставщики вызываются один раз)"""
+        resolved = dict(self.values)
+        providers, snapshot = self._providers, self._snapshot
+        # Копия контекста может удерживать объекты запроса
+        self._providers, self._snapshot = (), None
+        for name, provider in providers:
+            try:
+                value = snapshot.run(provider) if snapshot is not None else provider()
+            except Exception as e:
+                value = f"<{type(e).__name__}: {e}>"
+            if value is not None:
+                resolved[name] = value
+        self.values = resolved
+        return resolved
+
+    def __repr__(self) -> str:
+        return f"CapturedContext({dict(self.values)!r}, providers={len(self._providers)})"
+
+
+def bind_context(**values: Any) -> contextvars.Token:
+    """
+    Добавление значений к контексту уведомлений
+
+    Значения (request_id, user_id, имя обработчика...) попадают в детали всех
+    уведомлений, созданных в текущем контексте: после await и в задачах,
+    запущенных из него. Возвращает токен для reset_context.
+    """
+    return _context.set(MappingProxyType({**_context.get(), **values}))
+
+
+def reset_context(token: contextvars.Token):
+    """Возврат контекста к состоянию до bind_context"""
+    _context.reset(token)
+
+
+@contextmanager
+def notification_context(**values: Any) -> Iterator[Mapping[str, Any]]:
+    """
+    Значения контекста на время блока
+
+        async def handle(message):
+            with notification_context(user_id=message.from_user.id, handler="start"):
+                ...
+    """
+    token = _context.set(MappingProxyType({**_context.get(), **values}))
+    try:
+        yield _context.get()
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> Mapping[str, Any]:
+    """Значения контекста уведомлений в текущем контексте"""
+    return _context.get()
+
+
+def register_detail_provider(name: str, provider: Callable[[], Any]):
+    """
+    Поставщик детали, вычисляемой только для отправляемых уведомлений
+
+    provider вызывается без аргументов в контексте места ошибки и возвращает
+    значение детали name (None - деталь не добавляется). Подходит для
+    дорогих данных: состояние сессии, содержимое запроса, сведения о пользователе
+    из кэша. Исключение поставщика не теряет уведомление - вместо значения
+    будет описание ошибки.
+    """
+    global _providers
+    _providers = tuple(item for item in _providers if item[0] != name) + ((name, provider),)
+
+
+def unregister_detail_provider(name: str):
+    """Удаление поставщика детали"""
+    global _providers
+    _providers = tuple(item for item in _providers if item[0] != name)
+
+
+def capture_context() -> Optional[CapturedContext]:
+    """
+    Захват контекста для уведомления
+
+    Без значений и поставщиков возвращает None. Копия контекста (O(1))
+    делается только при зарегистрированных поставщиках.
+    """
+    values = _context.get()
+    providers = _providers
+    if not providers:
+        return CapturedContext(values) if values else None
+    return CapturedContext(values, providers, contextvars.copy_context())
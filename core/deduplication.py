@@ -0,0 +1,148 @@
+import dataclasses
+import hashlib
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+
+from ..models.notification_models import ErrorNotification
+
+_NUMBER_RE = re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}\b|\d+(?:\.\d+)?")
+_QUOTED_RE = re.compile(r"'[^']*'|\"[^\"]*\"")
+_SPACES_RE = re.compile(r"\s+")
+_FRAME_RE = re.compile(r'File "([^"]+)", line (\d+), in (\S+)')
+
+
+def normalize_message(message: str) -> str:
+    """Нормализация сообщения: числа, идентификаторы и строки в кавычках заменяются заглушками"""
+    message = _QUOTED_RE.sub("'?'", message)
+    message = _NUMBER_RE.sub("#", message)
+    return _SPACES_RE.sub(" ", message).strip()
+
+
+def top_frame(traceback_text: Optional[str]) -> str:
+    """Самый глубокий кадр трассировки (место возникновения исключения)"""
+    if not traceback_text:
+        return ""
+    frames = _FRAME_RE.findall(traceback_text)
+    if not frames:
+        return ""
+    filename, lineno, name = frames[-1]
+    return f"{filename}:{lineno}:{name}"
+
+
+def fingerprint(notification: ErrorNotification) -> str:
+    """Отпечаток уведомления: уровень, категория, нормализованное сообщение и верхний кадр трассировки"""
+    if notification.fingerprint is not None:
+        return notification.fingerprint
+    if notification.captured_traceback is not None:
+        frame = notification.captured_traceback.top_frame()
+    else:
+        frame = top_frame(notification.traceback)
+    key = "\x1f".join((
+        notification.level.value,
+        notification.category.value,
+        normalize_message(notification.message),
+        frame,
+    ))
+    notification.fingerprint = hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+    return notification.fingerprint
+
+
+class _FingerprintEntry:
+    __slots__ = ("first_seen", "count", "notification")
+
+    def __init__(self, first_seen: float, notification: ErrorNotification):
+        self.first_seen = first_seen
+        self.count = 1
+        self.notification = notification
+
+
+class Deduplicator:
+    """
+    Подавление повторяющихся уведомлений в пределах временного окна
+
+    Первое уведомление с данным отпечатком отправляется сразу, повторы
+    только подсчитываются. При закрытии окна формируется сводка с числом повторов.
+    Таблица отпечатков ограничена по размеру (LRU) и по времени жизни (окно).
+    """
+
+    def __init__(self, window: float = 60.0, max_fingerprints: int = 10000):
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self.suppressed = 0
+        self._entries: "OrderedDict[str, _FingerprintEntry]" = OrderedDict()
+        self._expirations: Deque[Tuple[float, str]] = deque()
+        self._summaries: List[ErrorNotification] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def register(self, notification: ErrorNotification, now: Optional[float] = None) -> bool:
+        """
+        Учет уведомления
+
+        Returns:
+            True если уведомление нужно отправить, False если это повтор
+        """
+        if now is None:
+            now = time.monotonic()
+        key = fingerprint(notification)
+
+        entry = self._entries.get(key)
+        if entry is not None and now - entry.first_seen < self.window:
+            entry.count += 1
+            self.suppressed += 1
+            self._entries.move_to_end(key)
+            return False
+
+        if entry is not None:
+            # Окно закрылось, но очистка еще не выполнялась
+            self._close(key, entry, now)
+
+        self._entries[key] = _FingerprintEntry(now, notification)
+        self._expirations.append((now + self.window, key))
+        while len(self._entries) > self.max_fingerprints:
+            _, old_entry = self._entries.popitem(last=False)
+            self._summarize(old_entry, now)
+        if len(self._expirations) > 2 * self.max_fingerprints:
+            # Сжатие очереди сроков от записей, которые уже вытеснены
+            self._expirations = deque(sorted(
+                (entry.first_seen + self.window, key) for key, entry in self._entries.items()
+            ))
+        return True
+
+    def collect_summaries(self, now: Optional[float] = None) -> List[ErrorNotification]:
+        """Закрытие истекших окон и получение сводок по подавленным повторам"""
+        if now is None:
+            now = time.monotonic()
+        while self._expirations and self._expirations[0][0] <= now:
+            expires_at, key = self._expirations.popleft()
+            entry = self._entries.get(key)
+            # Запись могла быть вытеснена или пересоздана в новом окне
+            if entry is not None and entry.first_seen + self.window == expires_at:
+                self._close(key, entry, now)
+        summaries, self._summaries = self._summaries, []
+        return summaries
+
+    def flush_summaries(self) -> List[ErrorNotification]:
+        """Принудительное закрытие всех окон"""
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            self._close(key, entry, now)
+        self._expirations.clear()
+        summaries, self._summaries = self._summaries, []
+        return summaries
+
+    def _close(self, key: str, entry: _FingerprintEntry, now: float):
+        del self._entries[key]
+        self._summarize(entry, now)
+
+    def _summarize(self, entry: _FingerprintEntry, now: float):
+        if entry.count > 1:
+            self._summaries.append(dataclasses.replace(
+                entry.notification,
+                timestamp=None,
+                repeat_count=entry.count,
+                repeat_window=min(self.window, now - entry.first_seen)
+            ))
@@ -0,0 +1,49 @@
+from typing import FrozenSet, Optional, Tuple
+
+from ..models.error_models import LEVEL_ORDER, ErrorLevel, ErrorCategory
+from ..models.notification_models import ErrorNotification
+from .digest import DigestBuffer
+from .dispatch_queue import NotificationQueue
+from .rate_limiter import TelegramRateLimiter
+
+DEFAULT_DESTINATION = "default"
+
+def accepted_cells(min_level: str = "info",
+                   categories: Optional[Tuple[str, ...]] = None) -> FrozenSet[Tuple[ErrorLevel, ErrorCategory]]:
+    """Набор ячеек уровень × категория, которые принимает получатель"""
+    start = LEVEL_ORDER.index(ErrorLevel(min_level.lower()))
+    selected = ([ErrorCategory(category.lower()) for category in categories]
+                if categories else list(ErrorCategory))
+    return frozenset((level, category) for level in LEVEL_ORDER[start:] for category in selected)
+
+
+class Destination:
+    """
+    Получатель уведомлений со своей очередью, ограничителем и сводкой
+
+    Каждый получатель обслуживается независимо: медленный или упершийся
+    в лимиты Telegram чат не задерживает доставку в остальные.
+    """
+
+    def __init__(self, name: str, chat_id: str, token: str,
+                 queue: NotificationQueue,
+                 rate_limiter: TelegramRateLimiter,
+                 accepted: FrozenSet[Tuple[ErrorLevel, ErrorCategory]],
+                 message_thread_id: Optional[int] = None,
+                 digest: Optional[DigestBuffer] = None):
+        self.name = name
+        self.chat_id = chat_id
+        # Бот создается нотификатором по токену при первой отправке
+        self.token = token
+        self.queue = queue
+        self.rate_limiter = rate_limiter
+        self.accepted = accepted
+        self.message_thread_id = message_thread_id
+        self.digest = digest
+
+    def accepts(self, notification: ErrorNotification) -> bool:
+        """Подходит ли уведомление получателю"""
+        return (notification.level, notification.category) in self.accepted
+
+    def __repr__(self) -> str:
+        return f"Destination({self.name!r}, chat_id={self.chat_id!r})"
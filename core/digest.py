@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from ..models.error_models import LEVEL_ORDER, ErrorLevel, ErrorCategory
+from ..models.notification_models import ErrorNotification
+from .rendering import LEVEL_EMOJI, MessageRenderer
+
+class DigestBuffer:
+    """
+    Накопитель уведомлений для отправки сводкой
+    """
+
+    def __init__(self, max_items: int = 50):
+        self.max_items = max_items
+        self._items: List[ErrorNotification] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, notification: ErrorNotification) -> bool:
+        """
+        Добавление уведомления в сводку
+
+        Returns:
+            True если достигнут порог и сводку пора отправлять
+        """
+        self._items.append(notification)
+        return len(self._items) >= self.max_items
+
+    def drain(self) -> List[ErrorNotification]:
+        """Извлечение всех накопленных уведомлений"""
+        items, self._items = self._items, []
+        return items
+
+
+def highest_level(notifications: List[ErrorNotification]) -> ErrorLevel:
+    """Наиболее важный уровень среди уведомлений"""
+    for level in reversed(LEVEL_ORDER):
+        if any(notification.level == level for notification in notifications):
+            return level
+    return ErrorLevel.INFO
+
+
+def pack_digest(notifications: List[ErrorNotification],
+                app_name: str,
+                max_length: int,
+                renderer: Optional[MessageRenderer] = None) -> List[Tuple[str, List[ErrorNotification]]]:
+    """
+    Упаковка сводки: сообщения вместе с вошедшими в них уведомлениями
+
+    Args:
+        renderer: Разметка и экранирование (по умолчанию parse_mode=Markdown)
+    """
+    if renderer is None:
+        renderer = MessageRenderer(app_name, max_length=max_length)
+    groups: Dict[Tuple[ErrorLevel, ErrorCategory], List[ErrorNotification]] = OrderedDict()
+    for level in reversed(LEVEL_ORDER):
+        for notification in notifications:
+            if notification.level == level:
+                groups.setdefault((level, notification.category), []).append(notification)
+
+    header = f"📦 {renderer.bold(renderer.escape(f'{app_name} - сводка ({len(notifications)})'))}"
+    messages: List[Tuple[str, List[ErrorNotification]]] = []
+    lines = [header]
+    packed: List[ErrorNotification] = []
+    length = len(header)
+
+    for (level, category), items in groups.items():
+        group_header = (f"\n{LEVEL_EMOJI.get(level, '📝')} {renderer.bold(renderer.escape(level.value.upper()))}"
+                        f" {renderer.escape(f'· {category.value} ({len(items)})')}")
+        group_started = False
+        # Строка не может быть длиннее сообщения вместе с заголовками
+        limit = max_length - len(header) - len(group_header) - 2
+        for notification in items:
+            line = _digest_line(notification, renderer, limit)
+
+            extra = len(line) + 1 + (0 if group_started else len(group_header) + 1)
+            if length + extra > max_length:
+                messages.append(("\n".join(lines), packed))
+                lines = [header]
+                packed = []
+                length = len(header)
+                group_started = False
+
+            if not group_started:
+                lines.append(group_header)
+                length += len(group_header) + 1
+                group_started = True
+            lines.append(line)
+            packed.append(notification)
+            length += len(line) + 1
+
+    if packed:
+        messages.append(("\n".join(lines), packed))
+    return messages
+
+
+def _digest_line(notification: ErrorNotification, renderer: MessageRenderer, limit: int) -> str:
+    time_str = notification.timestamp.strftime('%H:%M:%S') if notification.timestamp else ""
+    line = f"  • {time_str} {notification.message}"
+    if notification.repeat_count > 1:
+        line += f" (×{notification.repeat_count})"
+    if notification.sample_weight > 1:
+        line += f" (1 из {notification.sample_weight})"
+    return renderer.fit(line, limit)
@@ -0,0 +1,248 @@
+import asyncio
+import itertools
+import logging
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..models.error_models import LEVEL_ORDER, ErrorLevel
+from ..models.notification_models import ErrorNotification
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_LOWEST = "drop_lowest"
+OVERFLOW_BLOCK = "block"
+
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_LOWEST, OVERFLOW_BLOCK)
+
+# Полосы приоритета: от самой важной к наименее важной
+PRIORITY_LANES = LEVEL_ORDER[::-1]
+LEVEL_PRIORITY = {level: index for index, level in enumerate(PRIORITY_LANES)}
+
+
+class NotificationQueue:
+    """
+    Ограниченная очередь уведомлений с полосами приоритета и фоновыми обработчиками
+    """
+
+    def __init__(self,
+                 handler: Callable[[ErrorNotification], Awaitable[None]],
+                 max_size: int = 1000,
+                 workers: int = 1,
+                 overflow_policy: str = OVERFLOW_DROP_OLDEST):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self._handler = handler
+        self.max_size = max_size
+        self.workers = workers
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+
+        self._lanes: Dict[ErrorLevel, Deque[Tuple[int, ErrorNotification]]] = {
+            level: deque() for level in PRIORITY_LANES
+        }
+        self._sequence = itertools.count()
+        self._size = 0
+        self._unfinished = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid = os.getpid()
+        self._tasks: List[asyncio.Task] = []
+        # Уведомления, обработка которых прервана остановкой обработчиков
+        self._interrupted: List[ErrorNotification] = []
+        self._not_empty: Optional[asyncio.Event] = None
+        self._not_full: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """Цикл событий, к которому привязаны обработчики"""
+        # После fork цикл родительского процесса в дочернем не работает
+        if self._pid != os.getpid():
+            return None
+        return self._loop
+
+    def is_running(self) -> bool:
+        """Запущены ли обработчики в живом цикле событий"""
+        return (self.loop is not None and
+                not self._loop.is_closed() and
+                any(not task.done() for task in self._tasks))
+
+    def start(self):
+        """Запуск обработчиков в текущем цикле событий"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.is_running():
+            return
+
+        # Привязка к новому циклу: старые задачи погибли вместе со своим циклом,
+        # а уведомления, которые они обрабатывали, уже не будут подтверждены
+        self._loop = loop
+        self._pid = os.getpid()
+        self._unfinished = self._size
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._drained = asyncio.Event()
+        if self._size:
+            self._not_empty.set()
+        if self._size < self.max_size:
+            self._not_full.set()
+        if not self._unfinished:
+            self._drained.set()
+
+        self._tasks = [
+            loop.create_task(self._worker()) for _ in range(max(1, self.workers))
+        ]
+
+    async def put(self, notification: ErrorNotification):
+        """Постановка уведомления в очередь с учетом политики переполнения"""
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            await self.put_wait(notification)
+        else:
+            self.start()
+            self.put_nowait(notification)
+
+    async def put_wait(self, notification: ErrorNotification, limit: Optional[int] = None):
+        """
+        Постановка с ожиданием места при любой политике переполнения
+
+        Args:
+            limit: Ждать, пока в очереди не станет меньше limit уведомлений
+                (по умолчанию max_size)
+        """
+        self.start()
+        limit = self.max_size if limit is None else min(limit, self.max_size)
+        while self._size >= limit:
+            self._not_full.clear()
+            await self._not_full.wait()
+        self.put_nowait(notification)
+
+    def put_nowait(self, notification: ErrorNotification) -> bool:
+        """Постановка уведомления в очередь без ожидания; False если уведомление отброшено"""
+        if self._size >= self.max_size and not self._make_room(notification.level):
+            self._drop(notification)
+            return False
+
+        self._lanes[notification.level].append((next(self._sequence), notification))
+        self._size += 1
+        self._unfinished += 1
+        if self._drained is not None:
+            self._drained.clear()
+            self._not_empty.set()
+            if self._size >= self.max_size:
+                self._not_full.clear()
+        return True
+
+    def _make_room(self, level: ErrorLevel) -> bool:
+        """Освобождение места под новое уведомление"""
+        if self.overflow_policy == OVERFLOW_DROP_LOWEST:
+            for lane in reversed(PRIORITY_LANES):
+                if self._lanes[lane]:
+                    # Новое уведомление не вытесняет более важные
+                    if LEVEL_PRIORITY[lane] < LEVEL_PRIORITY[level]:
+                        return False
+                    self._evict(lane)
+                    return True
+            return False
+
+        # drop_oldest (и block при вызове без ожидания): вытесняем самое старое
+        oldest_lane = None
+        oldest_sequence = None
+        for lane in PRIORITY_LANES:
+            if self._lanes[lane]:
+                sequence = self._lanes[lane][0][0]
+                if oldest_sequence is None or sequence < oldest_sequence:
+                    oldest_lane, oldest_sequence = lane, sequence
+        if oldest_lane is None:
+            return False
+        self._evict(oldest_lane)
+        return True
+
+    def _evict(self, lane: ErrorLevel):
+        _, notification = self._lanes[lane].popleft()
+        self._size -= 1
+        self._task_done()
+        self._drop(notification)
+
+    def _drop(self, notification: ErrorNotification):
+        self.dropped += 1
+        logger.debug(f"Очередь уведомлений переполнена, отброшено: [{notification.category.value}] {notification.message}")
+
+    def _pop(self) -> ErrorNotification:
+        for lane in PRIORITY_LANES:
+            if self._lanes[lane]:
+                self._size -= 1
+                return self._lanes[lane].popleft()[1]
+        raise IndexError("pop from empty notification queue")
+
+    def _task_done(self):
+        self._unfinished -= 1
+        if self._drained is not None:
+            if self._size < self.max_size:
+                self._not_full.set()
+            if not self._unfinished:
+                self._drained.set()
+
+    async def _worker(self):
+        while True:
+            while not self._size:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+
+            notification = self._pop()
+            try:
+                await self._handler(notification)
+            except asyncio.CancelledError:
+                self._interrupted.append(notification)
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка обработчика очереди уведомлений: {e}")
+            finally:
+                self._task_done()
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ожидание отправки всех уведомлений из очереди
+
+        Returns:
+            True если очередь опустела до истечения таймаута
+        """
+        if not self._unfinished:
+            return True
+        self.start()
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def drain_pending(self) -> List[ErrorNotification]:
+        """
+        Извлечение всех неотправленных уведомлений в порядке приоритета
+
+        Первыми идут уведомления, обработка которых была прервана stop().
+        """
+        pending, self._interrupted = self._interrupted, []
+        while self._size:
+            pending.append(self._pop())
+            self._task_done()
+        return pending
+
+    async def stop(self):
+        """Остановка обработчиков"""
+        tasks, self._tasks = self._tasks, []
+        if self._loop is not asyncio.get_running_loop():
+            return
+        current = asyncio.current_task()
+        for task in tasks:
+            if task is not current:
+                task.cancel()
+        for task in tasks:
+            if task is not current:
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
@@ -1,9 +1,14 @@
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any
 
 from ..models.error_models import ErrorLevel, ErrorCategory
 from .error_notification import ErrorNotifier
 from .config import TelegramNotifierConfig
+from .context import CapturedContext
+from .history import NotificationHistory
+from .routing import ROUTE_DROP, RouteTable
+from .shutdown import DEFAULT_SIGNALS, ShutdownHooks
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +21,9 @@ class ErrorManager:
     _instance: Optional['ErrorManager'] = None
     _notifier: Optional[ErrorNotifier] = None
     _is_initialized: bool = False
+    # Таблица маршрутизации для раннего выхода до создания уведомления
+    _routes: RouteTable = {}
+    _shutdown_hooks: Optional[ShutdownHooks] = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -27,9 +35,13 @@ class ErrorManager:
             raise RuntimeError("ErrorManager must be initialized with configure() first")
 
     @classmethod
-    def configure(cls, config: TelegramNotifierConfig) -> 'ErrorManager':
+    def configure(cls, config: TelegramNotifierConfig, transport: Any = None) -> 'ErrorManager':
         """
         Инициализация менеджера ошибок с конфигурацией
+
+        Args:
+            transport: Transport, Bot aiogram или aiohttp.ClientSession приложения -
+                уведомления пойдут через его соединения (по умолчанию - config.transport)
         """
         if cls._is_initialized:
             logger.warning("ErrorManager уже инициализирован")
@@ -39,7 +51,8 @@ class ErrorManager:
         config.validate()
         
         # Инициализация нотификатора
-        cls._notifier = ErrorNotifier(config)
+        cls._notifier = ErrorNotifier(config, transport)
+        cls._routes = cls._notifier.routes
         cls._is_initialized = True
         cls._instance = cls()
         
@@ -58,6 +71,8 @@ class ErrorManager:
     @classmethod
     async def notify_info(cls, category: ErrorCategory, message: str, details: Optional[Dict[str, Any]] = None):
         """Отправка информационного уведомления"""
+        if cls._is_dropped(ErrorLevel.INFO, category):
+            return
         if cls._notifier:
             await cls._notifier.info(category, message, details)
         else:
@@ -66,6 +81,8 @@ class ErrorManager:
     @classmethod
     async def notify_warning(cls, category: ErrorCategory, message: str, details: Optional[Dict[str, Any]] = None):
         """Отправка предупреждения"""
+        if cls._is_dropped(ErrorLevel.WARNING, category):
+            return
         if cls._notifier:
             await cls._notifier.warning(category, message, details)
         else:
@@ -76,25 +93,74 @@ class ErrorManager:
                           details: Optional[Dict[str, Any]] = None, 
                           exc: Optional[Exception] = None):
         """Отправка уведомления об ошибке"""
-        if cls._notifier:
-            await cls._notifier.error(category, message, details, exc)
-        else:
-            logger.error(f"[{category.value}] {message} - {details}", exc_info=exc)
+        if cls._is_dropped(ErrorLevel.ERROR, category):
+            return
+        await cls._notify_exception(ErrorLevel.ERROR, category, message, details, exc)
 
     @classmethod
     async def notify_critical(cls, category: ErrorCategory, message: str, 
                              details: Optional[Dict[str, Any]] = None,
                              exc: Optional[Exception] = None):
         """Отправка уведомления о критической ошибке"""
+        if cls._is_dropped(ErrorLevel.CRITICAL, category):
+            return
+        await cls._notify_exception(ErrorLevel.CRITICAL, category, message, details, exc)
+
+    @classmethod
+    async def _notify_exception(cls, level: ErrorLevel, category: ErrorCategory, message: str,
+                                details: Optional[Dict[str, Any]], exc: Optional[Exception]):
+        """Отправка ERROR или CRITICAL без проверки маршрутизации (ее выполнил вызывающий)"""
         if cls._notifier:
-            await cls._notifier.critical(category, message, details, exc)
+            if level == ErrorLevel.CRITICAL:
+                await cls._notifier.critical(category, message, details, exc)
+            else:
+                await cls._notifier.error(category, message, details, exc)
         else:
-            logger.critical(f"[{category.value}] {message} - {details}", exc_info=exc)
+            logger.log(getattr(logging, level.name), f"[{category.value}] {message} - {details}", exc_info=exc)
+
+    @classmethod
+    def submit(cls, level: ErrorLevel, category: ErrorCategory, message: str,
+               details: Optional[Dict[str, Any]] = None,
+               exc: Optional[Exception] = None,
+               log: bool = True,
+               context: Optional[CapturedContext] = None):
+        """
+        Потокобезопасная отправка уведомления из синхронного кода
+
+        Можно вызывать из любого потока, в том числе без запущенного цикла событий
+        (пулы потоков, воркеры фоновых задач, обычные скрипты). Вызов не ждет
+        отправки: уведомление передается в цикл событий нотификатора.
+
+        Args:
+            log: Записывать ли уведомление в лог (False - запись уже есть в логе приложения)
+            context: Контекст, захваченный capture_context в другом потоке
+                (по умолчанию - контекст вызывающего кода)
+        """
+        if cls._is_dropped(level, category):
+            return
+        if cls._notifier:
+            cls._notifier.submit(cls._notifier.build_notification(level, category, message, details, exc, context), log)
+        else:
+            logger.log(getattr(logging, level.name), f"[{category.value}] {message} - {details}", exc_info=exc)
+
+    @classmethod
+    def bind_loop(cls, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Использовать цикл событий приложения для уведомлений из других потоков
+
+        Без привязки уведомления из потоков без цикла событий обслуживает
+        собственный фоновый поток нотификатора.
+        """
+        if cls._notifier:
+            cls._notifier.bind_loop(loop)
 
     @classmethod
     async def database_error(cls, operation: str, exc: Exception, details: Optional[Dict[str, Any]] = None):
         """Специализированный метод для ошибок базы данных"""
-        await cls.notify_error(
+        if cls._is_dropped(ErrorLevel.ERROR, ErrorCategory.DATABASE):
+            return
+        await cls._notify_exception(
+            ErrorLevel.ERROR,
             ErrorCategory.DATABASE,
             f"Ошибка базы данных при выполнении: {operation}",
             details,
@@ -104,7 +170,10 @@ class ErrorManager:
     @classmethod
     async def telegram_error(cls, operation: str, exc: Exception, details: Optional[Dict[str, Any]] = None):
         """Специализированный метод для ошибок Telegram API"""
-        await cls.notify_error(
+        if cls._is_dropped(ErrorLevel.ERROR, ErrorCategory.TELEGRAM):
+            return
+        await cls._notify_exception(
+            ErrorLevel.ERROR,
             ErrorCategory.TELEGRAM,
             f"Ошибка Telegram API при выполнении: {operation}",
             details,
@@ -114,7 +183,10 @@ class ErrorManager:
     @classmethod
     async def cache_error(cls, operation: str, exc: Exception, details: Optional[Dict[str, Any]] = None):
         """Специализированный метод для ошибок кэша"""
-        await cls.notify_error(
+        if cls._is_dropped(ErrorLevel.ERROR, ErrorCategory.CACHE):
+            return
+        await cls._notify_exception(
+            ErrorLevel.ERROR,
             ErrorCategory.CACHE,
             f"Ошибка кэша при выполнении: {operation}",
             details,
@@ -124,23 +196,179 @@ class ErrorManager:
     @classmethod
     async def system_error(cls, operation: str, exc: Exception, details: Optional[Dict[str, Any]] = None):
         """Специализированный метод для системных ошибок"""
-        await cls.notify_critical(
+        if cls._is_dropped(ErrorLevel.CRITICAL, ErrorCategory.SYSTEM):
+            return
+        await cls._notify_exception(
+            ErrorLevel.CRITICAL,
             ErrorCategory.SYSTEM,
             f"Системная ошибка при выполнении: {operation}",
             details,
             exc
         )
 
+    @classmethod
+    def _is_dropped(cls, level: ErrorLevel, category: ErrorCategory) -> bool:
+        """Отбрасывается ли уведомление таблицей маршрутизации (с учетом в метриках)"""
+        if cls._routes.get((level, category)) != ROUTE_DROP:
+            return False
+        cls._notifier.metrics.filtered.inc(level, category, "route_drop")
+        return True
+
+    @classmethod
+    def is_enabled(cls, level: ErrorLevel, category: ErrorCategory) -> bool:
+        """Не отбрасывается ли уведомление таблицей маршрутизации (без учета в метриках)"""
+        return cls._routes.get((level, category)) != ROUTE_DROP
+
+    @classmethod
+    def should_notify(cls, level: ErrorLevel, category: ErrorCategory) -> bool:
+        """
+        Проверка маршрутизации перед созданием уведомления
+
+        Для ранних выходов (декораторы, обработчики): отброшенное уведомление
+        учитывается в метриках так же, как при вызове notify_*.
+        """
+        return not cls._is_dropped(level, category)
+
     @classmethod
     def is_initialized(cls) -> bool:
         """Проверка инициализации менеджера"""
         return cls._is_initialized
 
     @classmethod
-    async def close(cls):
-        """Закрытие соединений"""
+    async def flush(cls, timeout: Optional[float] = None) -> bool:
+        """
+        Ожидание отправки всех уведомлений из очереди
+
+        Returns:
+            True если все уведомления отправлены до истечения таймаута
+        """
+        if cls._notifier:
+            return await cls._notifier.flush(timeout)
+        return True
+
+    @classmethod
+    async def start_collector(cls):
+        """
+        Запуск сборщика уведомлений в процессе-отправителе
+
+        Требует collector_socket и collector_role="server" в конфигурации.
+        Рабочие процессы с collector_role="client" передают уведомления
+        через Unix-сокет, а отправку в Telegram выполняет только этот процесс.
+        """
+        if not cls._notifier:
+            raise RuntimeError("ErrorManager не инициализирован. Сначала вызовите configure()")
+        await cls._notifier.start_collector()
+
+    @classmethod
+    def history(cls) -> Optional[NotificationHistory]:
+        """
+        Журнал последних уведомлений (None, если не инициализирован или history_size=0)
+        """
+        if cls._notifier is None:
+            return None
+        return cls._notifier.history
+
+    @classmethod
+    def destination_chats(cls) -> List[str]:
+        """Чаты получателей уведомлений (пусто, если не инициализирован)"""
+        if cls._notifier is None:
+            return []
+        return [str(destination.chat_id) for destination in cls._notifier.destinations]
+
+    @classmethod
+    def metrics_snapshot(cls) -> Dict[str, Any]:
+        """Текущие значения метрик нотификатора (см. NotifierMetrics.snapshot)"""
+        if not cls._notifier:
+            return {}
+        return cls._notifier.metrics.snapshot()
+
+    @classmethod
+    def metrics_text(cls) -> str:
+        """Метрики нотификатора в текстовом формате Prometheus"""
+        if not cls._notifier:
+            return ""
+        return cls._notifier.metrics.render_prometheus()
+
+    @classmethod
+    async def start_metrics_server(cls):
+        """
+        Запуск локального HTTP-сервера метрик
+
+        Требует metrics_port в конфигурации; метрики доступны по адресу
+        http://<metrics_host>:<metrics_port>/metrics
+        """
+        if not cls._notifier:
+            raise RuntimeError("ErrorManager не инициализирован. Сначала вызовите configure()")
+        await cls._notifier.start_metrics_server()
+
+    @classmethod
+    def flush_sync(cls, timeout: Optional[float] = None) -> bool:
+        """
+        Блокирующее ожидание отправки уведомлений из синхронного кода
+
+        Returns:
+            True если все уведомления отправлены до истечения таймаута
+        """
         if cls._notifier:
-            await cls._notifier.close()
+            return cls._notifier.flush_threadsafe(timeout)
+        return True
+
+    @classmethod
+    def install_shutdown_hooks(cls, signals: Iterable[int] = DEFAULT_SIGNALS,
+                               at_exit: bool = True, timeout: Optional[float] = 5.0):
+        """
+        Закрытие нотификатора по SIGTERM/SIGINT и при выходе из интерпретатора
+
+        Обработчик сигнала досылает уведомления не дольше timeout и передает
+        сигнал прежнему обработчику. Для асинхронных приложений хуки нужно
+        устанавливать из работающего цикла событий; при выходе через atexit
+        уже остановленный цикл приложения не может отправлять, и остаток
+        только сохраняется (в журнал или запасной приемник).
+
+        Args:
+            signals: Перехватываемые сигналы (пустой кортеж - только atexit)
+            at_exit: Закрывать нотификатор при выходе из интерпретатора
+            timeout: Срок досылки в секундах
+        """
+        if cls._shutdown_hooks is None:
+            cls._shutdown_hooks = ShutdownHooks(cls.close, cls.close_sync, timeout)
+        cls._shutdown_hooks.timeout = timeout
+        cls._shutdown_hooks.install(signals, at_exit)
+
+    @classmethod
+    def uninstall_shutdown_hooks(cls):
+        """Восстановление прежних обработчиков сигналов и отмена atexit"""
+        if cls._shutdown_hooks is not None:
+            cls._shutdown_hooks.uninstall()
+            cls._shutdown_hooks = None
+
+    @classmethod
+    async def close(cls, timeout: Optional[float] = 5.0):
+        """
+        Досылка уведомлений и закрытие соединений
+
+        Args:
+            timeout: Общий срок досылки в секундах (None - без ограничения);
+                не отправленное к сроку сохраняется в журнал или запасной приемник
+        """
+        notifier = cls._notifier
+        if notifier and not notifier.closing:
+            # Нотификатор остается доступным во время досылки: ошибки при остановке тоже уходят
+            await notifier.close(timeout)
+            cls._reset(notifier)
+
+    @classmethod
+    def close_sync(cls, timeout: Optional[float] = 5.0):
+        """Блокирующее закрытие из синхронного кода (см. close)"""
+        notifier = cls._notifier
+        if notifier and not notifier.closing:
+            notifier.close_threadsafe(timeout)
+            cls._reset(notifier)
+
+    @classmethod
+    def _reset(cls, notifier: ErrorNotifier):
+        if cls._notifier is notifier:
             cls._is_initialized = False
+            cls._routes = {}
             cls._notifier = None
             logger.info("✅ ErrorManager закрыт")
\ No newline at end of file
@@ -1,177 +1,1058 @@
+import asyncio
+import functools
 import logging
-import traceback
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Optional, Dict, Any
-
-from aiogram import Bot
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, Dict, Any, List
 
 from ..models.error_models import ErrorLevel, ErrorCategory
-from ..models.notification_models import ErrorNotification
+from ..models.notification_models import ErrorNotification, LazyDetails
 from .config import TelegramNotifierConfig
+from .dispatch_queue import NotificationQueue, OVERFLOW_BLOCK
+from .deduplication import Deduplicator
+from .rate_limiter import TelegramRateLimiter, TokenBucket, backoff_delay
+from .digest import DigestBuffer, pack_digest, highest_level
+from .background_loop import BackgroundLoop
+from .collector import CollectorClient, CollectorServer
+from .spool import NotificationSpool
+from .fallback import FallbackSink
+from .attachments import build_attachment
+from .exceptions import DeliveryError, TransportRateLimited, TransportUnavailable
+from .traceback_capture import CapturedTraceback
+from .context import CapturedContext, capture_context
+from .history import NotificationHistory
+from .routing import ROUTE_DROP, ROUTE_LOG, ROUTE_PAGE
+from .sampling import build_samplers
+from .destination import DEFAULT_DESTINATION, Destination, accepted_cells
+from .rendering import MessageRenderer
+from .metrics import MetricsServer, NotifierMetrics
+from .circuit_breaker import BREAKER_STATES, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+from .transport import AiogramTransport, Transport, create_transport
+
+if TYPE_CHECKING:
+    from aiogram import Bot
 
 logger = logging.getLogger(__name__)
 
+# Логгер пакета: его записи не возвращаются в нотификатор через TelegramLoggingHandler
+LIBRARY_LOGGER = __name__.rsplit(".", 2)[0]
+
+_LOG_LEVELS = {
+    ErrorLevel.INFO: logging.INFO,
+    ErrorLevel.WARNING: logging.WARNING,
+    ErrorLevel.ERROR: logging.ERROR,
+    ErrorLevel.CRITICAL: logging.CRITICAL
+}
+
 
 class ErrorNotifier:
     """
     Основной класс для отправки уведомлений об ошибках
     """
     
-    def __init__(self, config: TelegramNotifierConfig):
+    def __init__(self, config: TelegramNotifierConfig, transport: Any = None):
         self.config = config
-        self.bot = None
+        # Отправка настроена (есть токен и chat_id); сам бот создается при первой отправке
+        self.enabled = False
+        self.routes = config.compile_routes()
+        # Сэмплеры для ячеек уровень × категория с правилами выборки
+        self._samplers = build_samplers(config.compile_sampling())
+        self._renderer = MessageRenderer(config.app_name, config.parse_mode, config.max_message_length)
+        # Получатели: чат по умолчанию и дополнительные из config.destinations
+        self.destinations: List[Destination] = []
+        self._destinations_by_name: Dict[str, Destination] = {}
+        # Запросы к Bot API: aiogram (бот или сессия приложения), прямой HTTP
+        # или свой Transport. Соединения открываются при первой отправке
+        self.transport: Transport = create_transport(config, transport)
+        self._transport_ready = False
+        self._bot_buckets: Dict[str, TokenBucket] = {}
+        # Входная очередь: пересылка сборщику или раздача по очередям получателей
+        self._queue = NotificationQueue(
+            self._dispatch,
+            max_size=config.queue_max_size,
+            workers=config.queue_workers,
+            overflow_policy=config.queue_overflow_policy
+        )
+        self._deduplicator = Deduplicator(
+            window=config.dedup_window,
+            max_fingerprints=config.dedup_max_fingerprints
+        ) if config.dedup_window > 0 else None
+        # Последние уведомления для запросов (ErrorManager.history(), команды бота)
+        self.history = NotificationHistory(
+            config.history_size, config.history_message_length
+        ) if config.history_size > 0 else None
+        self._collector_client: Optional[CollectorClient] = None
+        self._collector_server: Optional[CollectorServer] = None
+        if config.collector_socket:
+            if config.collector_role == "server":
+                self._collector_server = CollectorServer(config.collector_socket, self._accept_remote)
+            else:
+                self._collector_client = CollectorClient(config.collector_socket)
+        self._spool: Optional[NotificationSpool] = None
+        if config.spool_dir:
+            self._spool = NotificationSpool(
+                config.spool_dir,
+                segment_size=config.spool_segment_size,
+                max_bytes=config.spool_max_bytes
+            )
+        # Недоставленные в прошлый раз уведомления отправляются при первом запуске очереди
+        self._replay_pending = self._spool is not None
+        # Куда сохраняются неотправленные уведомления при остановке без журнала
+        self._fallback = FallbackSink(config.shutdown_fallback_path)
+        self._closed = False
+        self.closing = False
+        self._background_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._background_tasks: List[asyncio.Task] = []
+        # Передача уведомлений из других потоков в цикл нотификатора
+        self._inbox: deque = deque()
+        self._wakeup_pending = False
+        self._app_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._owned_loop: Optional[BackgroundLoop] = None
+        self._owned_loop_lock = threading.Lock()
+        self.metrics = NotifierMetrics()
+        # Пока Telegram недоступен, отправка не ждет таймаутов, а сразу уходит в журнал
+        self._breaker = CircuitBreaker(
+            failure_threshold=config.breaker_failure_threshold,
+            recovery_timeout=config.breaker_recovery_timeout,
+            on_state_change=self._on_breaker_state_change
+        )
+        self._metrics_server: Optional[MetricsServer] = None
         self._setup_logging()
         self._initialize_bot()
+        self._register_metrics()
+        if self._spool is not None:
+            self._start_replay()
 
     def _setup_logging(self):
-        """Настройка логирования"""
-        if self.config.enable_logging:
-            logging.basicConfig(
-                level=getattr(logging, self.config.log_level.upper()),
-                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
+        """
+        Настройка логирования
+
+        Настраивается только логгер пакета, корневой логгер и обработчики
+        приложения не меняются. Собственный вывод в stderr добавляется, только
+        если приложение не настроило логирование.
+        """
+        if not self.config.enable_logging:
+            return
+        library_logger = logging.getLogger(LIBRARY_LOGGER)
+        library_logger.setLevel(getattr(logging, self.config.log_level.upper()))
+        if not library_logger.handlers and not logging.getLogger().handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            library_logger.addHandler(handler)
 
     def _initialize_bot(self):
-        """Инициализация Telegram бота"""
+        """
+        Настройка получателей
+
+        Ни aiogram, ни бот здесь не создаются: импорт aiogram занимает заметное
+        время, а многим процессам (CLI, короткие задачи) отправка не понадобится.
+        """
         try:
             if (self.config.admin_bot_token and 
                 self.config.notification_chat_id and 
                 not self.config.disable_notifications):
-                self.bot = Bot(token=self.config.admin_bot_token)
+                self._add_destination(DEFAULT_DESTINATION, self.config.notification_chat_id,
+                                      self.config.admin_bot_token, accepted_cells())
+                for destination in self.config.destinations or ():
+                    self._add_destination(
+                        destination.name,
+                        destination.chat_id,
+                        destination.bot_token or self.config.admin_bot_token,
+                        accepted_cells(destination.min_level, destination.categories),
+                        destination.message_thread_id
+                    )
+                self.enabled = True
                 logger.info("✅ Telegram бот для уведомлений инициализирован")
             else:
                 logger.warning("❌ Токен бота или chat_id не настроены, уведомления отключены")
         except Exception as e:
+            self.metrics.swallowed.inc("initialize")
             logger.error(f"❌ Ошибка инициализации бота для уведомлений: {e}")
 
+    def _register_metrics(self):
+        """Метрики, значения которых снимаются с компонентов при чтении"""
+        def queue_sizes():
+            sizes = {("ingest",): len(self._queue)}
+            for destination in self.destinations:
+                sizes[(destination.name,)] = len(destination.queue)
+            return sizes
+
+        def queue_dropped():
+            dropped = {("ingest",): self._queue.dropped}
+            for destination in self.destinations:
+                dropped[(destination.name,)] = destination.queue.dropped
+            return dropped
+
+        self.metrics.register_callback(
+            "tg_notifier_queue_size", "Notifications waiting in queues", ("queue",), queue_sizes
+        )
+        self.metrics.register_callback(
+            "tg_notifier_queue_dropped_total", "Notifications dropped on queue overflow",
+            ("queue",), queue_dropped, kind="counter"
+        )
+        self.metrics.register_callback(
+            "tg_notifier_inbox_size", "Notifications submitted from other threads and not yet accepted",
+            (), lambda: {(): len(self._inbox)}
+        )
+        self.metrics.register_callback(
+            "tg_notifier_circuit_state", "Circuit breaker state (1 for the current state)", ("state",),
+            lambda: {(state,): int(state == self._breaker.state) for state in BREAKER_STATES}
+        )
+        self.metrics.register_callback(
+            "tg_notifier_circuit_rejected_total", "Sends rejected while the circuit breaker was open",
+            (), lambda: {(): self._breaker.rejected}, kind="counter"
+        )
+        if self._deduplicator is not None:
+            self.metrics.register_callback(
+                "tg_notifier_duplicates_suppressed_total", "Repeated notifications folded into summaries",
+                (), lambda: {(): self._deduplicator.suppressed}, kind="counter"
+            )
+        if self._spool is not None:
+            self.metrics.register_callback(
+                "tg_notifier_spool_lost_total", "Undelivered notifications lost on spool overflow",
+                (), lambda: {(): self._spool.lost}, kind="counter"
+            )
+
+    @property
+    def bot(self) -> Optional["Bot"]:
+        """Бот по умолчанию при отправке через aiogram (создается при первом обращении)"""
+        if not self.enabled or not isinstance(self.transport, AiogramTransport):
+            return None
+        return self.transport.get_bot(self.config.admin_bot_token)
+
+    def _add_destination(self, name: str, chat_id: str, token: str, accepted,
+                         message_thread_id: Optional[int] = None):
+        """Создание получателя со своей очередью и ограничителем частоты"""
+        # Лимит бота общий для всех чатов, в которые он отправляет
+        bot_bucket = self._bot_buckets.get(token)
+        if bot_bucket is None and self.config.bot_rate_limit > 0:
+            bot_bucket = self._bot_buckets[token] = TokenBucket(
+                self.config.bot_rate_limit, self.config.bot_rate_limit
+            )
+
+        async def deliver(notification: ErrorNotification):
+            await self._deliver(destination, notification)
+
+        destination = Destination(
+            name,
+            chat_id,
+            token,
+            queue=NotificationQueue(
+                deliver,
+                max_size=self.config.queue_max_size,
+                workers=self.config.queue_workers,
+                overflow_policy=self.config.queue_overflow_policy
+            ),
+            rate_limiter=TelegramRateLimiter(
+                chat_rate=self.config.chat_rate_limit,
+                group_rate=self.config.group_rate_limit,
+                bot_rate=self.config.bot_rate_limit,
+                bot_bucket=bot_bucket
+            ),
+            accepted=accepted,
+            message_thread_id=message_thread_id,
+            digest=DigestBuffer(self.config.digest_max_items) if self.config.digest_enabled else None
+        )
+        self.destinations.append(destination)
+        self._destinations_by_name[name] = destination
+
     async def send_notification(self, notification: ErrorNotification):
         """
         Отправка уведомления
+
+        Уведомление только ставится в очередь, отправку в Telegram
+        выполняют фоновые обработчики очереди
         """
         try:
+            home = self._queue.loop
+            if home is not None and home is not asyncio.get_running_loop() and home.is_running():
+                # Очередь обслуживается другим циклом событий
+                self.submit(notification)
+                return
+
+            route = self._route(notification)
+            if route == ROUTE_DROP:
+                return
+
             # Логируем уведомление
             self._log_notification(notification)
             
-            # Отправляем в Telegram если бот инициализирован
-            if (self.bot and 
-                self.config.notification_chat_id and 
-                not self.config.disable_notifications):
-                message = self._format_message(notification)
-                await self._send_telegram_message(message)
+            # Ставим в очередь на отправку если бот инициализирован
+            if route != ROUTE_LOG and self._should_send(notification):
+                await self._queue.put(notification)
                 
         except Exception as e:
+            self.metrics.swallowed.inc("send_notification")
             logger.error(f"Ошибка при отправке уведомления: {e}")
 
-    async def _send_telegram_message(self, message: str):
-        """Отправка сообщения в Telegram"""
+    def _route(self, notification: ErrorNotification) -> Optional[str]:
+        """
+        Действие маршрутизации для уведомления с учетом в метриках
+
+        Не прошедшие выборку уведомления только логируются; прошедшие
+        получают вес - число событий, которые они представляют.
+        """
+        key = (notification.level, notification.category)
+        self.metrics.produced.inc(*key)
+        route = self.routes.get(key)
+        if route == ROUTE_DROP:
+            self.metrics.filtered.inc(*key, "route_drop")
+        elif route == ROUTE_LOG:
+            self.metrics.filtered.inc(*key, "route_log")
+        else:
+            sampler = self._samplers.get(key)
+            if sampler is not None:
+                weight = sampler.sample()
+                if not weight:
+                    self.metrics.filtered.inc(*key, "sampled")
+                    return ROUTE_LOG
+                notification.sample_weight = weight
+            if self.history is not None:
+                # Только принятое к отправке (отпечаток затем использует дедупликация);
+                # не прошедшие выборку учтены весом записи
+                self.history.add(notification, notification.sample_weight)
+        return route
+
+    def _should_send(self, notification: ErrorNotification) -> bool:
+        """Проверка, нужно ли ставить уведомление в очередь (вызывается в цикле нотификатора)"""
+        if not self.enabled:
+            self.metrics.filtered.inc(notification.level, notification.category, "disabled")
+            return False
+        if self._closed:
+            # Очереди уже остановлены: уведомление сохраняется без отправки
+            self._spill([notification])
+            return False
+        self._ensure_started()
+        # Повторы в пределах окна только подсчитываются; при работе через сборщик
+        # дедупликацию выполняет он
+        if (self._collector_client is None and
+                self._deduplicator is not None and
+                not self._deduplicator.register(notification)):
+            self.metrics.filtered.inc(notification.level, notification.category, "duplicate")
+            return False
+        return True
+
+    async def _accept_remote(self, notification: ErrorNotification):
+        """Прием уведомления от рабочего процесса (уже залогировано на его стороне)"""
+        self.metrics.produced.inc(notification.level, notification.category)
+        if self.history is not None:
+            self.history.add(notification, notification.sample_weight)
+        if self._should_send(notification):
+            await self._queue.put(notification)
+
+    async def start_collector(self):
+        """Запуск сборщика уведомлений от рабочих процессов"""
+        if self._collector_server is None:
+            raise RuntimeError("collector_socket with collector_role='server' is not configured")
+        self._ensure_started()
+        await self._collector_server.start()
+
+    def _accept_nowait(self, notification: ErrorNotification, log: bool = True):
+        """Прием уведомления без ожидания (вызывается в цикле нотификатора)"""
+        route = self._route(notification)
+        if route == ROUTE_DROP:
+            return
+        if log:
+            self._log_notification(notification)
+        if route != ROUTE_LOG and self._should_send(notification):
+            self._queue.put_nowait(notification)
+
+    def submit(self, notification: ErrorNotification, log: bool = True):
+        """
+        Потокобезопасная отправка уведомления из синхронного кода
+
+        Не требует запущенного цикла событий в вызывающем потоке: уведомление
+        передается в цикл нотификатора (цикл приложения или собственный
+        фоновый поток). При переполнении очереди действует политика вытеснения,
+        ожидание места не выполняется.
+
+        Args:
+            log: Записывать ли уведомление в лог (False - запись уже есть в логе приложения)
+        """
         try:
-            if len(message) > self.config.max_message_length:
-                message = message[:self.config.max_message_length-100] + "\n\n... (сообщение обрезано)"
-            
-            await self.bot.send_message(
-                chat_id=self.config.notification_chat_id,
-                text=message,
-                parse_mode=self.config.parse_mode
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            target = self._submission_loop(running)
+
+            if target is running:
+                # Быстрый путь: вызов уже в потоке цикла нотификатора
+                self._accept_nowait(notification, log)
+                return
+
+            # deque.append атомарен, блокировка не нужна; цикл будим один раз на пачку
+            self._inbox.append((notification, log))
+            if not self._wakeup_pending:
+                self._wakeup_pending = True
+                target.call_soon_threadsafe(self._drain_inbox)
+        except Exception as e:
+            self.metrics.swallowed.inc("submit")
+            logger.error(f"Ошибка при отправке уведомления: {e}")
+
+    def _submission_loop(self, running: Optional[asyncio.AbstractEventLoop]) -> asyncio.AbstractEventLoop:
+        """Выбор цикла событий, который будет обслуживать уведомление"""
+        home = self._queue.loop
+        if home is not None and home.is_running():
+            return home
+        if running is not None:
+            return running
+        if self._app_loop is not None and self._app_loop.is_running():
+            return self._app_loop
+        with self._owned_loop_lock:
+            if self._owned_loop is None:
+                self._owned_loop = BackgroundLoop()
+            return self._owned_loop.start()
+
+    def _drain_inbox(self):
+        """Прием уведомлений, переданных из других потоков"""
+        self._wakeup_pending = False
+        while self._inbox:
+            try:
+                self._accept_nowait(*self._inbox.popleft())
+            except Exception as e:
+                self.metrics.swallowed.inc("submit")
+                logger.error(f"Ошибка при отправке уведомления: {e}")
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Привязка к циклу событий приложения для уведомлений из других потоков
+
+        Args:
+            loop: Цикл событий (по умолчанию текущий запущенный)
+        """
+        self._app_loop = loop or asyncio.get_running_loop()
+
+    async def _run_on_home(self, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнение корутины в цикле, который обслуживает очередь"""
+        home = self._queue.loop
+        if home is not None and home is not asyncio.get_running_loop() and home.is_running():
+            future = asyncio.run_coroutine_threadsafe(coro_factory(), home)
+            return await asyncio.wrap_future(future)
+        return await coro_factory()
+
+    def _ensure_started(self):
+        """Запуск очереди и фоновых задач в текущем цикле событий"""
+        self._queue.start()
+        for destination in self.destinations:
+            destination.queue.start()
+        loop = asyncio.get_running_loop()
+        if self._background_loop is loop and any(not task.done() for task in self._background_tasks):
+            return
+
+        self._background_loop = loop
+        self._background_tasks = []
+        if self._deduplicator is not None:
+            interval = min(1.0, self._deduplicator.window / 4)
+            self._background_tasks.append(
+                loop.create_task(self._run_periodic(interval, self._sweep_duplicates))
+            )
+        for destination in self.destinations:
+            if destination.digest is not None:
+                self._background_tasks.append(loop.create_task(self._run_periodic(
+                    self.config.digest_interval, functools.partial(self._send_digest, destination)
+                )))
+        if self._spool is not None:
+            self._background_tasks.append(
+                loop.create_task(self._run_periodic(self.config.spool_flush_interval, self._spool.flush))
             )
+            if self._replay_pending:
+                self._replay_pending = False
+                self._background_tasks.append(loop.create_task(self._replay_spool()))
+        if self._breaker.enabled and type(self.transport).get_me is not Transport.get_me:
+            # Без пробных запросов отправка возобновилась бы только с очередным уведомлением
+            interval = min(1.0, self.config.breaker_recovery_timeout / 4)
+            self._background_tasks.append(loop.create_task(self._run_periodic(interval, self._probe_breaker)))
+
+    async def _run_periodic(self, interval: float, callback: Callable[[], Optional[Awaitable[None]]]):
+        """Периодический вызов фоновой функции"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                result = callback()
+                if result is not None:
+                    await result
+            except Exception as e:
+                self.metrics.swallowed.inc("background")
+                logger.error(f"Ошибка фоновой задачи уведомлений: {e}")
+
+    async def _replay_spool(self, current: bool = False):
+        """
+        Повторная отправка уведомлений из журнала
+
+        Args:
+            current: Вместе с не доставленными в прошлый раз - сохраненные
+                в текущем запуске (после восстановления связи с Telegram)
+        """
+        try:
+            count = await self._spool.replay(self._requeue_spooled, current)
         except Exception as e:
-            logger.error(f"Ошибка отправки Telegram сообщения: {e}")
+            logger.error(f"Ошибка чтения журнала уведомлений: {e}")
+            return
+        if count:
+            logger.info(f"Недоставленные уведомления возвращены в очередь: {count}")
 
-    def _format_message(self, notification: ErrorNotification) -> str:
-        """Форматирование сообщения для Telegram"""
-        level_emoji = {
-            ErrorLevel.INFO: "ℹ️",
-            ErrorLevel.WARNING: "⚠️",
-            ErrorLevel.ERROR: "❌",
-            ErrorLevel.CRITICAL: "🚨"
-        }.get(notification.level, "📝")
+    async def _requeue_spooled(self, name: Optional[str], notification: ErrorNotification):
+        """
+        Постановка уведомления из журнала в очередь с ожиданием места
+
+        Журнал занимает не больше половины очереди: остальное место остается
+        новым уведомлениям, чтобы они не вытесняли уже удаленные с диска записи.
+        """
+        destination = self._destinations_by_name.get(name)
+        # Получатель не указан или удален из конфигурации - общая очередь
+        queue = destination.queue if destination is not None else self._queue
+        await queue.put_wait(notification, max(1, queue.max_size // 2))
+
+    def _start_replay(self):
+        """Запуск повторной отправки журнала сразу после настройки, без ожидания первого уведомления"""
+        if not self.enabled or not self._spool.has_backlog():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        target = self._submission_loop(running)
+        if target is running:
+            self._ensure_started()
+        else:
+            target.call_soon_threadsafe(self._ensure_started)
+
+    async def _probe_breaker(self):
+        """
+        Пробный запрос getMe, когда истекла пауза разомкнутого предохранителя
+
+        Запрос не адресован чату и не проходит через ограничитель частоты;
+        успех замыкает предохранитель, и журнал отправляется повторно.
+        """
+        breaker = self._breaker
+        if not breaker.probe_due() or not breaker.allow():
+            return
+        try:
+            if not self._transport_ready:
+                await self.transport.prepare()
+                self._transport_ready = True
+            await self.transport.get_me(self._destinations_by_name[DEFAULT_DESTINATION].token)
+        except TransportRateLimited:
+            breaker.record_release()
+        except (TransportUnavailable, asyncio.TimeoutError, OSError) as e:
+            logger.debug(f"Telegram по-прежнему недоступен: {e}")
+            breaker.record_failure()
+        except asyncio.CancelledError:
+            breaker.record_release()
+            raise
+        except Exception:
+            # Telegram ответил (например, ошибкой токена) - связь есть
+            breaker.record_success()
+        else:
+            breaker.record_success()
+
+    def _spool_undelivered(self, notifications: List[ErrorNotification],
+                           destination: Optional[Destination] = None):
+        """Сохранение недоставленных уведомлений в журнал"""
+        if self._spool is None:
+            return
+        name = destination.name if destination is not None else None
+        for notification in notifications:
+            self._spool.append(notification, name)
+
+    def _spill(self, notifications: List[ErrorNotification],
+               destination: Optional[Destination] = None):
+        """Сохранение неотправленных уведомлений: в журнал или запасной приемник"""
+        if not notifications:
+            return
+        if self._spool is not None:
+            self._spool_undelivered(notifications, destination)
+        else:
+            self._fallback.write(notifications, destination.name if destination is not None else None)
+
+    def _drain_all(self) -> int:
+        """Перенос всех неотправленных уведомлений из очередей и сводок в _spill"""
+        count = 0
+        pending = self._queue.drain_pending()
+        if self._deduplicator is not None:
+            pending.extend(self._deduplicator.flush_summaries())
+        self._spill(pending)
+        count += len(pending)
+        for destination in self.destinations:
+            pending = destination.queue.drain_pending()
+            if destination.digest is not None:
+                pending.extend(destination.digest.drain())
+            self._spill(pending, destination)
+            count += len(pending)
+        return count
+
+    def _sweep_duplicates(self):
+        """Отправка сводок по закрывшимся окнам дедупликации"""
+        for summary in self._deduplicator.collect_summaries():
+            self._queue.put_nowait(summary)
+
+    async def _stop_background(self):
+        """Остановка фоновых задач"""
+        tasks, self._background_tasks = self._background_tasks, []
+        if self._background_loop is not asyncio.get_running_loop():
+            return
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _dispatch(self, notification: ErrorNotification):
+        """Обработка уведомления из входной очереди"""
+        if self._collector_client is not None:
+            if await self._collector_client.send(notification):
+                return
+            # Сборщик недоступен: отправляем сами, с локальной дедупликацией
+            if self._deduplicator is not None and not self._deduplicator.register(notification):
+                self.metrics.filtered.inc(notification.level, notification.category, "duplicate")
+                return
+        await self._fan_out(notification)
+
+    async def _fan_out(self, notification: ErrorNotification):
+        """Раздача уведомления в очереди подходящих получателей"""
+        for destination in self.destinations:
+            if destination.accepts(notification):
+                if self.config.queue_overflow_policy == OVERFLOW_BLOCK:
+                    await destination.queue.put(notification)
+                else:
+                    destination.queue.put_nowait(notification)
+
+    async def _deliver(self, destination: Destination, notification: ErrorNotification):
+        """Отправка уведомления из очереди получателя в Telegram"""
+        # В режиме сводки все, кроме срочных (page), копится и уходит пачкой
+        if (destination.digest is not None and
+                self.routes.get((notification.level, notification.category)) != ROUTE_PAGE):
+            if destination.digest.add(notification):
+                await self._send_digest(destination)
+            return
+
+        parts = self._renderer.render(notification)
+        try:
+            if self.config.attachments and (len(parts) > 1 or self._renderer.traceback_clipped(notification)):
+                # Полный контекст одним документом, в подписи - краткая сводка
+                filename, data = build_attachment(notification, self.config.app_name,
+                                                  self.config.attachment_gzip_threshold)
+                await self._send_telegram_document(self._renderer.caption(notification), filename, data,
+                                                   notification.level, destination)
+            else:
+                # Длинное сообщение уходит несколькими частями подряд
+                for part in parts:
+                    await self._send_telegram_message(part, notification.level, destination)
+        except DeliveryError as e:
+            self.metrics.failed.inc(notification.level, notification.category, destination.name)
+            if e.retryable:
+                self._spill([notification], destination)
+        else:
+            self._record_sent([notification], destination)
+
+    def _record_sent(self, notifications: List[ErrorNotification], destination: Destination):
+        now = datetime.now()
+        for notification in notifications:
+            self.metrics.sent.inc(notification.level, notification.category, destination.name)
+            if notification.timestamp is not None:
+                self.metrics.delivery_latency.observe(
+                    (now - notification.timestamp).total_seconds(), notification.level, notification.category
+                )
+
+    async def _send_digest(self, destination: Destination):
+        """Отправка накопленных уведомлений получателя сводкой"""
+        notifications = destination.digest.drain()
+        if not notifications:
+            return
+        level = highest_level(notifications)
+        for message, packed in pack_digest(notifications, self.config.app_name,
+                                           self.config.max_message_length, self._renderer):
+            try:
+                await self._send_telegram_message(message, level, destination)
+            except DeliveryError as e:
+                for notification in packed:
+                    self.metrics.failed.inc(notification.level, notification.category, destination.name)
+                if e.retryable:
+                    self._spill(packed, destination)
+            else:
+                self._record_sent(packed, destination)
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ожидание отправки всех уведомлений из очереди
+
+        Args:
+            timeout: Максимальное время ожидания в секундах (None - без ограничения)
+
+        Returns:
+            True если все уведомления отправлены до истечения таймаута
+        """
+        return await self._run_on_home(lambda: self._flush(timeout))
+
+    def flush_threadsafe(self, timeout: Optional[float] = None) -> bool:
+        """
+        Блокирующее ожидание отправки уведомлений из синхронного кода
+
+        Нельзя вызывать из потока цикла, который обслуживает очередь.
+        """
+        home = self._queue.loop
+        if home is None or not home.is_running():
+            return not self._pending_count() and not self._inbox
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is home:
+            raise RuntimeError("flush_threadsafe() cannot be called from the notifier event loop")
+        future = asyncio.run_coroutine_threadsafe(self._flush(timeout), home)
+        try:
+            return future.result(None if timeout is None else timeout + 1)
+        except Exception:
+            return False
+
+    async def _flush(self, timeout: Optional[float]) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        # Уведомления из других потоков, еще не принятые циклом
+        self._drain_inbox()
+        if not await self._queue.flush(timeout):
+            return False
+        remaining = None if deadline is None else max(0.0, deadline - loop.time())
+        # Получатели досылают параллельно, каждый в пределах общего срока
+        results = await asyncio.gather(*(
+            self._flush_destination(destination, remaining) for destination in self.destinations
+        ))
+        return all(results)
+
+    async def _flush_destination(self, destination: Destination, timeout: Optional[float]) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        if not await destination.queue.flush(timeout):
+            return False
+        if destination.digest is not None and len(destination.digest):
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                await asyncio.wait_for(self._send_digest(destination), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def _pending_count(self) -> int:
+        """Число уведомлений во входной очереди и очередях получателей"""
+        return len(self._queue) + sum(len(destination.queue) for destination in self.destinations)
+
+    async def _send_telegram_message(self, message: str, level: ErrorLevel = ErrorLevel.ERROR,
+                                     destination: Optional[Destination] = None):
+        """
+        Отправка сообщения в Telegram
 
-        message_lines = [
-            f"{level_emoji} *{self.config.app_name} - {notification.level.value.upper()}*",
-            f"*Модуль:* {notification.category.value}",
-            f"*Сообщение:* {notification.message}",
-        ]
+        Длинные сообщения заранее делит на части MessageRenderer.
 
-        if notification.details:
-            details_str = "\n".join([f"  - {k}: {v}" for k, v in notification.details.items()])
-            message_lines.append(f"*Детали:*\n{details_str}")
+        Args:
+            destination: Получатель (по умолчанию - чат notification_chat_id)
 
-        if notification.timestamp:
-            message_lines.append(f"*Время:* {notification.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
+        Raises:
+            DeliveryError: Сообщение не доставлено
+        """
+        await self._call_telegram(
+            destination, level, "send_message",
+            lambda token, chat_id, extra: self.transport.send_message(
+                token, chat_id, message, self._renderer.telegram_parse_mode, **extra
+            )
+        )
 
-        if notification.traceback and notification.level in [ErrorLevel.ERROR, ErrorLevel.CRITICAL]:
-            tb_preview = "\n".join(notification.traceback.split('\n')[-5:])
-            message_lines.append(f"*Трассировка:*\n```\n{tb_preview}\n```")
+    async def _send_telegram_document(self, caption: str, filename: str, data: bytes,
+                                      level: ErrorLevel = ErrorLevel.ERROR,
+                                      destination: Optional[Destination] = None):
+        """
+        Отправка документа с подписью в Telegram (один запрос sendDocument)
 
-        return "\n".join(message_lines)
+        Raises:
+            DeliveryError: Документ не доставлен
+        """
+        await self._call_telegram(
+            destination, level, "send_document",
+            lambda token, chat_id, extra: self.transport.send_document(
+                token, chat_id, filename, data, caption, self._renderer.telegram_parse_mode, **extra
+            )
+        )
+
+    async def _call_telegram(self, destination: Optional[Destination], level: ErrorLevel, method: str,
+                             request: Callable[[str, str, Dict[str, Any]], Awaitable[Any]]):
+        """
+        Выполнение запроса к Bot API с повторами
+
+        Соблюдает лимиты Telegram, ждет retry_after при ответе 429 и повторяет
+        попытку при сетевых ошибках с экспоненциальной задержкой.
+
+        Args:
+            destination: Получатель (по умолчанию - чат notification_chat_id)
+            method: Имя метода для логов и метрик
+            request: Вызов метода транспорта по (токен, chat_id, доп. аргументы)
+
+        Raises:
+            DeliveryError: Запрос не выполнен
+        """
+        if destination is None:
+            destination = self._destinations_by_name[DEFAULT_DESTINATION]
+        if not self._transport_ready:
+            await self.transport.prepare()
+            self._transport_ready = True
+        chat_id = destination.chat_id
+        rate_limiter = destination.rate_limiter
+        extra = {}
+        if destination.message_thread_id is not None:
+            extra["message_thread_id"] = destination.message_thread_id
+        retries = (self.config.critical_send_retries if level == ErrorLevel.CRITICAL
+                   else self.config.max_send_retries)
+
+        breaker = self._breaker
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                raise DeliveryError("circuit breaker is open")
+            await rate_limiter.acquire(chat_id)
+            started = time.perf_counter()
+            try:
+                await request(destination.token, chat_id, extra)
+                self.metrics.send_duration.observe(time.perf_counter() - started, destination.name)
+                breaker.record_success()
+                return
+            except TransportRateLimited as e:
+                # Задержку выдержит ограничитель перед следующей попыткой
+                logger.warning(f"Превышен лимит Telegram, повтор через {e.retry_after}с")
+                self.metrics.retries.inc(destination.name, "rate_limited")
+                breaker.record_release()
+                rate_limiter.penalize(chat_id, e.retry_after)
+            except (TransportUnavailable, asyncio.TimeoutError, OSError) as e:
+                self.metrics.send_duration.observe(time.perf_counter() - started, destination.name)
+                breaker.record_failure()
+                # При разомкнутом предохранителе следующая попытка будет сразу отклонена
+                if attempt < retries and breaker.state != STATE_OPEN:
+                    self.metrics.retries.inc(destination.name, "network")
+                    delay = backoff_delay(attempt, self.config.retry_backoff_base, self.config.retry_backoff_max)
+                    logger.warning(f"Ошибка сети при отправке в Telegram: {e}, повтор через {delay:.1f}с")
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                breaker.record_release()
+                raise
+            except Exception as e:
+                # Telegram ответил (ошибка запроса, неверный токен) - соединение в порядке
+                breaker.record_success()
+                self.metrics.swallowed.inc(method)
+                logger.error(f"Ошибка отправки в Telegram ({method}): {e}")
+                raise DeliveryError(str(e), retryable=False) from e
+
+        logger.error(f"Ошибка отправки в Telegram ({method}): исчерпаны попытки ({retries + 1})")
+        raise DeliveryError(f"retries exhausted ({retries + 1})")
+
+    def _on_breaker_state_change(self, previous: str, state: str):
+        """Логирование и учет переключений предохранителя"""
+        self.metrics.breaker_transitions.inc(state)
+        if state == STATE_OPEN:
+            logger.warning(f"❌ Telegram недоступен, отправка приостановлена на "
+                           f"{self.config.breaker_recovery_timeout:g}с (сбоев подряд: {self._breaker.failures})")
+        elif state == STATE_HALF_OPEN:
+            logger.info("Пробная отправка после паузы")
+        else:
+            logger.info("✅ Отправка в Telegram возобновлена")
+            if self._spool is not None and not self.closing:
+                # Уведомления, сохраненные в журнал за время недоступности
+                self._background_tasks.append(
+                    asyncio.get_running_loop().create_task(self._replay_spool(current=True))
+                )
+
+    def _format_message(self, notification: ErrorNotification) -> str:
+        """Форматирование сообщения для Telegram"""
+        return self._renderer.render_text(notification)
 
     def _log_notification(self, notification: ErrorNotification):
-        """Логирование уведомления"""
-        log_message = f"[{notification.category.value}] {notification.message}"
-        
-        if notification.details:
-            log_message += f" | Details: {notification.details}"
-            
-        if notification.level == ErrorLevel.INFO:
-            logger.info(log_message)
-        elif notification.level == ErrorLevel.WARNING:
-            logger.warning(log_message)
-        elif notification.level == ErrorLevel.ERROR:
-            logger.error(log_message)
-        elif notification.level == ErrorLevel.CRITICAL:
-            logger.critical(log_message)
+        """
+        Логирование уведомления
 
-    async def info(self, category: ErrorCategory, message: str, details: Optional[Dict[str, Any]] = None):
-        """Информационное уведомление"""
-        await self.send_notification(ErrorNotification(
-            level=ErrorLevel.INFO,
+        Вызывается до дедупликации и выборки, поэтому ленивые детали
+        (аргументы вызова) и поставщики деталей здесь не вычисляются:
+        в лог идут только готовые детали и значения контекста.
+        """
+        log_level = _LOG_LEVELS.get(notification.level, logging.INFO)
+        if not logger.isEnabledFor(log_level):
+            return
+
+        details = notification.details
+        if isinstance(details, LazyDetails) and not details.resolved:
+            details = None
+        if notification.context is not None and notification.context.values:
+            details = {**notification.context.values, **(details or {})}
+        if details:
+            logger.log(log_level, "[%s] %s | Details: %s",
+                       notification.category.value, notification.message, details)
+        else:
+            logger.log(log_level, "[%s] %s", notification.category.value, notification.message)
+
+    def build_notification(self, level: ErrorLevel, category: ErrorCategory, message: str,
+                           details: Optional[Dict[str, Any]] = None,
+                           exc: Optional[BaseException] = None,
+                           context: Optional[CapturedContext] = None) -> ErrorNotification:
+        """
+        Создание уведомления
+
+        Для ERROR и CRITICAL захватывается трассировка переданного исключения;
+        ее текст форматируется только при отправке. Контекст уведомлений
+        (bind_context, поставщики деталей) захватывается в вызывающем коде,
+        если не передан уже захваченный.
+        """
+        if context is None:
+            context = capture_context()
+        captured = None
+        if exc is not None and level in (ErrorLevel.ERROR, ErrorLevel.CRITICAL):
+            captured = CapturedTraceback.capture(exc, self.config.traceback_limit)
+        return ErrorNotification(
+            level=level,
             category=category,
             message=message,
             details=details,
-            timestamp=datetime.now()
-        ))
+            timestamp=datetime.now(),
+            captured_traceback=captured,
+            context=context
+        )
+
+    async def info(self, category: ErrorCategory, message: str, details: Optional[Dict[str, Any]] = None):
+        """Информационное уведомление"""
+        await self.send_notification(self.build_notification(ErrorLevel.INFO, category, message, details))
 
     async def warning(self, category: ErrorCategory, message: str, details: Optional[Dict[str, Any]] = None):
         """Предупреждение"""
-        await self.send_notification(ErrorNotification(
-            level=ErrorLevel.WARNING,
-            category=category,
-            message=message,
-            details=details,
-            timestamp=datetime.now()
-        ))
+        await self.send_notification(self.build_notification(ErrorLevel.WARNING, category, message, details))
 
     async def error(self, category: ErrorCategory, message: str, 
                    details: Optional[Dict[str, Any]] = None, 
                    exc: Optional[Exception] = None):
         """Ошибка"""
-        traceback_str = traceback.format_exc() if exc else None
-        
-        await self.send_notification(ErrorNotification(
-            level=ErrorLevel.ERROR,
-            category=category,
-            message=message,
-            details=details,
-            timestamp=datetime.now(),
-            traceback=traceback_str
-        ))
+        await self.send_notification(self.build_notification(ErrorLevel.ERROR, category, message, details, exc))
 
     async def critical(self, category: ErrorCategory, message: str, 
                       details: Optional[Dict[str, Any]] = None,
                       exc: Optional[Exception] = None):
         """Критическая ошибка"""
-        traceback_str = traceback.format_exc() if exc else None
-        
-        await self.send_notification(ErrorNotification(
-            level=ErrorLevel.CRITICAL,
-            category=category,
-            message=message,
-            details=details,
-            timestamp=datetime.now(),
-            traceback=traceback_str
-        ))
+        await self.send_notification(self.build_notification(ErrorLevel.CRITICAL, category, message, details, exc))
+
+    async def close(self, timeout: Optional[float] = 5.0):
+        """
+        Досылка уведомлений и закрытие соединений
+
+        Args:
+            timeout: Общий срок досылки в секундах (None - без ограничения).
+                Уведомления, не отправленные к сроку, сохраняются в журнал
+                (spool_dir) или в запасной приемник (shutdown_fallback_path или лог)
+        """
+        if self.closing:
+            return
+        self.closing = True
+        await self._run_on_home(lambda: self._close(timeout))
+        self._stop_owned_loop(timeout)
+
+    def close_threadsafe(self, timeout: Optional[float] = 5.0):
+        """
+        Блокирующее закрытие из синхронного кода (обработчики сигналов, atexit)
+
+        Если цикл, обслуживающий очередь, уже остановлен (например, asyncio.run
+        завершился), отправка невозможна: оставшиеся уведомления сразу
+        сохраняются. Нельзя вызывать из потока цикла, который обслуживает очередь.
+        """
+        if self.closing:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        home = self._queue.loop
+        if home is None or not home.is_running():
+            # Очередь еще не запущена, но уведомления могут ждать в цикле, которому переданы
+            if self._owned_loop is not None and self._owned_loop.is_alive():
+                home = self._owned_loop.loop
+            elif self._app_loop is not None and self._app_loop.is_running():
+                home = self._app_loop
+        if home is not None and home.is_running():
+            if running is home:
+                raise RuntimeError("close_threadsafe() cannot be called from the notifier event loop")
+            self.closing = True
+            future = asyncio.run_coroutine_threadsafe(self._close(timeout), home)
+            try:
+                # Небольшой запас сверх срока на остановку очередей и сохранение остатка
+                future.result(None if timeout is None else timeout + 1)
+            except Exception as e:
+                logger.error(f"❌ Нотификатор не закрылся вовремя: {e}")
+        elif running is None:
+            self.closing = True
+            self._close_stranded()
+        else:
+            raise RuntimeError("close_threadsafe() cannot be called from a running event loop, use close()")
+        self._stop_owned_loop(timeout)
+
+    def _close_stranded(self):
+        """Закрытие без цикла событий: сохранение всего, что осталось в очередях"""
+        self._closed = True
+        # Уведомления из других потоков, еще не принятые циклом
+        self._drain_inbox()
+        spilled = self._drain_all()
+        if spilled:
+            logger.warning(f"❌ Цикл событий нотификатора остановлен, сохранено без отправки: {spilled}")
+        asyncio.run(self._close_stranded_resources())
+
+    async def _close_stranded_resources(self):
+        if self._spool is not None:
+            try:
+                await self._spool.flush()
+            except Exception as e:
+                logger.error(f"Ошибка записи журнала уведомлений: {e}")
+            self._spool.close()
+        try:
+            await self.transport.close()
+        except Exception as e:
+            logger.debug(f"Ошибка закрытия соединения с ботом: {e}")
+
+    def _stop_owned_loop(self, timeout: Optional[float]):
+        if self._owned_loop is not None:
+            self._owned_loop.stop(timeout)
+            self._owned_loop = None
+
+    async def start_metrics_server(self):
+        """Запуск HTTP-сервера метрик на metrics_host:metrics_port"""
+        if self.config.metrics_port is None:
+            raise RuntimeError("metrics_port is not configured")
+        if self._metrics_server is None:
+            self._metrics_server = MetricsServer(self.metrics, self.config.metrics_host, self.config.metrics_port)
+            await self._metrics_server.start()
 
-    async def close(self):
-        """Закрытие соединений"""
-        if self.bot:
-            await self.bot.session.close()
-            logger.info("✅ Соединение с ботом для уведомлений закрыто")
\ No newline at end of file
+    async def _close(self, timeout: Optional[float]):
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        if self._collector_server is not None:
+            await self._collector_server.close()
+        if self._metrics_server is not None:
+            await self._metrics_server.close()
+            self._metrics_server = None
+        await self._stop_background()
+        if self._deduplicator is not None:
+            for summary in self._deduplicator.flush_summaries():
+                self._queue.put_nowait(summary)
+        # Уведомления об ошибках во время остановки тоже успевают уйти до срока
+        remaining = None if deadline is None else max(0.0, deadline - loop.time())
+        if not await self._flush(remaining):
+            logger.warning(f"❌ Не отправлено уведомлений к сроку остановки: {self._pending_count()}")
+        self._closed = True
+        await self._queue.stop()
+        for destination in self.destinations:
+            await destination.queue.stop()
+        # Все, что не успело уйти (включая прерванные отправки), сохраняем
+        self._drain_all()
+        if self._spool is not None:
+            try:
+                await self._spool.flush()
+            except Exception as e:
+                logger.error(f"Ошибка записи журнала уведомлений: {e}")
+            self._spool.close()
+        if self._collector_client is not None:
+            await self._collector_client.close()
+        await self.transport.close()
+        if self.enabled:
+            logger.info("✅ Соединение с ботом для уведомлений закрыто")
@@ -0,0 +1,32 @@
+class DeliveryError(Exception):
+    """
+    Сообщение не удалось доставить в Telegram
+
+    Attributes:
+        retryable: Ошибка временная (сеть, лимиты, сбой сервера) и доставку стоит повторить позже
+    """
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TransportError(Exception):
+    """Bot API отклонил запрос (ошибка запроса, неверный токен); повтор не поможет"""
+
+
+class TransportUnavailable(TransportError):
+    """Bot API недоступен: сетевая ошибка, таймаут или ответ 5xx"""
+
+
+class TransportRateLimited(TransportError):
+    """
+    Ответ 429 Too Many Requests
+
+    Attributes:
+        retry_after: Через сколько секунд Telegram разрешает повторить запрос
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+from typing import Iterable, Optional
+
+from ..models.notification_models import ErrorNotification
+
+logger = logging.getLogger(__name__)
+
+
+class FallbackSink:
+    """
+    Запасной приемник недоставленных уведомлений
+
+    Используется без журнала (spool_dir): для остатка очередей при остановке
+    и для уведомлений, отклоненных при недоступности Telegram.
+
+    С path уведомления дописываются в файл построчно в JSON, без path -
+    записываются в лог с уровнем ERROR. Запись синхронная: приемник
+    работает и тогда, когда цикл событий уже остановлен.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.written = 0
+
+    def write(self, notifications: Iterable[ErrorNotification], destination: Optional[str] = None) -> int:
+        """Сохранение уведомлений; возвращает их число"""
+        notifications = list(notifications)
+        if not notifications:
+            return 0
+        if self.path:
+            try:
+                self._write_file(notifications, destination)
+            except Exception as e:
+                logger.error(f"Ошибка записи недоставленных уведомлений в {self.path}: {e}")
+                self._write_log(notifications, destination)
+        else:
+            self._write_log(notifications, destination)
+        self.written += len(notifications)
+        return len(notifications)
+
+    def _write_file(self, notifications, destination: Optional[str]):
+        lines = [
+            json.dumps(_record(notification, destination), ensure_ascii=False, default=str) + "\n"
+            for notification in notifications
+        ]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_log(self, notifications, destination: Optional[str]):
+        for notification in notifications:
+            logger.error("Уведомление не доставлено%s: [%s/%s] %s | Details: %s",
+                         f" ({destination})" if destination else "",
+                         notification.level.value, notification.category.value,
+                         notification.message, notification.get_details())
+
+
+def _record(notification: ErrorNotification, destination: Optional[str]) -> dict:
+    details = notification.get_details()
+    return {
+        "destination": destination,
+        "level": notification.level.value,
+        "category": notification.category.value,
+        "message": notification.message,
+        "details": dict(details) if details else None,
+        "timestamp": notification.timestamp.isoformat() if notification.timestamp else None,
+        "traceback": notification.get_traceback(),
+        "repeat_count": notification.repeat_count,
+        "sample_weight": notification.sample_weight,
+    }
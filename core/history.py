@@ -0,0 +1,169 @@
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from ..models.error_models import LEVEL_ORDER, ErrorLevel, ErrorCategory
+from ..models.notification_models import ErrorNotification
+from .deduplication import fingerprint
+from .traceback_capture import CapturedTraceback
+
+_LEVEL_RANK = {level: rank for rank, level in enumerate(LEVEL_ORDER)}
+
+# Трассировка в виде текста (уведомления от рабочих процессов) хранится не длиннее
+TRACEBACK_MAX_CHARS = 16 * 1024
+
+
+class HistoryRecord:
+    """Запись журнала последних уведомлений"""
+
+    __slots__ = ("at", "level", "category", "message", "fingerprint", "weight")
+
+    def __init__(self, at: float, level: ErrorLevel, category: ErrorCategory,
+                 message: str, fingerprint: str, weight: int):
+        # time.monotonic() в момент записи
+        self.at = at
+        self.level = level
+        self.category = category
+        self.message = message
+        self.fingerprint = fingerprint
+        # Сколько событий представляет запись (выборка в рабочем процессе)
+        self.weight = weight
+
+    def __repr__(self) -> str:
+        return f"HistoryRecord({self.level.value}, {self.category.value}, {self.message!r}, {self.fingerprint})"
+
+
+class _TracebackEntry:
+    __slots__ = ("traceback", "references")
+
+    def __init__(self, traceback: Optional[Union[CapturedTraceback, str]]):
+        self.traceback = traceback
+        self.references = 1
+
+
+class NotificationHistory:
+    """
+    Кольцевой буфер последних уведомлений
+
+    Хранит не больше capacity записей: старые вытесняются новыми, поэтому
+    память ограничена при любом потоке уведомлений. Записи компактны:
+    время - число time.monotonic(), уровень и категория - ссылки на члены
+    перечислений, сообщение обрезается и интернируется (одинаковые сообщения
+    всплеска занимают память один раз), детали не сохраняются. Трассировка
+    хранится одна на отпечаток и удаляется вместе с последней ссылающейся
+    на нее записью.
+
+    Записывает цикл событий нотификатора; запросы можно выполнять из любого
+    потока - они работают со снимком буфера.
+    """
+
+    def __init__(self, capacity: int = 1000, message_length: int = 200,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.message_length = message_length
+        self.total = 0
+        self._clock = clock
+        self._records: Deque[HistoryRecord] = deque(maxlen=capacity)
+        self._tracebacks: Dict[str, _TracebackEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, notification: ErrorNotification, weight: int = 1):
+        """Запись уведомления"""
+        key = fingerprint(notification)
+        message = notification.message
+        if len(message) > self.message_length:
+            message = message[:self.message_length - 1] + "…"
+        record = HistoryRecord(self._clock(), notification.level, notification.category,
+                               sys.intern(message), key, weight)
+
+        if len(self._records) == self.capacity:
+            self._release(self._records[0])
+        self._records.append(record)
+        self.total += 1
+
+        entry = self._tracebacks.get(key)
+        if entry is not None:
+            entry.references += 1
+        else:
+            traceback = notification.captured_traceback
+            if traceback is None and notification.traceback:
+                traceback = notification.traceback[-TRACEBACK_MAX_CHARS:]
+            self._tracebacks[key] = _TracebackEntry(traceback)
+
+    def _release(self, record: HistoryRecord):
+        entry = self._tracebacks[record.fingerprint]
+        entry.references -= 1
+        if not entry.references:
+            del self._tracebacks[record.fingerprint]
+
+    def recent(self, limit: int = 10, category: Optional[ErrorCategory] = None,
+               min_level: Optional[ErrorLevel] = None) -> List[HistoryRecord]:
+        """Последние limit записей (новые первыми) с фильтром по категории и уровню"""
+        rank = _LEVEL_RANK[min_level] if min_level is not None else 0
+        found = []
+        for record in reversed(tuple(self._records)):
+            if category is not None and record.category is not category:
+                continue
+            if _LEVEL_RANK[record.level] < rank:
+                continue
+            found.append(record)
+            if len(found) >= limit:
+                break
+        return found
+
+    def top(self, window: float = 3600.0, limit: int = 10) -> List[Tuple[HistoryRecord, int]]:
+        """
+        Самые частые отпечатки за последние window секунд
+
+        Returns:
+            Последняя запись с отпечатком и число событий, по убыванию числа
+        """
+        counts: Dict[str, int] = {}
+        latest: Dict[str, HistoryRecord] = {}
+        for record in self._window(window):
+            counts[record.fingerprint] = counts.get(record.fingerprint, 0) + record.weight
+            latest.setdefault(record.fingerprint, record)
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(latest[key], count) for key, count in ranked]
+
+    def counts(self, window: Optional[float] = None) -> Dict[ErrorLevel, int]:
+        """Число событий по уровням (за последние window секунд или за все хранимое)"""
+        counts = {level: 0 for level in LEVEL_ORDER}
+        for record in self._window(window):
+            counts[record.level] += record.weight
+        return counts
+
+    def traceback(self, key: str) -> Optional[str]:
+        """Трассировка по отпечатку (префиксу отпечатка), если записи с ним еще хранятся"""
+        entry = self._tracebacks.get(key)
+        if entry is None and key:
+            matches = [value for name, value in list(self._tracebacks.items()) if name.startswith(key)]
+            entry = matches[0] if len(matches) == 1 else None
+        if entry is None or entry.traceback is None:
+            return None
+        return str(entry.traceback)
+
+    def wall_time(self, record: HistoryRecord) -> datetime:
+        """Время записи по часам системы"""
+        return datetime.fromtimestamp(time.time() - (self._clock() - record.at))
+
+    def oldest_age(self) -> Optional[float]:
+        """Сколько секунд назад сделана самая старая хранимая запись"""
+        records = tuple(self._records)
+        return self._clock() - records[0].at if records else None
+
+    def _window(self, window: Optional[float]):
+        # Снимок: tuple(deque) копируется целиком, не отпуская GIL
+        records = reversed(tuple(self._records))
+        if window is None:
+            yield from records
+            return
+        since = self._clock() - window
+        for record in records:
+            if record.at < since:
+                break
+            yield record
@@ -0,0 +1,197 @@
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from ..models.error_models import ErrorLevel, ErrorCategory
+from .context import capture_context
+from .error_manager import ErrorManager
+from .error_notification import LIBRARY_LOGGER
+
+# Логгеры, записи которых не отправляются: сама библиотека и ее транспорт.
+# Иначе сбой отправки порождал бы новые уведомления о сбое отправки.
+EXCLUDED_LOGGERS = (LIBRARY_LOGGER, "aiogram", "aiohttp")
+
+# Фрагменты имени логгера → категория (проверяются по частям имени через точку)
+CATEGORY_KEYWORDS: Tuple[Tuple[Tuple[str, ...], ErrorCategory], ...] = (
+    (("sqlalchemy", "asyncpg", "psycopg", "psycopg2", "aiosqlite", "sqlite3", "alembic",
+      "tortoise", "peewee", "db", "database", "orm", "repository"), ErrorCategory.DATABASE),
+    (("redis", "aioredis", "memcache", "aiomcache", "cache"), ErrorCategory.CACHE),
+    (("telegram", "telebot", "pyrogram", "telethon", "bot", "handlers"), ErrorCategory.TELEGRAM),
+    (("auth", "authentication", "jwt", "oauth", "oauthlib", "login", "session"), ErrorCategory.AUTH),
+    (("apscheduler", "scheduler", "schedule", "celery", "cron", "jobs", "tasks"), ErrorCategory.SCHEDULE),
+    (("pydantic", "marshmallow", "validation", "validators", "schemas"), ErrorCategory.VALIDATION),
+    (("httpx", "requests", "urllib3", "grpc", "boto3", "botocore", "clients"), ErrorCategory.EXTERNAL_SERVICE),
+    (("websockets", "socket", "ssl", "dns", "network"), ErrorCategory.NETWORK),
+    (("api", "views", "routes", "fastapi", "uvicorn", "starlette", "django", "flask"), ErrorCategory.API),
+)
+
+# Поля LogRecord, которыми можно задать категорию и детали отдельной записи:
+# logger.error("...", extra={"error_category": ErrorCategory.CACHE, "error_details": {...}})
+CATEGORY_ATTR = "error_category"
+DETAILS_ATTR = "error_details"
+
+# Поток обработчика помечается, чтобы записи, порожденные отправкой, не зацикливались
+_state = threading.local()
+
+
+def map_level(levelno: int) -> Optional[ErrorLevel]:
+    """Уровень уведомления для уровня записи лога (ниже INFO - None)"""
+    if levelno >= logging.CRITICAL:
+        return ErrorLevel.CRITICAL
+    if levelno >= logging.ERROR:
+        return ErrorLevel.ERROR
+    if levelno >= logging.WARNING:
+        return ErrorLevel.WARNING
+    if levelno >= logging.INFO:
+        return ErrorLevel.INFO
+    return None
+
+
+class TelegramLoggingHandler(QueueHandler):
+    """
+    Обработчик logging, передающий записи лога в нотификатор
+
+    В потоке, который пишет в лог, выполняется только определение категории
+    (по имени логгера, с кэшем), проверка таблицы маршрутизации и постановка
+    неглубокой копии записи в очередь - без форматирования трассировки и без
+    обращения к сети. Контекст уведомлений (bind_context) захватывается
+    здесь же, иначе поток обработчика его не увидит. Уведомления создает
+    QueueListener в отдельном потоке через ErrorManager.submit.
+
+    Args:
+        level: Минимальный уровень записей (по умолчанию ERROR)
+        categories: Префиксы имен логгеров → категория; самый длинный префикс
+            важнее CATEGORY_KEYWORDS
+        default_category: Категория, если ее не удалось определить
+        exclude: Логгеры (с дочерними), записи которых не отправляются
+        max_queue_size: Предел очереди; при переполнении записи отбрасываются
+    """
+
+    def __init__(self, level: int = logging.ERROR,
+                 categories: Optional[Dict[str, Union[ErrorCategory, str]]] = None,
+                 default_category: ErrorCategory = ErrorCategory.SYSTEM,
+                 exclude: Iterable[str] = EXCLUDED_LOGGERS,
+                 max_queue_size: int = 10000):
+        # SimpleQueue реализована на C и не берет блокировку Python при записи
+        super().__init__(queue.SimpleQueue())
+        self.setLevel(level)
+        self.max_queue_size = max_queue_size
+        self.default_category = default_category
+        self.exclude = tuple(exclude)
+        self.dropped = 0
+        # Самые длинные префиксы проверяются первыми
+        self._prefixes = sorted(
+            ((prefix, ErrorCategory(category)) for prefix, category in (categories or {}).items()),
+            key=lambda item: len(item[0]), reverse=True
+        )
+        self._categories: Dict[str, Optional[ErrorCategory]] = {}
+        self._listener: Optional[QueueListener] = None
+        self._listener_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord):
+        if getattr(_state, "active", False) or not ErrorManager.is_initialized():
+            return
+        try:
+            category = self._category_for(record)
+            if category is None:
+                return
+            level = map_level(record.levelno)
+            if level is None or not ErrorManager.should_notify(level, category):
+                return
+            if self._listener is None:
+                self.start()
+            if self.queue.qsize() >= self.max_queue_size:
+                self.dropped += 1
+                return
+            self.enqueue(self._prepare(record, level, category))
+        except Exception:
+            self.handleError(record)
+
+    def _category_for(self, record: logging.LogRecord) -> Optional[ErrorCategory]:
+        """Категория записи; None - запись не отправляется"""
+        explicit = getattr(record, CATEGORY_ATTR, None)
+        if explicit is not None:
+            return explicit if isinstance(explicit, ErrorCategory) else ErrorCategory(explicit)
+        try:
+            return self._categories[record.name]
+        except KeyError:
+            category = self._categories[record.name] = self._infer_category(record.name)
+            return category
+
+    def _infer_category(self, name: str) -> Optional[ErrorCategory]:
+        for excluded in self.exclude:
+            if name == excluded or name.startswith(excluded + "."):
+                return None
+        for prefix, category in self._prefixes:
+            if name == prefix or name.startswith(prefix + "."):
+                return category
+        parts = name.lower().split(".")
+        for keywords, category in CATEGORY_KEYWORDS:
+            if any(part in keywords for part in parts):
+                return category
+        return self.default_category
+
+    def _prepare(self, record: logging.LogRecord, level: ErrorLevel,
+                 category: ErrorCategory) -> logging.LogRecord:
+        """
+        Копия записи для очереди
+
+        Сообщение подставляется сразу (аргументы могут измениться после
+        возврата), а исключение передается как есть: трассировка
+        форматируется уже при отправке уведомления.
+        """
+        # Копия словаря атрибутов в разы быстрее copy.copy для LogRecord
+        prepared = logging.LogRecord.__new__(logging.LogRecord)
+        prepared.__dict__.update(record.__dict__)
+        record = prepared
+        record.msg = record.getMessage()
+        record.args = None
+        record.tg_level = level
+        record.tg_category = category
+        record.tg_context = capture_context()
+        return record
+
+    def start(self):
+        """Запуск потока, создающего уведомления (выполняется при первой записи)"""
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = QueueListener(self.queue, _NotifierHandler())
+                self._listener.start()
+
+    def close(self):
+        """Отправка оставшихся записей в нотификатор и остановка потока"""
+        with self._listener_lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+        super().close()
+
+
+class _NotifierHandler(logging.Handler):
+    """Обработчик в потоке QueueListener: создание уведомлений"""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        _state.active = True
+        try:
+            self.emit(record)
+        except Exception:
+            self.handleError(record)
+        finally:
+            _state.active = False
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        if not ErrorManager.is_initialized():
+            return
+        details = {"logger": record.name, "location": f"{record.module}:{record.funcName}:{record.lineno}"}
+        if record.threadName and record.threadName != "MainThread":
+            details["thread"] = record.threadName
+        extra = getattr(record, DETAILS_ATTR, None)
+        if isinstance(extra, dict):
+            details.update(extra)
+        exc = record.exc_info[1] if record.exc_info else None
+        # Запись уже есть в логе приложения, повторно ее не логируем
+        ErrorManager.submit(record.tg_level, record.tg_category, record.msg, details, exc,
+                            log=False, context=record.tg_context)
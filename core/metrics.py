@@ -0,0 +1,293 @@
+import logging
+import math
+from bisect import bisect_left
+from enum import Enum
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Значения меток хранятся как переданы и приводятся к строкам при чтении; уровень
+# и категория (ErrorLevel, ErrorCategory) хранятся значениями членов перечислений
+Labels = Tuple[Any, ...]
+
+# Границы корзин гистограмм длительности, в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+
+class Counter:
+    """
+    Счетчик с метками; значения меток передаются позиционно в порядке labelnames
+
+    При level_category=True первые две метки - члены ErrorLevel и ErrorCategory.
+    Ключом серии для них служат строковые значения членов: их хэш вычислен
+    заранее, а Enum.__hash__ - вызов Python-функции на каждый член, который
+    в несколько раз дороже самого обновления счетчика.
+    """
+
+    __slots__ = ("name", "help", "labelnames", "level_category", "_values")
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 level_category: bool = False):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.level_category = level_category
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1):
+        if self.level_category:
+            labels = (labels[0]._value_, labels[1]._value_) + labels[2:]
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(_plain_labels(labels), 0)
+
+    def samples(self) -> Dict[Labels, float]:
+        return dict(self._values)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами; level_category - как у Counter"""
+
+    __slots__ = ("name", "help", "labelnames", "buckets", "level_category", "_series")
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS, level_category: bool = False):
+        if buckets[-1] != math.inf:
+            buckets = tuple(buckets) + (math.inf,)
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.level_category = level_category
+        # Для каждого набора меток: [счетчики корзин (не накопительные), сумма, количество]
+        self._series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: Any):
+        if self.level_category:
+            labels = (labels[0]._value_, labels[1]._value_) + labels[2:]
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self) -> Dict[Labels, Dict[str, Any]]:
+        result = {}
+        for labels, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            buckets = {}
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                buckets[_format_bound(bound)] = cumulative
+            result[labels] = {"buckets": buckets, "sum": total, "count": count}
+        return result
+
+
+class CallbackMetric:
+    """Значения, снимаемые в момент чтения метрик (размеры очередей, счетчики компонентов)"""
+
+    __slots__ = ("name", "help", "labelnames", "kind", "_callback")
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...],
+                 callback: Callable[[], Dict[Labels, float]], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.kind = kind
+        self._callback = callback
+
+    def samples(self) -> Dict[Labels, float]:
+        try:
+            return self._callback()
+        except Exception as e:
+            logger.error(f"Ошибка чтения метрики {self.name}: {e}")
+            return {}
+
+
+class NotifierMetrics:
+    """
+    Метрики конвейера уведомлений
+
+    Счетчики обновляются обычными операциями со словарем, без блокировок
+    и без преобразования меток в строки, поэтому их можно не отключать
+    в продакшене. Почти все обновления происходят в потоке цикла нотификатора;
+    при одновременном обновлении из нескольких потоков отдельные приращения
+    могут теряться.
+    """
+
+    def __init__(self):
+        self.produced = Counter(
+            "tg_notifier_notifications_total",
+            "Notifications received by the notifier",
+            ("level", "category"),
+            level_category=True
+        )
+        self.filtered = Counter(
+            "tg_notifier_filtered_total",
+            "Notifications not queued for sending",
+            ("level", "category", "reason"),
+            level_category=True
+        )
+        self.sent = Counter(
+            "tg_notifier_sent_total",
+            "Notifications delivered to Telegram",
+            ("level", "category", "destination"),
+            level_category=True
+        )
+        self.failed = Counter(
+            "tg_notifier_failed_total",
+            "Notifications that could not be delivered",
+            ("level", "category", "destination"),
+            level_category=True
+        )
+        self.retries = Counter(
+            "tg_notifier_send_retries_total",
+            "Telegram send retries",
+            ("destination", "reason")
+        )
+        self.swallowed = Counter(
+            "tg_notifier_errors_swallowed_total",
+            "Exceptions caught and logged inside the notifier",
+            ("where",)
+        )
+        self.send_duration = Histogram(
+            "tg_notifier_send_duration_seconds",
+            "Duration of a single Telegram send_message call",
+            ("destination",)
+        )
+        self.breaker_transitions = Counter(
+            "tg_notifier_circuit_transitions_total",
+            "Circuit breaker state changes by new state",
+            ("state",)
+        )
+        self.delivery_latency = Histogram(
+            "tg_notifier_delivery_latency_seconds",
+            "Time from notification creation to delivery",
+            ("level", "category"),
+            level_category=True
+        )
+        self._callbacks: List[CallbackMetric] = []
+
+    def register_callback(self, name: str, help: str, labelnames: Tuple[str, ...],
+                          callback: Callable[[], Dict[Labels, float]], kind: str = "gauge"):
+        """Регистрация метрики, значение которой вычисляется при чтении"""
+        self._callbacks.append(CallbackMetric(name, help, labelnames, callback, kind))
+
+    def _metrics(self) -> List[Any]:
+        return [self.produced, self.filtered, self.sent, self.failed, self.retries,
+                self.swallowed, self.breaker_transitions, self.send_duration,
+                self.delivery_latency] + self._callbacks
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Текущие значения всех метрик
+
+        Returns:
+            {имя метрики: [{"labels": {...}, "value": ...}, ...]}; для гистограмм
+            value - словарь с накопительными корзинами, суммой и количеством
+        """
+        result = {}
+        for metric in self._metrics():
+            result[metric.name] = [
+                {"labels": dict(zip(metric.labelnames, map(_label_value, labels))), "value": value}
+                for labels, value in metric.samples().items()
+            ]
+        return result
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+        for metric in self._metrics():
+            if isinstance(metric, Counter):
+                kind = "counter"
+            elif isinstance(metric, Histogram):
+                kind = "histogram"
+            else:
+                kind = metric.kind
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+
+            for labels, value in metric.samples().items():
+                label_text = _format_labels(metric.labelnames, labels)
+                if kind != "histogram":
+                    lines.append(f"{_series(metric.name, label_text)} {_format_value(value)}")
+                    continue
+                separator = "," if label_text else ""
+                for bound, count in value["buckets"].items():
+                    lines.append(f'{metric.name}_bucket{{{label_text}{separator}le="{bound}"}} {count}')
+                lines.append(f"{_series(metric.name + '_sum', label_text)} {_format_value(value['sum'])}")
+                lines.append(f"{_series(metric.name + '_count', label_text)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Локальный HTTP-сервер метрик
+
+    /metrics - текстовый формат Prometheus, /metrics.json - снимок в JSON
+    """
+
+    def __init__(self, metrics: NotifierMetrics, host: str = "127.0.0.1", port: int = 9464):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._prometheus)
+        app.router.add_get("/metrics.json", self._json)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"✅ Метрики уведомлений доступны на http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _prometheus(self, request):
+        from aiohttp import web
+        return web.Response(text=self.metrics.render_prometheus(),
+                            content_type="text/plain", charset="utf-8")
+
+    async def _json(self, request):
+        from aiohttp import web
+        return web.json_response(self.metrics.snapshot())
+
+
+def _series(name: str, label_text: str) -> str:
+    return f"{name}{{{label_text}}}" if label_text else name
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(float(bound))
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labelnames: Tuple[str, ...], labels: Labels) -> str:
+    return ",".join(
+        f'{name}="{_escape_label(_label_value(value))}"' for name, value in zip(labelnames, labels)
+    )
+
+
+def _plain_labels(labels: Labels) -> Labels:
+    return tuple(label.value if isinstance(label, Enum) else label for label in labels)
+
+
+def _label_value(value: Any) -> str:
+    return value.value if isinstance(value, Enum) else str(value)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
@@ -0,0 +1,105 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    Токен-бакет с резервированием: запрос всегда получает токен,
+    но может быть вынужден подождать, пока бакет восполнится
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Резервирование токена; возвращает задержку в секундах до его появления"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class TelegramRateLimiter:
+    """
+    Ограничитель частоты отправки с учетом лимитов Telegram
+
+    - не более ~1 сообщения в секунду в один чат
+    - не более 20 сообщений в минуту в одну группу
+    - не более 30 сообщений в секунду от одного бота
+    """
+
+    def __init__(self,
+                 chat_rate: float = 1.0,
+                 group_rate: float = 20 / 60,
+                 bot_rate: float = 30.0,
+                 bot_bucket: Optional[TokenBucket] = None):
+        """
+        Args:
+            bot_bucket: Общий бакет бота, если один бот отправляет в несколько чатов
+                        с отдельными ограничителями
+        """
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.bot_rate = bot_rate
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._group_buckets: Dict[str, TokenBucket] = {}
+        if bot_bucket is None and bot_rate > 0:
+            bot_bucket = TokenBucket(bot_rate, bot_rate)
+        self._bot_bucket = bot_bucket
+        self._blocked_until: Dict[str, float] = {}
+
+    @staticmethod
+    def is_group(chat_id: str) -> bool:
+        """Группы и каналы имеют отрицательный chat_id"""
+        return str(chat_id).startswith("-")
+
+    def reserve(self, chat_id: str, now: Optional[float] = None) -> float:
+        """Резервирование отправки в чат; возвращает необходимую задержку в секундах"""
+        if now is None:
+            now = time.monotonic()
+        chat_id = str(chat_id)
+        delay = max(0.0, self._blocked_until.get(chat_id, 0.0) - now)
+
+        if self.chat_rate > 0:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, 1)
+            delay = max(delay, bucket.reserve(now))
+
+        if self.group_rate > 0 and self.is_group(chat_id):
+            bucket = self._group_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._group_buckets[chat_id] = TokenBucket(self.group_rate, 20)
+            delay = max(delay, bucket.reserve(now))
+
+        if self._bot_bucket is not None:
+            delay = max(delay, self._bot_bucket.reserve(now))
+
+        return delay
+
+    async def acquire(self, chat_id: str):
+        """Ожидание возможности отправить сообщение в чат"""
+        delay = self.reserve(chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, chat_id: str, retry_after: float, now: Optional[float] = None):
+        """Блокировка отправки в чат на время, указанное Telegram в retry_after"""
+        if now is None:
+            now = time.monotonic()
+        chat_id = str(chat_id)
+        self._blocked_until[chat_id] = max(self._blocked_until.get(chat_id, 0.0), now + retry_after)
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Экспоненциальная задержка с полным джиттером"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
@@ -0,0 +1,297 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..models.error_models import ErrorLevel
+from ..models.notification_models import ErrorNotification
+
+PARSE_MODE_PLAIN = ""
+PARSE_MODE_MARKDOWN = "Markdown"
+PARSE_MODE_MARKDOWN_V2 = "MarkdownV2"
+PARSE_MODE_HTML = "HTML"
+
+PARSE_MODES = (PARSE_MODE_PLAIN, PARSE_MODE_MARKDOWN, PARSE_MODE_MARKDOWN_V2, PARSE_MODE_HTML)
+
+# Ограничение Telegram на подпись к документу
+CAPTION_LIMIT = 1024
+
+LEVEL_EMOJI = {
+    ErrorLevel.INFO: "ℹ️",
+    ErrorLevel.WARNING: "⚠️",
+    ErrorLevel.ERROR: "❌",
+    ErrorLevel.CRITICAL: "🚨"
+}
+
+# Строка сообщения: (текст с разметкой, относится ли к блоку кода)
+Line = Tuple[str, bool]
+
+
+def _translator(chars: str) -> Dict[int, str]:
+    return {ord(char): "\\" + char for char in chars}
+
+
+_MARKDOWN_TABLE = _translator("_*`[")
+_MARKDOWN_V2_TABLE = _translator("\\_*[]()~`>#+-=|{}.!")
+_MARKDOWN_V2_CODE_TABLE = _translator("\\`")
+_HTML_TABLE = {ord("&"): "&amp;", ord("<"): "&lt;", ord(">"): "&gt;"}
+
+
+def escape_markdown(text: str) -> str:
+    """Экранирование текста для parse_mode=Markdown"""
+    return text.translate(_MARKDOWN_TABLE)
+
+
+def escape_markdown_v2(text: str) -> str:
+    """Экранирование текста для parse_mode=MarkdownV2"""
+    return text.translate(_MARKDOWN_V2_TABLE)
+
+
+def escape_html(text: str) -> str:
+    """Экранирование текста для parse_mode=HTML"""
+    return text.translate(_HTML_TABLE)
+
+
+def normalize_parse_mode(parse_mode: Optional[str]) -> str:
+    """Приведение parse_mode к одному из PARSE_MODES"""
+    if not parse_mode:
+        return PARSE_MODE_PLAIN
+    for mode in PARSE_MODES:
+        if mode.lower() == parse_mode.lower():
+            return mode
+    raise ValueError(f"parse_mode must be one of: Markdown, MarkdownV2, HTML or empty, got {parse_mode!r}")
+
+
+class MessageRenderer:
+    """
+    Форматирование уведомлений для Telegram
+
+    Заголовки и подписи полей для каждого уровня собираются один раз при
+    создании. Пользовательский текст экранируется под выбранный parse_mode,
+    а сообщения длиннее max_length делятся на части по строкам, причем блок
+    кода в каждой части получает собственные открывающую и закрывающую
+    разметку. Без parse_mode экранирование и разметка не выполняются.
+    """
+
+    def __init__(self, app_name: str, parse_mode: Optional[str] = PARSE_MODE_MARKDOWN,
+                 max_length: int = 4096, traceback_lines: int = 5):
+        self.parse_mode = normalize_parse_mode(parse_mode)
+        self.max_length = max_length
+        self.traceback_lines = traceback_lines
+
+        self.escape: Callable[[str], str]
+        self._escape_code: Callable[[str], str]
+        if self.parse_mode == PARSE_MODE_MARKDOWN:
+            self.escape = escape_markdown
+            # Внутри блока кода Markdown экранирование не поддерживается
+            self._escape_code = str
+            self._bold = "*{}*".format
+            self._code_open, self._code_close = "```\n", "\n```"
+        elif self.parse_mode == PARSE_MODE_MARKDOWN_V2:
+            self.escape = escape_markdown_v2
+            self._escape_code = lambda text: text.translate(_MARKDOWN_V2_CODE_TABLE)
+            self._bold = "*{}*".format
+            self._code_open, self._code_close = "```\n", "\n```"
+        elif self.parse_mode == PARSE_MODE_HTML:
+            self.escape = escape_html
+            self._escape_code = escape_html
+            self._bold = "<b>{}</b>".format
+            self._code_open, self._code_close = "<pre>", "</pre>"
+        else:
+            self.escape = str
+            self._escape_code = str
+            self._bold = str
+            self._code_open, self._code_close = "", ""
+
+        self._headers = {
+            level: f"{LEVEL_EMOJI[level]} {self._bold(self.escape(f'{app_name} - {level.value.upper()}'))}"
+            for level in ErrorLevel
+        }
+        self._bullet = self.escape("  - ")
+        self._category_label = self._bold("Модуль:")
+        self._message_label = self._bold("Сообщение:")
+        self._details_label = self._bold("Детали:")
+        self._time_label = self._bold("Время:")
+        self._repeat_label = self._bold("Повторы:")
+        self._sample_label = self._bold("Выборка:")
+        self._traceback_label = self._bold("Трассировка:")
+        self._exception_label = self._bold("Исключение:")
+        self._attachment_note = self.escape("📎 Полный контекст во вложении")
+
+    @property
+    def telegram_parse_mode(self) -> Optional[str]:
+        """Значение parse_mode для Bot API (None для простого текста)"""
+        return self.parse_mode or None
+
+    def bold(self, text: str) -> str:
+        """Выделение уже экранированного текста"""
+        return self._bold(text)
+
+    def fit(self, text: str, limit: int) -> str:
+        """Экранирование текста с обрезкой до limit символов результата"""
+        escaped = self.escape(text)
+        if len(escaped) <= limit:
+            return escaped
+        cut = _safe_cut(escaped, max(0, limit - 1))
+        return escaped[:cut] + "…"
+
+    def lines(self, notification: ErrorNotification) -> List[Line]:
+        """Строки сообщения об уведомлении"""
+        escape = self.escape
+        lines: List[Line] = [
+            (self._headers[notification.level], False),
+            (f"{self._category_label} {escape(notification.category.value)}", False),
+            (f"{self._message_label} {escape(str(notification.message))}", False),
+        ]
+
+        details = notification.get_details()
+        if details:
+            lines.append((self._details_label, False))
+            for key, value in details.items():
+                lines.append((f"{self._bullet}{escape(str(key))}: {escape(str(value))}", False))
+
+        if notification.timestamp:
+            lines.append((f"{self._time_label} {escape(notification.timestamp.strftime('%Y-%m-%d %H:%M:%S'))}", False))
+
+        if notification.repeat_count > 1:
+            count = f"{notification.repeat_count:,}".replace(",", " ")
+            repeats = f"×{count} за последние {notification.repeat_window or 0:.0f}с"
+            lines.append((f"{self._repeat_label} {escape(repeats)}", False))
+
+        if notification.sample_weight > 1:
+            lines.append((f"{self._sample_label} {escape(f'1 из {notification.sample_weight}')}", False))
+
+        traceback_text = notification.get_traceback()
+        if traceback_text and notification.level in (ErrorLevel.ERROR, ErrorLevel.CRITICAL):
+            lines.append((self._traceback_label, False))
+            for line in traceback_text.split("\n")[-self.traceback_lines:]:
+                lines.append((self._escape_code(line), True))
+        return lines
+
+    def traceback_clipped(self, notification: ErrorNotification) -> bool:
+        """Выводится ли в сообщении только часть трассировки"""
+        if notification.level not in (ErrorLevel.ERROR, ErrorLevel.CRITICAL):
+            return False
+        traceback_text = notification.get_traceback()
+        return bool(traceback_text) and traceback_text.count("\n") >= self.traceback_lines
+
+    def caption(self, notification: ErrorNotification, limit: int = CAPTION_LIMIT) -> str:
+        """
+        Краткая подпись к документу с полным контекстом
+
+        Детали и трассировка не выводятся, вместо них - строка исключения.
+        Текст сообщения обрезается, чтобы подпись не превысила limit.
+        """
+        escape = self.escape
+        head = [
+            self._headers[notification.level],
+            f"{self._category_label} {escape(notification.category.value)}",
+        ]
+        tail = []
+        if notification.captured_traceback is not None:
+            exception_line = notification.captured_traceback.exception_line()
+            tail.append(f"{self._exception_label} {self.fit(exception_line, 300)}")
+        if notification.timestamp:
+            tail.append(f"{self._time_label} {escape(notification.timestamp.strftime('%Y-%m-%d %H:%M:%S'))}")
+        if notification.repeat_count > 1:
+            count = f"{notification.repeat_count:,}".replace(",", " ")
+            tail.append(f"{self._repeat_label} {escape(f'×{count} за последние {notification.repeat_window or 0:.0f}с')}")
+        if notification.sample_weight > 1:
+            tail.append(f"{self._sample_label} {escape(f'1 из {notification.sample_weight}')}")
+        tail.append(self._attachment_note)
+
+        used = sum(len(line) + 1 for line in head + tail) + len(self._message_label) + 1
+        message = self.fit(str(notification.message), max(1, limit - used))
+        return "\n".join(head + [f"{self._message_label} {message}"] + tail)
+
+    def render_text(self, notification: ErrorNotification) -> str:
+        """Сообщение целиком, без деления на части"""
+        return self.join(self.lines(notification))
+
+    def render(self, notification: ErrorNotification) -> List[str]:
+        """Сообщение, разделенное на части не длиннее max_length"""
+        return self.split(self.lines(notification))
+
+    def join(self, lines: List[Line]) -> str:
+        """Сборка строк в текст с разметкой блоков кода"""
+        chunks = []
+        code: List[str] = []
+        for text, in_code in lines:
+            if in_code:
+                code.append(text)
+                continue
+            if code:
+                chunks.append(self._code_block(code))
+                code = []
+            chunks.append(text)
+        if code:
+            chunks.append(self._code_block(code))
+        return "\n".join(chunks)
+
+    def split(self, lines: List[Line]) -> List[str]:
+        """
+        Деление сообщения на части не длиннее max_length
+
+        Части режутся по границам строк; слишком длинная строка режется
+        так, чтобы не разорвать экранированный символ.
+        """
+        text = self.join(lines)
+        if len(text) <= self.max_length:
+            return [text]
+
+        fence = len(self._code_open) + len(self._code_close)
+        parts: List[str] = []
+        current: List[Line] = []
+        size = 0
+        in_code = False
+
+        for text, code in lines:
+            for piece in self._pieces(text, self.max_length - (fence if code else 0)):
+                # Длина строки с переводом строки и разметкой начала/конца блока кода
+                extra = len(piece) + (1 if current else 0)
+                if code and not in_code:
+                    extra += fence
+                if size + extra > self.max_length and current:
+                    parts.append(self.join(current))
+                    current, size, in_code = [], 0, False
+                    extra = len(piece) + (fence if code else 0)
+                current.append((piece, code))
+                size += extra
+                in_code = code
+
+        if current:
+            parts.append(self.join(current))
+        return parts
+
+    def _code_block(self, lines: List[str]) -> str:
+        return self._code_open + "\n".join(lines) + self._code_close
+
+    @staticmethod
+    def _pieces(text: str, limit: int) -> List[str]:
+        if len(text) <= limit:
+            return [text]
+        pieces = []
+        while len(text) > limit:
+            cut = _safe_cut(text, limit)
+            pieces.append(text[:cut])
+            text = text[cut:]
+        if text:
+            pieces.append(text)
+        return pieces
+
+
+def _safe_cut(text: str, limit: int) -> int:
+    """Позиция разреза не дальше limit, не разрывающая экранирование"""
+    cut = limit
+    # По возможности режем по пробелу
+    space = text.rfind(" ", limit // 2, limit)
+    if space > 0:
+        cut = space + 1
+    # Не отрываем обратную косую черту от экранируемого символа
+    slashes = 0
+    while slashes < cut and text[cut - 1 - slashes] == "\\":
+        slashes += 1
+    if slashes % 2:
+        cut -= 1
+    # Не разрываем HTML-сущность (&amp; &lt; &gt;)
+    amp = text.rfind("&", max(0, cut - 4), cut)
+    if amp != -1 and ";" not in text[amp:cut]:
+        cut = amp
+    return max(cut, 1)
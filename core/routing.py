@@ -0,0 +1,79 @@
+from typing import Dict, Optional, Tuple
+
+from ..models.error_models import LEVEL_ORDER, ErrorLevel, ErrorCategory
+
+ROUTE_DROP = "drop"
+ROUTE_LOG = "log"
+ROUTE_SEND = "send"
+ROUTE_PAGE = "page"
+
+ROUTE_ACTIONS = (ROUTE_DROP, ROUTE_LOG, ROUTE_SEND, ROUTE_PAGE)
+
+RouteTable = Dict[Tuple[ErrorLevel, ErrorCategory], str]
+
+
+def default_action(level: ErrorLevel) -> str:
+    """Действие без явных правил: CRITICAL - срочно, остальное - обычная отправка"""
+    return ROUTE_PAGE if level == ErrorLevel.CRITICAL else ROUTE_SEND
+
+
+def parse_rule_key(key: str) -> Tuple[Tuple[ErrorLevel, ...], Optional[ErrorCategory], int]:
+    """
+    Разбор ключа правила
+
+    Форматы: "*", "<уровень>", "<уровень>+", с необязательным ":<категория>"
+    ("warning+:cache", "*:database", "info"). "<уровень>+" означает этот
+    уровень и выше.
+
+    Returns:
+        Уровни, категория (None - любая) и специфичность правила
+    """
+    level_part, _, category_part = key.strip().lower().partition(":")
+    specificity = 0
+
+    if level_part in ("", "*"):
+        levels = LEVEL_ORDER
+    elif level_part.endswith("+"):
+        start = LEVEL_ORDER.index(ErrorLevel(level_part[:-1]))
+        levels = LEVEL_ORDER[start:]
+        specificity += 1
+    else:
+        levels = (ErrorLevel(level_part),)
+        specificity += 2
+
+    category = None
+    if category_part and category_part != "*":
+        category = ErrorCategory(category_part)
+        specificity += 4
+    return levels, category, specificity
+
+
+def compile_routes(rules: Optional[Dict[str, str]]) -> RouteTable:
+    """
+    Построение таблицы маршрутизации уровень × категория → действие
+
+    Для каждой ячейки выбирается самое специфичное правило (категория важнее
+    уровня, точный уровень важнее "уровень+"); при равной специфичности
+    побеждает правило, указанное позже.
+    """
+    table: RouteTable = {}
+    specificity_table: Dict[Tuple[ErrorLevel, ErrorCategory], int] = {}
+    for level in LEVEL_ORDER:
+        for category in ErrorCategory:
+            table[(level, category)] = default_action(level)
+            specificity_table[(level, category)] = -1
+
+    for key, action in (rules or {}).items():
+        try:
+            levels, category, specificity = parse_rule_key(key)
+        except ValueError:
+            raise ValueError(f"Invalid routing rule: {key!r}")
+        if action not in ROUTE_ACTIONS:
+            raise ValueError(f"Invalid routing action for {key!r}: {action!r}")
+        categories = (category,) if category else tuple(ErrorCategory)
+        for level in levels:
+            for cat in categories:
+                if specificity >= specificity_table[(level, cat)]:
+                    table[(level, cat)] = action
+                    specificity_table[(level, cat)] = specificity
+    return table
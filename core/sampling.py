@@ -0,0 +1,163 @@
+import re
+import time
+from typing import Dict, Optional, Tuple, Union
+
+from ..models.error_models import ErrorLevel, ErrorCategory
+from .routing import parse_rule_key
+
+SAMPLING_FIXED = "fixed"
+SAMPLING_ADAPTIVE = "adaptive"
+
+SamplingSpec = Tuple[str, float]
+SamplingTable = Dict[Tuple[ErrorLevel, ErrorCategory], SamplingSpec]
+
+_ADAPTIVE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*/\s*min\s*$", re.IGNORECASE)
+
+# Уровни, которые выборка затрагивает только при явном указании в правиле
+_PROTECTED_LEVELS = (ErrorLevel.ERROR, ErrorLevel.CRITICAL)
+
+
+class FixedRateSampler:
+    """
+    Выборка с постоянной долей
+
+    Пропускается каждое N-е событие (без случайности), поэтому вес
+    пропущенного уведомления - ровно число событий, которые оно представляет.
+    """
+
+    __slots__ = ("rate", "_credit", "_skipped")
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._credit = 1.0
+        self._skipped = 0
+
+    def sample(self, now: Optional[float] = None) -> int:
+        """0 - событие отброшено, иначе вес пропущенного события"""
+        self._credit += self.rate
+        if self._credit < 1.0:
+            self._skipped += 1
+            return 0
+        self._credit -= 1.0
+        weight, self._skipped = self._skipped + 1, 0
+        return weight
+
+
+class AdaptiveSampler:
+    """
+    Адаптивная выборка с целевым числом сообщений в минуту
+
+    Время делится на окна (не короче 60 / per_minute секунд, чтобы бюджет
+    окна был не меньше одного сообщения); доля пропуска в окне рассчитывается по числу
+    событий в предыдущем окне, а жесткий предел не дает превысить бюджет
+    окна при резком всплеске. После затишья выборка снова пропускает все.
+    """
+
+    __slots__ = ("per_minute", "window", "budget", "rate",
+                 "_window_start", "_seen", "_kept", "_credit", "_skipped")
+
+    def __init__(self, per_minute: float, window: float = 10.0):
+        self.per_minute = per_minute
+        self.window = max(window, 60 / per_minute)
+        self.budget = per_minute * self.window / 60
+        self.rate = 1.0
+        self._window_start = time.monotonic()
+        self._seen = 0
+        self._kept = 0
+        self._credit = 1.0
+        self._skipped = 0
+
+    def sample(self, now: Optional[float] = None) -> int:
+        """0 - событие отброшено, иначе вес пропущенного события"""
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= self.window:
+            if elapsed >= 2 * self.window or not self._seen:
+                self.rate = 1.0
+            else:
+                self.rate = min(1.0, self.budget / self._seen)
+            self._window_start = now
+            self._seen = 0
+            self._kept = 0
+
+        self._seen += 1
+        self._credit += self.rate
+        if self._credit < 1.0 or self._kept >= self.budget:
+            self._credit = min(self._credit, 1.0)
+            self._skipped += 1
+            return 0
+        self._credit -= 1.0
+        self._kept += 1
+        weight, self._skipped = self._skipped + 1, 0
+        return weight
+
+
+Sampler = Union[FixedRateSampler, AdaptiveSampler]
+
+
+def parse_sampling_spec(value: Union[float, int, str]) -> SamplingSpec:
+    """
+    Разбор значения правила выборки
+
+    Число от 0 до 1 - постоянная доля ("0.1" - каждое десятое),
+    строка "<N>/min" - адаптивная выборка не более N сообщений в минуту.
+    """
+    if isinstance(value, str):
+        match = _ADAPTIVE_RE.match(value)
+        if match:
+            per_minute = float(match.group(1))
+            if per_minute <= 0:
+                raise ValueError(f"Invalid sampling target: {value!r}")
+            return SAMPLING_ADAPTIVE, per_minute
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid sampling value: {value!r}")
+    rate = float(value)
+    if not 0 < rate <= 1:
+        raise ValueError(f"Sampling rate must be in (0, 1]: {value!r}")
+    return SAMPLING_FIXED, rate
+
+
+def compile_sampling(rules: Optional[Dict[str, Union[float, str]]]) -> SamplingTable:
+    """
+    Построение таблицы выборки уровень × категория → правило
+
+    Ключи правил те же, что у routing. ERROR и CRITICAL попадают под правило,
+    только если уровень в ключе указан явно ("error", "critical+",
+    "error:cache"): правила "*" и "info+" их не затрагивают. Для каждой
+    ячейки выбирается самое специфичное правило.
+    """
+    table: SamplingTable = {}
+    specificity_table: Dict[Tuple[ErrorLevel, ErrorCategory], int] = {}
+
+    for key, value in (rules or {}).items():
+        try:
+            levels, category, specificity = parse_rule_key(key)
+        except ValueError:
+            raise ValueError(f"Invalid sampling rule: {key!r}")
+        spec = parse_sampling_spec(value)
+
+        level_part = key.strip().lower().partition(":")[0].rstrip("+")
+        if level_part not in (ErrorLevel.ERROR.value, ErrorLevel.CRITICAL.value):
+            levels = tuple(level for level in levels if level not in _PROTECTED_LEVELS)
+
+        categories = (category,) if category else tuple(ErrorCategory)
+        for level in levels:
+            for cat in categories:
+                if specificity >= specificity_table.get((level, cat), -1):
+                    if spec == (SAMPLING_FIXED, 1.0):
+                        table.pop((level, cat), None)
+                    else:
+                        table[(level, cat)] = spec
+                    specificity_table[(level, cat)] = specificity
+    return table
+
+
+def build_samplers(table: SamplingTable) -> Dict[Tuple[ErrorLevel, ErrorCategory], Sampler]:
+    """Отдельный сэмплер для каждой ячейки: у каждой категории свой бюджет"""
+    samplers: Dict[Tuple[ErrorLevel, ErrorCategory], Sampler] = {}
+    for cell, (kind, value) in table.items():
+        samplers[cell] = FixedRateSampler(value) if kind == SAMPLING_FIXED else AdaptiveSampler(value)
+    return samplers
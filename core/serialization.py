@@ -0,0 +1,106 @@
+import json
+import math
+import struct
+from datetime import datetime
+from typing import Optional, Tuple
+
+from ..models.error_models import ErrorLevel, ErrorCategory
+from ..models.notification_models import ErrorNotification
+
+FORMAT_VERSION = 2
+
+# Индексы перечислений: новые значения добавляются только в конец
+_LEVELS = list(ErrorLevel)
+_CATEGORIES = list(ErrorCategory)
+_LEVEL_INDEX = {level: index for index, level in enumerate(_LEVELS)}
+_CATEGORY_INDEX = {category: index for index, category in enumerate(_CATEGORIES)}
+
+# версия, уровень, категория, время, число повторов, окно повторов, вес выборки
+_HEADER = struct.Struct("!BBBdIdI")
+# Заголовок версии 1 (без веса выборки) читается для старых записей в спуле
+_HEADER_V1 = struct.Struct("!BBBdId")
+_LENGTH = struct.Struct("!I")
+
+FRAME_PREFIX_SIZE = _LENGTH.size
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+def pack_text(value: Optional[str]) -> bytes:
+    """Строка с префиксом длины (None кодируется отдельным значением)"""
+    if value is None:
+        return _LENGTH.pack(0xFFFFFFFF)
+    data = value.encode("utf-8")
+    return _LENGTH.pack(len(data)) + data
+
+
+def unpack_text(data: bytes, offset: int) -> Tuple[Optional[str], int]:
+    """Чтение строки с префиксом длины; возвращает строку и смещение после нее"""
+    (length,), offset = _LENGTH.unpack_from(data, offset), offset + _LENGTH.size
+    if length == 0xFFFFFFFF:
+        return None, offset
+    return data[offset:offset + length].decode("utf-8"), offset + length
+
+
+def encode_notification(notification: ErrorNotification) -> bytes:
+    """Компактное двоичное представление уведомления"""
+    timestamp = notification.timestamp.timestamp() if notification.timestamp else math.nan
+    repeat_window = notification.repeat_window if notification.repeat_window is not None else math.nan
+    details = notification.get_details()
+    if details:
+        details = json.dumps(dict(details), ensure_ascii=False, default=str, separators=(",", ":"))
+    return b"".join((
+        _HEADER.pack(
+            FORMAT_VERSION,
+            _LEVEL_INDEX[notification.level],
+            _CATEGORY_INDEX[notification.category],
+            timestamp,
+            notification.repeat_count,
+            repeat_window,
+            notification.sample_weight
+        ),
+        pack_text(notification.message),
+        pack_text(notification.get_traceback()),
+        pack_text(details),
+    ))
+
+
+def decode_notification(data: bytes) -> ErrorNotification:
+    """Восстановление уведомления из двоичного представления"""
+    version = data[0] if data else None
+    if version == FORMAT_VERSION:
+        (_, level, category, timestamp, repeat_count, repeat_window,
+         sample_weight) = _HEADER.unpack_from(data, 0)
+        offset = _HEADER.size
+    elif version == 1:
+        _, level, category, timestamp, repeat_count, repeat_window = _HEADER_V1.unpack_from(data, 0)
+        sample_weight = 1
+        offset = _HEADER_V1.size
+    else:
+        raise ValueError(f"Unsupported notification format version: {version}")
+    message, offset = unpack_text(data, offset)
+    traceback_text, offset = unpack_text(data, offset)
+    details, offset = unpack_text(data, offset)
+    return ErrorNotification(
+        level=_LEVELS[level],
+        category=_CATEGORIES[category],
+        message=message or "",
+        details=json.loads(details) if details else None,
+        timestamp=None if math.isnan(timestamp) else datetime.fromtimestamp(timestamp),
+        traceback=traceback_text,
+        repeat_count=repeat_count,
+        repeat_window=None if math.isnan(repeat_window) else repeat_window,
+        sample_weight=sample_weight
+    )
+
+
+def frame(payload: bytes) -> bytes:
+    """Добавление префикса длины"""
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def frame_length(prefix: bytes) -> int:
+    """Длина полезной нагрузки по префиксу"""
+    (length,) = _LENGTH.unpack(prefix)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame too large: {length}")
+    return length
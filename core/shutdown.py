@@ -0,0 +1,139 @@
+import asyncio
+import atexit
+import logging
+import os
+import signal
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIGNALS = tuple(
+    getattr(signal, name) for name in ("SIGTERM", "SIGINT") if hasattr(signal, name)
+)
+
+
+class ShutdownHooks:
+    """
+    Закрытие нотификатора по сигналам завершения и при выходе из интерпретатора
+
+    Обработчик сигнала досылает уведомления не дольше timeout, после чего
+    восстанавливает прежний обработчик и передает сигнал ему (для SIGINT -
+    KeyboardInterrupt, для SIGTERM по умолчанию - завершение процесса).
+    Повторный сигнал во время досылки передается сразу, не дожидаясь ее.
+
+    Если хуки устанавливаются из работающего цикла событий, используется
+    loop.add_signal_handler и асинхронное закрытие в этом цикле; иначе -
+    signal.signal и блокирующее закрытие. Сигналы можно перехватить только
+    в главном потоке.
+    """
+
+    def __init__(self,
+                 close: Callable[[Optional[float]], Awaitable[None]],
+                 close_sync: Callable[[Optional[float]], None],
+                 timeout: Optional[float] = 5.0):
+        self._close = close
+        self._close_sync = close_sync
+        self.timeout = timeout
+        self._previous: Dict[int, Any] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing: Optional[asyncio.Task] = None
+        self._atexit_registered = False
+
+    def install(self, signals: Iterable[int] = DEFAULT_SIGNALS, at_exit: bool = True):
+        """Установка обработчиков сигналов и atexit"""
+        if at_exit and not self._atexit_registered:
+            atexit.register(self._at_exit)
+            self._atexit_registered = True
+
+        signals = tuple(signals)
+        if not signals:
+            return
+        if threading.current_thread() is not threading.main_thread():
+            logger.warning("❌ Обработчики сигналов можно установить только из главного потока")
+            return
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+        for signum in signals:
+            if signum in self._previous:
+                continue
+            self._previous[signum] = signal.getsignal(signum)
+            if self._loop is not None:
+                try:
+                    self._loop.add_signal_handler(signum, self._on_loop_signal, signum)
+                    continue
+                except NotImplementedError:
+                    # Windows: сигнал принимает signal.signal, закрытие выполняет цикл
+                    loop = self._loop
+                    signal.signal(signum, lambda s, f: loop.call_soon_threadsafe(self._on_loop_signal, s))
+                    continue
+            signal.signal(signum, self._on_signal)
+
+    def uninstall(self):
+        """Восстановление прежних обработчиков"""
+        for signum in list(self._previous):
+            self._restore(signum)
+        if self._atexit_registered:
+            atexit.unregister(self._at_exit)
+            self._atexit_registered = False
+
+    def _restore(self, signum: int) -> Any:
+        previous = self._previous.pop(signum, signal.SIG_DFL)
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.remove_signal_handler(signum)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            signal.signal(signum, previous if previous is not None else signal.SIG_DFL)
+        except (ValueError, OSError) as e:
+            logger.error(f"Ошибка восстановления обработчика сигнала {signum}: {e}")
+        return previous
+
+    def _on_signal(self, signum: int, frame: Any):
+        """Обработчик сигнала без цикла событий"""
+        logger.info(f"Получен сигнал {signum}, досылка уведомлений")
+        previous = self._restore(signum)
+        try:
+            self._close_sync(self.timeout)
+        except Exception as e:
+            logger.error(f"Ошибка закрытия нотификатора по сигналу: {e}")
+        self._forward(signum, previous, frame)
+
+    def _on_loop_signal(self, signum: int):
+        """Обработчик сигнала в цикле событий"""
+        if self._closing is not None and not self._closing.done():
+            # Повторный сигнал: не ждем окончания досылки
+            self._forward(signum, self._restore(signum), None)
+            return
+        logger.info(f"Получен сигнал {signum}, досылка уведомлений")
+        self._closing = self._loop.create_task(self._close_and_forward(signum))
+
+    async def _close_and_forward(self, signum: int):
+        try:
+            # Запас сверх срока досылки, чтобы остановка не зависла ни при каких условиях
+            await asyncio.wait_for(self._close(self.timeout),
+                                   None if self.timeout is None else self.timeout + 1)
+        except Exception as e:
+            logger.error(f"Ошибка закрытия нотификатора по сигналу: {e}")
+        if signum not in self._previous:
+            # Сигнал уже передан (повторный сигнал во время досылки) или хуки сняты
+            return
+        self._forward(signum, self._restore(signum), None)
+
+    @staticmethod
+    def _forward(signum: int, previous: Any, frame: Any):
+        """Передача сигнала прежнему обработчику"""
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            os.kill(os.getpid(), signum)
+
+    def _at_exit(self):
+        try:
+            self._close_sync(self.timeout)
+        except Exception as e:
+            logger.error(f"Ошибка закрытия нотификатора при выходе: {e}")
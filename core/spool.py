@@ -0,0 +1,348 @@
+import asyncio
+import logging
+import os
+import re
+import secrets
+from collections import deque
+from typing import IO, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from ..models.notification_models import ErrorNotification
+from .serialization import (
+    FRAME_PREFIX_SIZE, decode_notification, encode_notification, frame, frame_length,
+    pack_text, unpack_text
+)
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_RE = re.compile(r"^spool-(\d{10})\.bin$")
+# Каталог процесса: <pid>-<случайный суффикс> (PID может быть использован повторно)
+_WRITER_RE = re.compile(r"^\d+-[0-9a-f]{8}$")
+_LOCK_FILE = "lock"
+
+
+class NotificationSpool:
+    """
+    Журнал недоставленных уведомлений на диске
+
+    Уведомления пишутся в сегменты с префиксом длины вместе с именем
+    получателя, которому они не были доставлены; запись буферизуется
+    в памяти и сбрасывается на диск с fsync по интервалу, а не на каждое
+    уведомление. Общий размер журнала ограничен: при переполнении
+    удаляются самые старые сегменты.
+
+    Один каталог могут использовать несколько процессов (воркеры gunicorn,
+    несколько экземпляров бота): каждый пишет в свой подкаталог и держит
+    на нем блокировку файла, пока работает. Воспроизводятся только
+    собственные сегменты и подкаталоги, блокировку которых удалось
+    захватить, - оставшиеся от завершившихся процессов. Ограничение
+    max_bytes действует на журнал каждого процесса.
+    """
+
+    def __init__(self, directory: str,
+                 segment_size: int = 1024 * 1024,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.lost = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._pid = os.getpid()
+        # Подкаталог процесса создается при первой записи
+        self._writer: Optional[str] = None
+        self._writer_lock: Optional[IO[bytes]] = None
+        self._segments: Dict[int, int] = {}
+        self._current = 1
+        # Собственные сегменты, подлежащие воспроизведению (номера меньше этого)
+        self._replay_before = 1
+
+        self._buffer: Deque[bytes] = deque()
+        self._buffered_bytes = 0
+        self._lock = None
+        self._replay_lock = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def _path(self, sequence: int) -> str:
+        return os.path.join(self.directory, self._writer, f"spool-{sequence:010d}.bin")
+
+    def _check_fork(self):
+        """После fork дочерний процесс пишет в свой подкаталог"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        if self._writer_lock is not None:
+            # Только закрытие: снятие блокировки освободило бы каталог родителя
+            self._writer_lock.close()
+        self._writer = self._writer_lock = None
+        self._segments = {}
+        self._current = self._replay_before = 1
+        # Буфер записывает родительский процесс
+        self._buffer = deque()
+        self._buffered_bytes = 0
+        self._lock = self._replay_lock = None
+
+    def _open_writer(self):
+        name = f"{os.getpid()}-{secrets.token_hex(4)}"
+        # Каталог получает имя процесса только с захваченной блокировкой,
+        # иначе другой процесс мог бы принять его за оставленный и удалить
+        staging = os.path.join(self.directory, f".{name}.tmp")
+        os.makedirs(staging)
+        lock = open(os.path.join(staging, _LOCK_FILE), "wb")
+        if not _try_lock(lock):
+            lock.close()
+            _remove_writer_dir(staging)
+            raise OSError(f"Cannot lock spool directory {staging}")
+        try:
+            os.rename(staging, os.path.join(self.directory, name))
+        except OSError:
+            lock.close()
+            _remove_writer_dir(staging)
+            raise
+        self._writer, self._writer_lock = name, lock
+
+    def append(self, notification: ErrorNotification, destination: Optional[str] = None):
+        """
+        Добавление уведомления в буфер записи (без обращения к диску)
+
+        Args:
+            destination: Имя получателя (None - все подходящие получатели)
+        """
+        self._check_fork()
+        data = frame(pack_text(destination) + encode_notification(notification))
+        self._buffer.append(data)
+        self._buffered_bytes += len(data)
+        # Буфер не может быть больше самого журнала
+        while self._buffered_bytes > self.max_bytes and self._buffer:
+            self._buffered_bytes -= len(self._buffer.popleft())
+            self.lost += 1
+
+    def pending_segments(self) -> List[int]:
+        """Номера сегментов на диске в порядке записи"""
+        return sorted(self._segments)
+
+    async def flush(self):
+        """Запись буфера на диск с fsync"""
+        self._check_fork()
+        if not self._buffer:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._write_buffer()
+
+    async def _write_buffer(self):
+        if self._buffer and self._writer is None:
+            self._open_writer()
+        buffer, self._buffer = self._buffer, deque()
+        self._buffered_bytes = 0
+        loop = asyncio.get_running_loop()
+
+        while buffer:
+            size = self._segments.get(self._current, 0)
+            if size >= self.segment_size:
+                self._current += 1
+                size = 0
+            # Пишем в текущий сегмент, пока он не заполнится
+            chunk = []
+            while buffer and (size < self.segment_size or not chunk):
+                data = buffer.popleft()
+                chunk.append(data)
+                size += len(data)
+            try:
+                async with aiofiles.open(self._path(self._current), "ab") as f:
+                    await f.write(b"".join(chunk))
+                    await f.flush()
+                    await loop.run_in_executor(None, os.fsync, f.fileno())
+            except BaseException:
+                self._restore_unwritten(chunk + list(buffer))
+                raise
+            self._segments[self._current] = size
+
+        await self._enforce_limit()
+
+    def _restore_unwritten(self, frames: List[bytes]):
+        """Возврат незаписанных записей в начало буфера после ошибки записи"""
+        path = self._path(self._current)
+        if os.path.exists(path):
+            # Часть пачки могла попасть на диск: сегмент воспроизводится как есть
+            # (оборванная запись в конце отбрасывается), повтор пишется в новый
+            self._segments[self._current] = os.path.getsize(path)
+            self._current += 1
+        self._buffer.extendleft(reversed(frames))
+        self._buffered_bytes += sum(len(data) for data in frames)
+        while self._buffered_bytes > self.max_bytes and self._buffer:
+            self._buffered_bytes -= len(self._buffer.popleft())
+            self.lost += 1
+        logger.error(f"Ошибка записи журнала уведомлений, записей в буфере: {len(self._buffer)}")
+
+    async def _enforce_limit(self):
+        total = sum(self._segments.values())
+        for sequence in sorted(self._segments):
+            if total <= self.max_bytes or sequence == self._current:
+                break
+            total -= self._segments.pop(sequence)
+            logger.warning(f"❌ Журнал уведомлений переполнен, удален сегмент {sequence}")
+            await self._remove(self._path(sequence))
+
+    async def _remove(self, path: str):
+        try:
+            await aiofiles.os.remove(path)
+        except OSError as e:
+            logger.error(f"Ошибка удаления сегмента журнала уведомлений: {e}")
+
+    async def replay(self, accept: Callable[[Optional[str], ErrorNotification], Awaitable[None]],
+                     current: bool = False) -> int:
+        """
+        Повторная передача сегментов завершившихся процессов (в том числе
+        предыдущего запуска) в порядке записи
+
+        Каждое уведомление передается в accept (имя получателя, уведомление);
+        сегмент удаляется только после того, как accept принял все его записи.
+        Если replay прервана, непринятый сегмент останется на диске и будет
+        воспроизведен еще раз (уже принятые записи могут повториться).
+
+        Args:
+            accept: Прием уведомления; может ждать места в очереди
+            current: Передать и записанное этим процессом - буфер
+                сбрасывается на диск, новые записи идут в следующий сегмент
+
+        Returns:
+            Число переданных уведомлений
+        """
+        self._check_fork()
+        if self._replay_lock is None:
+            self._replay_lock = asyncio.Lock()
+        async with self._replay_lock:
+            count = 0
+            for name in self._foreign_writers():
+                count += await self._adopt(name, accept)
+
+            if current:
+                if self._lock is None:
+                    self._lock = asyncio.Lock()
+                async with self._lock:
+                    await self._write_buffer()
+                    if self._current in self._segments:
+                        self._current += 1
+                    self._replay_before = self._current
+            # Сегменты, в которые еще идет запись, не трогаем
+            for sequence in [s for s in self.pending_segments() if s < self._replay_before]:
+                path = self._path(sequence)
+                count += await self._replay_segment(path, accept)
+                self._segments.pop(sequence, None)
+                await self._remove(path)
+            return count
+
+    def has_backlog(self) -> bool:
+        """Есть ли на диске сегменты других (возможно, завершившихся) процессов"""
+        return bool(self._foreign_writers())
+
+    def _foreign_writers(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError as e:
+            logger.error(f"Ошибка чтения журнала уведомлений: {e}")
+            return []
+        return sorted(name for name in names if _WRITER_RE.match(name) and name != self._writer)
+
+    async def _adopt(self, name: str, accept: Callable[[Optional[str], ErrorNotification], Awaitable[None]]) -> int:
+        """Передача и удаление подкаталога завершившегося процесса"""
+        path = os.path.join(self.directory, name)
+        lock_path = os.path.join(path, _LOCK_FILE)
+        try:
+            lock = open(lock_path, "r+b")
+        except OSError:
+            # Каталог уже прочитан другим процессом
+            return 0
+        count = 0
+        with lock:
+            if not _try_lock(lock):
+                # Процесс-владелец работает
+                return 0
+            try:
+                segments = sorted(segment for segment in os.listdir(path) if _SEGMENT_RE.match(segment))
+            except OSError as e:
+                logger.error(f"Ошибка чтения журнала уведомлений: {e}")
+                return 0
+            for segment in segments:
+                segment_path = os.path.join(path, segment)
+                count += await self._replay_segment(segment_path, accept)
+                await self._remove(segment_path)
+        _remove_writer_dir(path)
+        return count
+
+    async def _replay_segment(self, path: str,
+                              accept: Callable[[Optional[str], ErrorNotification], Awaitable[None]]) -> int:
+        notifications = await self._read_segment(path)
+        for destination, notification in notifications:
+            await accept(destination, notification)
+        return len(notifications)
+
+    async def _read_segment(self, path: str) -> List[Tuple[Optional[str], ErrorNotification]]:
+        notifications: List[Tuple[Optional[str], ErrorNotification]] = []
+        try:
+            async with aiofiles.open(path, "rb") as f:
+                data = await f.read()
+        except OSError as e:
+            logger.error(f"Ошибка чтения журнала уведомлений: {e}")
+            return notifications
+
+        offset = 0
+        while offset + FRAME_PREFIX_SIZE <= len(data):
+            try:
+                length = frame_length(data[offset:offset + FRAME_PREFIX_SIZE])
+                payload = data[offset + FRAME_PREFIX_SIZE:offset + FRAME_PREFIX_SIZE + length]
+                if len(payload) < length:
+                    # Хвост, не дописанный при аварийном завершении
+                    break
+                destination, body_offset = unpack_text(payload, 0)
+                notifications.append((destination, decode_notification(payload[body_offset:])))
+            except Exception as e:
+                logger.error(f"Поврежденная запись в журнале уведомлений: {e}")
+                break
+            offset += FRAME_PREFIX_SIZE + length
+        return notifications
+
+    def close(self):
+        """Снятие блокировки подкаталога процесса; пустой подкаталог удаляется"""
+        if self._writer is None or self._pid != os.getpid():
+            return
+        path = os.path.join(self.directory, self._writer)
+        lock, self._writer, self._writer_lock = self._writer_lock, None, None
+        lock.close()
+        # Оставшиеся сегменты воспроизведет следующий запуск
+        if not self._segments:
+            _remove_writer_dir(path)
+        self._segments = {}
+        self._current = self._replay_before = 1
+
+
+def _try_lock(file: IO[bytes]) -> bool:
+    """Неблокирующий захват блокировки файла (снимается при закрытии файла)"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _remove_writer_dir(path: str):
+    try:
+        os.remove(os.path.join(path, _LOCK_FILE))
+        os.rmdir(path)
+    except OSError as e:
+        logger.debug(f"Каталог журнала уведомлений не удален: {e}")
@@ -0,0 +1,112 @@
+import linecache
+import traceback
+from collections import OrderedDict, deque
+from typing import Optional, Tuple
+
+Frame = Tuple[str, int, str]
+
+# Сколько исключений цепочки (__cause__/__context__) сохраняется
+MAX_CHAIN_DEPTH = 5
+
+_CAUSE_MESSAGE = "The above exception was the direct cause of the following exception:"
+_CONTEXT_MESSAGE = "During handling of the above exception, another exception occurred:"
+
+_FORMAT_CACHE_SIZE = 1024
+_format_cache: "OrderedDict[Tuple[Frame, ...], str]" = OrderedDict()
+
+
+class CapturedTraceback:
+    """
+    Структурированная трассировка исключения
+
+    При захвате сохраняются только места вызова (файл, строка, функция)
+    из exc.__traceback__, без чтения исходников и форматирования.
+    Текст строится лениво при отправке и кэшируется по набору мест вызова,
+    поэтому повторяющиеся одинаковые ошибки почти ничего не стоят.
+    Исключения, вызвавшие это (raise ... from, обработка другого исключения),
+    захватываются так же и выводятся перед ним, как в модуле traceback.
+    """
+
+    __slots__ = ("exc_type", "exc_message", "frames", "chained", "chain_kind", "_text")
+
+    def __init__(self, exc_type: str, exc_message: str, frames: Tuple[Frame, ...],
+                 chained: Optional["CapturedTraceback"] = None, chain_kind: str = "cause"):
+        self.exc_type = exc_type
+        self.exc_message = exc_message
+        self.frames = frames
+        # Исключение, из-за которого возникло это: __cause__ или __context__
+        self.chained = chained
+        self.chain_kind = chain_kind
+        self._text: Optional[str] = None
+
+    @classmethod
+    def capture(cls, exc: BaseException, limit: int = 20, _depth: int = 0) -> "CapturedTraceback":
+        """Захват трассировки из исключения (сохраняются последние limit кадров)"""
+        chained = None
+        chain_kind = "cause"
+        previous = exc.__cause__
+        if previous is None and not exc.__suppress_context__:
+            previous = exc.__context__
+            chain_kind = "context"
+        if previous is not None and previous is not exc and _depth < MAX_CHAIN_DEPTH:
+            chained = cls.capture(previous, limit, _depth + 1)
+
+        frames = deque(maxlen=limit)
+        for frame, lineno in traceback.walk_tb(exc.__traceback__):
+            code = frame.f_code
+            frames.append((code.co_filename, lineno, code.co_name))
+        exc_type = type(exc)
+        module = exc_type.__module__
+        type_name = exc_type.__qualname__ if module in ("builtins", "__main__") else f"{module}.{exc_type.__qualname__}"
+        try:
+            message = str(exc)
+        except Exception:
+            message = "<unprintable exception>"
+        return cls(type_name, message, tuple(frames), chained, chain_kind)
+
+    def top_frame(self) -> str:
+        """Самый глубокий кадр (место возникновения исключения)"""
+        if not self.frames:
+            return ""
+        filename, lineno, name = self.frames[-1]
+        return f"{filename}:{lineno}:{name}"
+
+    def format(self) -> str:
+        """Текст трассировки в формате модуля traceback"""
+        if self._text is None:
+            text = _format_stack(self.frames) + self.exception_line()
+            if self.chained is not None:
+                separator = _CAUSE_MESSAGE if self.chain_kind == "cause" else _CONTEXT_MESSAGE
+                text = f"{self.chained.format()}\n\n{separator}\n\n{text}"
+            self._text = text
+        return self._text
+
+    def exception_line(self) -> str:
+        """Строка с типом и текстом исключения"""
+        return f"{self.exc_type}: {self.exc_message}" if self.exc_message else self.exc_type
+
+    def __str__(self) -> str:
+        return self.format()
+
+
+def _format_stack(frames: Tuple[Frame, ...]) -> str:
+    cached = _format_cache.get(frames)
+    if cached is not None:
+        try:
+            _format_cache.move_to_end(frames)
+        except KeyError:
+            pass
+        return cached
+
+    lines = ["Traceback (most recent call last):\n"] if frames else []
+    for filename, lineno, name in frames:
+        lines.append(f'  File "{filename}", line {lineno}, in {name}\n')
+        source = linecache.getline(filename, lineno).strip()
+        if source:
+            lines.append(f"    {source}\n")
+    text = "".join(lines)
+
+    _format_cache[frames] = text
+    if len(_format_cache) > _FORMAT_CACHE_SIZE:
+        _format_cache.popitem(last=False)
+    return text
@@ -0,0 +1,340 @@
+import asyncio
+import json
+import sys
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .exceptions import TransportError, TransportRateLimited, TransportUnavailable
+
+if TYPE_CHECKING:
+    import aiohttp
+    from aiogram import Bot
+    from aiogram.client.session.base import BaseSession
+    from .config import TelegramNotifierConfig
+
+TRANSPORT_AIOGRAM = "aiogram"
+TRANSPORT_HTTP = "http"
+
+TRANSPORTS = (TRANSPORT_AIOGRAM, TRANSPORT_HTTP)
+
+DEFAULT_API_SERVER = "https://api.telegram.org"
+
+
+class Transport:
+    """
+    Доставка запросов в Bot API
+
+    Нотификатор вызывает send_message и send_document, а пока Telegram
+    недоступен - get_me для проверки связи (если транспорт его реализует).
+    Ошибки различает по типу: TransportRateLimited (429), TransportUnavailable
+    (сеть, таймауты, 5xx - учитываются предохранителем) и TransportError
+    (запрос отклонен, повтор не поможет). Токен передается в каждый вызов:
+    получатели могут отправлять от разных ботов.
+    """
+
+    async def prepare(self):
+        """Подготовка перед первой отправкой (импорт зависимостей)"""
+
+    async def send_message(self, token: str, chat_id: str, text: str,
+                           parse_mode: Optional[str] = None, **extra: Any):
+        raise NotImplementedError
+
+    async def send_document(self, token: str, chat_id: str, filename: str, data: bytes,
+                            caption: Optional[str] = None, parse_mode: Optional[str] = None, **extra: Any):
+        raise NotImplementedError
+
+    async def get_me(self, token: str):
+        """Пробный запрос getMe (проверка доступности Bot API)"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Закрытие соединений, открытых самим транспортом"""
+
+
+class AiogramTransport(Transport):
+    """
+    Отправка через aiogram
+
+    Args:
+        bot: Бот приложения; его сессия (пул соединений) используется и для
+            ботов с другими токенами, закрывает ее приложение
+        session: Сессия aiogram приложения (если бота нет)
+        api_server: Адрес сервера Bot API (по умолчанию api.telegram.org)
+        pool_size: Размер пула соединений собственной сессии
+        timeout: Таймаут запроса собственной сессии в секундах
+    """
+
+    def __init__(self, bot: Optional["Bot"] = None, session: Optional["BaseSession"] = None,
+                 api_server: Optional[str] = None, pool_size: int = 100, timeout: float = 60.0):
+        self.api_server = api_server
+        self.pool_size = pool_size
+        self.timeout = timeout
+        if session is None and bot is not None:
+            session = bot.session
+        self._session = session
+        self._owns_session = session is None
+        self._bots: Dict[str, "Bot"] = {bot.token: bot} if bot is not None else {}
+
+    async def prepare(self):
+        await _import_off_loop(_import_aiogram)
+
+    def get_bot(self, token: str) -> "Bot":
+        """Бот для токена (один экземпляр на токен, общий пул соединений)"""
+        bot = self._bots.get(token)
+        if bot is None:
+            from aiogram import Bot
+
+            bot = self._bots[token] = Bot(token=token, session=self._get_session())
+        return bot
+
+    def _get_session(self) -> "BaseSession":
+        if self._session is None:
+            from aiogram.client.session.aiohttp import AiohttpSession
+            from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+
+            api = TelegramAPIServer.from_base(self.api_server) if self.api_server else PRODUCTION
+            self._session = AiohttpSession(api=api, limit=self.pool_size, timeout=self.timeout)
+        return self._session
+
+    async def send_message(self, token: str, chat_id: str, text: str,
+                           parse_mode: Optional[str] = None, **extra: Any):
+        bot = self.get_bot(token)
+        await self._call(bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode, **extra))
+
+    async def send_document(self, token: str, chat_id: str, filename: str, data: bytes,
+                            caption: Optional[str] = None, parse_mode: Optional[str] = None, **extra: Any):
+        from aiogram.types import BufferedInputFile
+
+        bot = self.get_bot(token)
+        await self._call(bot.send_document(chat_id=chat_id, document=BufferedInputFile(data, filename=filename),
+                                           caption=caption, parse_mode=parse_mode, **extra))
+
+    async def get_me(self, token: str):
+        await self._call(self.get_bot(token).get_me())
+
+    @staticmethod
+    async def _call(request):
+        from aiogram.exceptions import TelegramAPIError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+        try:
+            await request
+        except TelegramRetryAfter as e:
+            raise TransportRateLimited(str(e), e.retry_after) from e
+        except (TelegramNetworkError, TelegramServerError) as e:
+            raise TransportUnavailable(str(e)) from e
+        except TelegramAPIError as e:
+            raise TransportError(str(e)) from e
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            session, self._session = self._session, None
+            self._bots.clear()
+            await session.close()
+
+
+class HTTPTransport(Transport):
+    """
+    Прямые запросы к Bot API через aiohttp, без aiogram и pydantic
+
+    Соединения держатся открытыми (keep-alive) и переиспользуются между
+    запросами, поэтому TLS-рукопожатие выполняется один раз на соединение.
+
+    Args:
+        session: ClientSession приложения (закрывает ее приложение)
+        api_server: Адрес сервера Bot API (по умолчанию api.telegram.org)
+        timeout: Таймаут запроса целиком в секундах
+        connect_timeout: Таймаут установки соединения в секундах
+        pool_size: Размер пула соединений собственной сессии
+        keepalive_timeout: Сколько секунд держать простаивающее соединение
+    """
+
+    def __init__(self, session: Optional["aiohttp.ClientSession"] = None,
+                 api_server: Optional[str] = None,
+                 timeout: float = 30.0,
+                 connect_timeout: float = 10.0,
+                 pool_size: int = 100,
+                 keepalive_timeout: float = 60.0):
+        self.api_server = (api_server or DEFAULT_API_SERVER).rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self._session = session
+        self._owns_session = session is None
+        self._client_timeout = None
+
+    async def prepare(self):
+        await _import_off_loop(_import_aiohttp)
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def send_message(self, token: str, chat_id: str, text: str,
+                           parse_mode: Optional[str] = None, **extra: Any):
+        payload = {"chat_id": chat_id, "text": text, **extra}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        await self._post(token, "sendMessage", json=payload)
+
+    async def send_document(self, token: str, chat_id: str, filename: str, data: bytes,
+                            caption: Optional[str] = None, parse_mode: Optional[str] = None, **extra: Any):
+        import aiohttp
+
+        form = aiohttp.FormData()
+        form.add_field("chat_id", str(chat_id))
+        if caption:
+            form.add_field("caption", caption)
+        if parse_mode:
+            form.add_field("parse_mode", parse_mode)
+        for key, value in extra.items():
+            form.add_field(key, str(value))
+        form.add_field("document", data, filename=filename, content_type="application/octet-stream")
+        await self._post(token, "sendDocument", data=form)
+
+    async def get_me(self, token: str):
+        await self._post(token, "getMe")
+
+    async def _post(self, token: str, method: str, **kwargs: Any):
+        import aiohttp
+
+        if self._client_timeout is None:
+            self._client_timeout = aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout)
+        # Токен входит в адрес: в текст ошибок адрес не попадает
+        url = f"{self.api_server}/bot{token}/{method}"
+        try:
+            async with self._get_session().post(url, timeout=self._client_timeout, **kwargs) as response:
+                status = response.status
+                try:
+                    result = json.loads(await response.read())
+                except ValueError:
+                    result = None
+        except aiohttp.ClientError as e:
+            raise TransportUnavailable(f"{type(e).__name__}: {e}") from None
+
+        if isinstance(result, dict) and result.get("ok"):
+            return
+        result = result if isinstance(result, dict) else {}
+        description = result.get("description") or f"HTTP {status}"
+        if status == 429 or result.get("error_code") == 429:
+            retry_after = (result.get("parameters") or {}).get("retry_after", 1)
+            raise TransportRateLimited(f"Telegram server says - {description}", retry_after)
+        if status >= 500:
+            raise TransportUnavailable(f"Telegram server says - {description}")
+        raise TransportError(f"Telegram server says - {description}")
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+
+class InMemoryTransport(Transport):
+    """
+    Транспорт без сети для тестов и бенчмарков
+
+    Запросы сохраняются в requests по порядку. fail_next задает ошибки,
+    которые получат следующие запросы (например, TransportUnavailable
+    для проверки повторов и предохранителя).
+
+    Args:
+        latency: Задержка каждого запроса в секундах
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests: List[Dict[str, Any]] = []
+        self._errors: deque = deque()
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        return [request for request in self.requests if request["method"] == "sendMessage"]
+
+    @property
+    def documents(self) -> List[Dict[str, Any]]:
+        return [request for request in self.requests if request["method"] == "sendDocument"]
+
+    def fail_next(self, error: Exception, count: int = 1):
+        """Следующие count запросов завершатся ошибкой error"""
+        self._errors.extend([error] * count)
+
+    async def send_message(self, token: str, chat_id: str, text: str,
+                           parse_mode: Optional[str] = None, **extra: Any):
+        await self._record("sendMessage", token=token, chat_id=chat_id, text=text,
+                           parse_mode=parse_mode, **extra)
+
+    async def send_document(self, token: str, chat_id: str, filename: str, data: bytes,
+                            caption: Optional[str] = None, parse_mode: Optional[str] = None, **extra: Any):
+        await self._record("sendDocument", token=token, chat_id=chat_id, filename=filename, data=data,
+                           caption=caption, parse_mode=parse_mode, **extra)
+
+    async def get_me(self, token: str):
+        await self._record("getMe", token=token)
+
+    async def _record(self, method: str, **fields: Any):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._errors:
+            raise self._errors.popleft()
+        self.requests.append({"method": method, **fields})
+
+
+def create_transport(config: "TelegramNotifierConfig", transport: Any = None) -> Transport:
+    """
+    Транспорт нотификатора
+
+    Args:
+        transport: Готовый Transport, Bot aiogram или aiohttp.ClientSession
+            приложения; без него транспорт выбирается по config.transport
+    """
+    if isinstance(transport, Transport):
+        return transport
+    if transport is None:
+        if config.transport == TRANSPORT_HTTP:
+            return HTTPTransport(api_server=config.api_server, timeout=config.http_timeout,
+                                 connect_timeout=config.http_connect_timeout, pool_size=config.http_pool_size,
+                                 keepalive_timeout=config.http_keepalive_timeout)
+        return AiogramTransport(api_server=config.api_server, pool_size=config.http_pool_size,
+                                timeout=config.http_timeout)
+    # Объекты приложения: их модули уже импортированы
+    aiogram = sys.modules.get("aiogram")
+    if aiogram is not None and isinstance(transport, aiogram.Bot):
+        return AiogramTransport(bot=transport)
+    aiohttp = sys.modules.get("aiohttp")
+    if aiohttp is not None and isinstance(transport, aiohttp.ClientSession):
+        return HTTPTransport(session=transport, api_server=config.api_server, timeout=config.http_timeout,
+                             connect_timeout=config.http_connect_timeout)
+    raise TypeError(f"transport must be a Transport, aiogram Bot or aiohttp ClientSession, "
+                    f"got {type(transport).__name__}")
+
+
+async def _import_off_loop(importer):
+    """
+    Первый импорт тяжелых зависимостей в потоке пула
+
+    Не останавливает цикл событий приложения; при завершении интерпретатора
+    (atexit), когда новые потоки недоступны, импорт выполняется на месте.
+    """
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, importer)
+    except RuntimeError:
+        importer()
+
+
+def _import_aiogram():
+    if "aiogram.client.session.aiohttp" in sys.modules:
+        return
+    import aiogram.client.session.aiohttp
+    import aiogram.client.telegram
+    import aiogram.exceptions
+    import aiogram.types
+
+
+def _import_aiohttp():
+    if "aiohttp" in sys.modules:
+        return
+    import aiohttp
@@ -5,11 +5,13 @@ from .error_decorators import (
     handle_cache_errors,
     handle_system_errors
 )
+from .latency_decorators import monitor_latency
 
 __all__ = [
     'handle_errors',
     'handle_database_errors',
     'handle_telegram_errors',
     'handle_cache_errors',
-    'handle_system_errors'
+    'handle_system_errors',
+    'monitor_latency'
 ]
\ No newline at end of file
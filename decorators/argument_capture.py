@@ -0,0 +1,154 @@
+import inspect
+import reprlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..models.notification_models import LazyDetails
+
+# Фрагменты имен параметров, значения которых не попадают в уведомления
+SENSITIVE_NAMES = (
+    "password", "passwd", "secret", "token", "api_key", "apikey", "private_key",
+    "authorization", "credential", "cookie", "session_id", "signature",
+)
+
+REDACTED = "'***'"
+
+# Общий предел длины строки аргументов в уведомлении
+MAX_ARGUMENTS_LENGTH = 400
+
+
+class BoundedRepr(reprlib.Repr):
+    """
+    reprlib.Repr с ограничениями по типам
+
+    В отличие от repr(), не строит полное представление большого объекта,
+    чтобы затем его обрезать: строки и байты срезаются до форматирования,
+    коллекции обходятся до maxlevel уровней и max* элементов, а для
+    объектов с длиной (таблицы, коллекции ORM, массивы) больше maxcollection
+    выводится только тип и размер.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.maxlevel = 2
+        self.maxstring = 80
+        self.maxother = 80
+        self.maxlong = 40
+        self.maxbytes = 16
+        self.maxcollection = 100
+        self.maxlist = self.maxtuple = self.maxset = self.maxfrozenset = self.maxdeque = 5
+        self.maxdict = 5
+
+    def repr_bytes(self, x: bytes, level: int) -> str:
+        if len(x) <= self.maxbytes:
+            return repr(x)
+        return f"{x[:self.maxbytes]!r}... [{len(x)} bytes]"
+
+    def repr_bytearray(self, x: bytearray, level: int) -> str:
+        if len(x) <= self.maxbytes:
+            return repr(x)
+        return f"bytearray({bytes(x[:self.maxbytes])!r}...) [{len(x)} bytes]"
+
+    def repr_memoryview(self, x: memoryview, level: int) -> str:
+        return f"<memoryview [{x.nbytes} bytes]>"
+
+    def repr_instance(self, x: Any, level: int) -> str:
+        cls = type(x)
+        # У больших объектов со своей длиной repr может быть очень дорогим
+        try:
+            size = len(x)
+        except Exception:
+            size = None
+        if size is not None and size > self.maxcollection:
+            shape = getattr(x, "shape", None)
+            if isinstance(shape, tuple):
+                return f"<{cls.__qualname__} shape={shape}>"
+            return f"<{cls.__qualname__} len={size}>"
+        try:
+            return super().repr_instance(x, level)
+        except Exception:
+            return f"<{cls.__qualname__}>"
+
+
+bounded_repr = BoundedRepr()
+
+
+def is_sensitive(name: str) -> bool:
+    """Нужно ли скрыть значение параметра"""
+    lowered = name.lower()
+    return any(fragment in lowered for fragment in SENSITIVE_NAMES)
+
+
+class ArgumentCapture:
+    """
+    Снятие аргументов вызова для уведомления об ошибке
+
+    Аргументы привязываются к именам параметров по сигнатуре функции,
+    которая вычисляется один раз при первой ошибке. Значения форматируются
+    через BoundedRepr, чувствительные параметры скрываются, а для self/cls
+    выводится только тип. Сами детали вычисляются лениво (LazyDetails):
+    если уведомление отброшено или не отправляется, аргументы
+    не форматируются вовсе.
+    """
+
+    __slots__ = ("func", "_signature")
+
+    def __init__(self, func: Callable):
+        self.func = func
+        self._signature: Optional[inspect.Signature] = None
+
+    @property
+    def signature(self) -> Optional[inspect.Signature]:
+        if self._signature is None:
+            try:
+                self._signature = inspect.signature(self.func)
+            except (TypeError, ValueError):
+                return None
+        return self._signature
+
+    def details(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> LazyDetails:
+        """Детали уведомления с отложенным форматированием аргументов"""
+        return LazyDetails(lambda: {
+            "function": self.func.__name__,
+            "args": self.format_arguments(args, kwargs),
+        })
+
+    def format_arguments(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+        """Строка вида "user_id=42, payload=b'...' [1048576 bytes], password='***'" """
+        parts = []
+        for name, value in self._bind(args, kwargs):
+            if name in ("self", "cls"):
+                rendered = f"<{value.__qualname__ if isinstance(value, type) else type(value).__qualname__}>"
+            elif name and is_sensitive(name):
+                rendered = REDACTED
+            else:
+                rendered = bounded_repr.repr(value)
+            parts.append(f"{name}={rendered}" if name else rendered)
+
+        text = ", ".join(parts)
+        if len(text) > MAX_ARGUMENTS_LENGTH:
+            text = text[:MAX_ARGUMENTS_LENGTH - 1] + "…"
+        return text
+
+    def _bind(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]):
+        signature = self.signature
+        if signature is not None:
+            try:
+                bound = signature.bind_partial(*args, **kwargs)
+            except TypeError:
+                # Функция вызвана с неподходящими аргументами - выводим как есть
+                pass
+            else:
+                for name, value in bound.arguments.items():
+                    kind = signature.parameters[name].kind
+                    if kind is inspect.Parameter.VAR_POSITIONAL:
+                        for item in value:
+                            yield "", item
+                    elif kind is inspect.Parameter.VAR_KEYWORD:
+                        yield from value.items()
+                    else:
+                        yield name, value
+                return
+
+        for item in args:
+            yield "", item
+        yield from kwargs.items()
@@ -2,8 +2,9 @@ import functools
 import asyncio
 from typing import Callable, Any
 
-from ..models.error_models import ErrorCategory
+from ..models.error_models import ErrorLevel, ErrorCategory
 from ..core.error_manager import ErrorManager
+from .argument_capture import ArgumentCapture
 
 
 def handle_errors(category: ErrorCategory, operation: str = ""):
@@ -16,16 +17,21 @@ def handle_errors(category: ErrorCategory, operation: str = ""):
     """
     
     def decorator(func: Callable) -> Callable:
+        # Сигнатура вычисляется при первой ошибке, аргументы - только при отправке
+        capture = ArgumentCapture(func)
+
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs) -> Any:
             try:
                 return await func(*args, **kwargs)
             except Exception as e:
+                if not ErrorManager.should_notify(ErrorLevel.ERROR, category):
+                    raise
                 op_name = operation or func.__name__
                 await ErrorManager.notify_error(
                     category,
                     f"Ошибка при выполнении: {op_name}",
-                    {"function": func.__name__, "args": str(args)[:100], "kwargs": str(kwargs)[:100]},
+                    capture.details(args, kwargs),
                     e
                 )
                 raise
@@ -35,15 +41,17 @@ def handle_errors(category: ErrorCategory, operation: str = ""):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
+                if not ErrorManager.should_notify(ErrorLevel.ERROR, category):
+                    raise
                 op_name = operation or func.__name__
-                # Для синхронных функций используем асинхронную отправку
-                asyncio.create_task(
-                    ErrorManager.notify_error(
-                        category,
-                        f"Ошибка при выполнении: {op_name}",
-                        {"function": func.__name__, "args": str(args)[:100], "kwargs": str(kwargs)[:100]},
-                        e
-                    )
+                # Синхронный код может работать без цикла событий (потоки, скрипты),
+                # поэтому уведомление передается потокобезопасно
+                ErrorManager.submit(
+                    ErrorLevel.ERROR,
+                    category,
+                    f"Ошибка при выполнении: {op_name}",
+                    capture.details(args, kwargs),
+                    e
                 )
                 raise
         
@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import time
+from typing import Callable, Any, Optional
+
+from ..models.error_models import ErrorCategory
+from ..monitoring.latency import BATCH_SIZE, LatencyTracker
+
+
+def monitor_latency(category: ErrorCategory, budget: float, operation: str = "",
+                    percentile: float = 0.95,
+                    error_budget: Optional[float] = None,
+                    error_percentile: float = 0.99,
+                    window: float = 60.0,
+                    sustain: int = 3,
+                    min_samples: int = 20,
+                    cooldown: float = 600.0,
+                    notify_recovery: bool = True):
+    """
+    Декоратор, следящий за временем выполнения
+
+    Время успешных вызовов (синхронных и асинхронных) копится в окнах по
+    window секунд. Если квантиль percentile превышает budget sustain окон
+    подряд, отправляется WARNING; если квантиль error_percentile превышает
+    error_budget - ERROR. Исключения не замеряются: о них сообщает handle_errors.
+
+    На вызов добавляется два чтения часов и добавление в список; замеры
+    переносятся в гистограмму пачками по BATCH_SIZE, квантили оцениваются
+    раз в окно.
+
+    Args:
+        category: Категория уведомлений
+        budget: Допустимое время в секундах для квантиля percentile
+        operation: Название операции (если не указано, используется имя функции)
+        error_budget: Время в секундах для квантиля error_percentile (None - без ERROR)
+        window: Длительность окна в секундах
+        sustain: Сколько окон подряд бюджет должен быть превышен
+        min_samples: Окна с меньшим числом вызовов не оцениваются
+        cooldown: Минимальный интервал между уведомлениями в секундах
+        notify_recovery: Уведомлять ли о возвращении в бюджет
+    """
+
+    def decorator(func: Callable) -> Callable:
+        tracker = LatencyTracker(
+            operation or func.__name__, category, budget,
+            percentile=percentile,
+            error_budget=error_budget,
+            error_percentile=error_percentile,
+            window=window,
+            sustain=sustain,
+            min_samples=min_samples,
+            cooldown=cooldown,
+            notify_recovery=notify_recovery
+        )
+        # Горячий путь: два чтения часов и добавление в список; гистограмма
+        # и окно обрабатываются пачками в tracker.flush
+        clock = time.perf_counter
+        pending = tracker.pending
+        append = pending.append
+        deadline = tracker.window_end
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs) -> Any:
+            nonlocal deadline
+            started = clock()
+            result = await func(*args, **kwargs)
+            finished = clock()
+            append(finished - started)
+            if finished >= deadline or len(pending) >= BATCH_SIZE:
+                deadline = tracker.flush(finished)
+            return result
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs) -> Any:
+            nonlocal deadline
+            started = clock()
+            result = func(*args, **kwargs)
+            finished = clock()
+            append(finished - started)
+            if finished >= deadline or len(pending) >= BATCH_SIZE:
+                deadline = tracker.flush(finished)
+            return result
+
+        wrapper = async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+        wrapper.latency = tracker
+        return wrapper
+
+    return decorator
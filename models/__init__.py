@@ -1,4 +1,4 @@
-from .error_models import ErrorLevel, ErrorCategory
+from .error_models import LEVEL_ORDER, ErrorLevel, ErrorCategory
 from .notification_models import ErrorNotification
 
-__all__ = ['ErrorLevel', 'ErrorCategory', 'ErrorNotification']
\ No newline at end of file
+__all__ = ['ErrorLevel', 'ErrorCategory', 'ErrorNotification', 'LEVEL_ORDER']
\ No newline at end of file
@@ -11,6 +11,10 @@ class ErrorLevel(Enum):
     CRITICAL = "critical"
 
 
+# Уровни по возрастанию важности
+LEVEL_ORDER = (ErrorLevel.INFO, ErrorLevel.WARNING, ErrorLevel.ERROR, ErrorLevel.CRITICAL)
+
+
 class ErrorCategory(Enum):
     """
     Категории ошибок по модулям системы
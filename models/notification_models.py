@@ -1,9 +1,57 @@
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Dict, Any
 
 from .error_models import ErrorLevel, ErrorCategory
 
+if TYPE_CHECKING:
+    from ..core.context import CapturedContext
+    from ..core.traceback_capture import CapturedTraceback
+
+
+class LazyDetails(Mapping):
+    """
+    Детали уведомления, вычисляемые при первом обращении
+
+    Фабрика вызывается не более одного раза - когда детали действительно
+    нужны для отправки или записи в лог. Ошибка фабрики не теряет уведомление:
+    вместо деталей будет ее описание.
+    """
+
+    __slots__ = ("_factory", "_data")
+
+    def __init__(self, factory: Callable[[], Dict[str, Any]]):
+        self._factory = factory
+        self._data: Optional[Dict[str, Any]] = None
+
+    @property
+    def resolved(self) -> bool:
+        """Были ли детали уже вычислены"""
+        return self._data is not None
+
+    def _resolve(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                self._data = dict(self._factory())
+            except Exception as e:
+                self._data = {"details_error": f"{type(e).__name__}: {e}"}
+            # Фабрика может удерживать большие объекты (аргументы вызова)
+            self._factory = None
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._resolve()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._resolve())
+
+    def __len__(self) -> int:
+        return len(self._resolve())
+
+    def __repr__(self) -> str:
+        return repr(self._resolve())
+
 
 @dataclass
 class ErrorNotification:
@@ -16,7 +64,38 @@ class ErrorNotification:
     details: Optional[Dict[str, Any]] = None
     timestamp: Optional[datetime] = None
     traceback: Optional[str] = None
+    repeat_count: int = 1
+    repeat_window: Optional[float] = None
+    # Сколько событий представляет уведомление после выборки
+    sample_weight: int = 1
+    captured_traceback: Optional["CapturedTraceback"] = None
+    # Отпечаток для дедупликации и журнала (вычисляется один раз)
+    fingerprint: Optional[str] = None
+    # Контекст места ошибки; детали из него собираются при отправке
+    context: Optional["CapturedContext"] = None
     
     def __post_init__(self):
         if self.timestamp is None:
-            self.timestamp = datetime.now()
\ No newline at end of file
+            self.timestamp = datetime.now()
+
+    def get_traceback(self) -> Optional[str]:
+        """Текст трассировки; захваченная трассировка форматируется при первом обращении"""
+        if self.traceback is None and self.captured_traceback is not None:
+            self.traceback = self.captured_traceback.format()
+        return self.traceback
+
+    def get_details(self) -> Optional[Dict[str, Any]]:
+        """
+        Детали вместе с контекстом уведомления
+
+        Значения контекста и результаты поставщиков деталей объединяются
+        с переданными деталями при первом обращении; переданные детали
+        важнее значений контекста с тем же ключом.
+        """
+        if self.context is not None:
+            context, self.context = self.context, None
+            details = context.resolve()
+            if self.details:
+                details.update(self.details)
+            self.details = details or None
+        return self.details
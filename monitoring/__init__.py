@@ -0,0 +1,4 @@
+from .resource_monitor import ResourceMonitor, Hysteresis
+from .latency import LatencySketch, LatencyTracker
+
+__all__ = ['ResourceMonitor', 'Hysteresis', 'LatencySketch', 'LatencyTracker']
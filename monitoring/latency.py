@@ -0,0 +1,242 @@
+import functools
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..models.error_models import ErrorLevel, ErrorCategory
+from ..core.error_manager import ErrorManager
+from .resource_monitor import ALARM_CLEARED, ALARM_RAISED, Hysteresis
+
+logger = logging.getLogger(__name__)
+
+# Сколько замеров обертка копит в списке до переноса в гистограмму
+BATCH_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=None)
+def _bucket_bounds(relative_accuracy: float, min_value: float, max_value: float) -> Tuple[float, ...]:
+    gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+    count = math.ceil(math.log(max_value / min_value, gamma))
+    return tuple(min_value * gamma ** index for index in range(count + 1))
+
+
+class LatencySketch:
+    """
+    Потоковая оценка квантилей времени выполнения
+
+    Гистограмма с логарифмическими корзинами (как DDSketch): границы растут
+    геометрически, поэтому любой квантиль в диапазоне [min_value, max_value]
+    оценивается с относительной ошибкой не больше relative_accuracy.
+    Память постоянна (при 2% - около 470 счетчиков) и не зависит от числа
+    замеров; добавление - бинарный поиск корзины и увеличение счетчика.
+    Не потокобезопасна: LatencyTracker добавляет замеры под блокировкой.
+    """
+
+    __slots__ = ("bounds", "counts", "_zeros")
+
+    def __init__(self, relative_accuracy: float = 0.02, min_value: float = 1e-6, max_value: float = 100.0):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        if not 0 < min_value < max_value:
+            raise ValueError("min_value must be positive and less than max_value")
+        self.bounds = _bucket_bounds(relative_accuracy, min_value, max_value)
+        # Последняя корзина - значения больше max_value
+        self._zeros = [0] * (len(self.bounds) + 1)
+        self.counts: List[int] = list(self._zeros)
+
+    def add(self, value: float):
+        """Добавление замера в секундах"""
+        self.counts[bisect_left(self.bounds, value)] += 1
+
+    def extend(self, values: List[float]):
+        """
+        Добавление пачки замеров
+
+        Пачка сортируется, и каждая серия замеров одной корзины учитывается
+        одним сложением: время выполнения обычно сосредоточено в немногих
+        корзинах, поэтому это в несколько раз быстрее поиска корзины для
+        каждого замера.
+        """
+        values = sorted(values)
+        counts, bounds = self.counts, self.bounds
+        overflow = len(bounds)
+        total = len(values)
+        start = bucket = 0
+        while start < total:
+            bucket = bisect_left(bounds, values[start], bucket)
+            end = bisect_right(values, bounds[bucket], start) if bucket < overflow else total
+            counts[bucket] += end - start
+            start = end
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantiles(self, *qs: float) -> List[Optional[float]]:
+        """Оценки квантилей (None - замеров нет) за один проход по корзинам"""
+        total = self.count
+        if not total:
+            return [None] * len(qs)
+        ranks = sorted((max(1, math.ceil(q * total)), index) for index, q in enumerate(qs))
+        found: List[Optional[float]] = [None] * len(qs)
+        position = 0
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            while position < len(ranks) and seen >= ranks[position][0]:
+                found[ranks[position][1]] = self._estimate(bucket)
+                position += 1
+            if position == len(ranks):
+                break
+        return found
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles(q)[0]
+
+    def _estimate(self, bucket: int) -> float:
+        bounds = self.bounds
+        if bucket == 0:
+            return bounds[0]
+        if bucket >= len(bounds):
+            return bounds[-1]
+        lower, upper = bounds[bucket - 1], bounds[bucket]
+        # Среднее гармоническое границ дает одинаковую относительную ошибку в обе стороны
+        return 2 * lower * upper / (lower + upper)
+
+    def merge(self, other: "LatencySketch"):
+        """Добавление замеров другой гистограммы с теми же границами"""
+        if other.bounds != self.bounds:
+            raise ValueError("Sketches have different bucket bounds")
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            counts[index] += count
+
+    def reset(self):
+        self.counts[:] = self._zeros
+
+
+class LatencyTracker:
+    """
+    Окна замеров одной операции и тревоги по квантилям
+
+    Обертка только дописывает длительность вызова в pending; в LatencySketch
+    замеры переносятся пачками (flush) - когда их накопится BATCH_SIZE или
+    закончится окно. Окно длится window секунд; по его окончании (его
+    замечает первый вызов после конца) вычисляются квантили и
+    сравниваются с бюджетом. WARNING отправляется, когда квантиль percentile
+    превышает budget sustain окон подряд, ERROR - когда квантиль
+    error_percentile превышает error_budget. Окна, где вызовов меньше
+    min_samples, не оцениваются. Уведомления отправляются через
+    ErrorManager.submit и не задерживают вызов.
+    """
+
+    def __init__(self, operation: str, category: ErrorCategory, budget: float,
+                 percentile: float = 0.95,
+                 error_budget: Optional[float] = None,
+                 error_percentile: float = 0.99,
+                 window: float = 60.0,
+                 sustain: int = 3,
+                 min_samples: int = 20,
+                 cooldown: float = 600.0,
+                 notify_recovery: bool = True,
+                 relative_accuracy: float = 0.02,
+                 clock: Callable[[], float] = time.perf_counter):
+        if budget <= 0 or (error_budget is not None and error_budget <= 0):
+            raise ValueError("budget and error_budget must be positive")
+        if not (0 < percentile < 1 and 0 < error_percentile < 1):
+            raise ValueError("percentile and error_percentile must be in (0, 1)")
+        if window <= 0 or sustain <= 0 or min_samples < 0 or cooldown < 0:
+            raise ValueError("window and sustain must be positive, "
+                             "min_samples and cooldown must not be negative")
+        self.operation = operation
+        self.category = category
+        self.budget = budget
+        self.percentile = percentile
+        self.error_budget = error_budget
+        self.error_percentile = error_percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.notify_recovery = notify_recovery
+        self.sketch = LatencySketch(relative_accuracy)
+        # Замеры, еще не перенесенные в гистограмму (дописывают обертки)
+        self.pending: List[float] = []
+        self._clock = clock
+        self.window_end = clock() + window
+        # Квантили последнего оцененного окна
+        self.last: Dict[str, float] = {}
+        # Порог снятия равен бюджету: квантиль окна уже сглажен, дребезга нет
+        self._warning = Hysteresis(budget, 1.0, sustain, cooldown)
+        self._error = Hysteresis(error_budget, 1.0, sustain, cooldown) if error_budget is not None else None
+        self._lock = threading.Lock()
+
+    def flush(self, now: Optional[float] = None) -> float:
+        """
+        Перенос накопленных замеров в гистограмму и оценка окна, если оно закончилось
+
+        Returns:
+            Время окончания текущего окна (по часам трекера)
+        """
+        now = self._clock() if now is None else now
+        if not self._lock.acquire(blocking=False):
+            # Замеры уже переносит другой поток
+            return self.window_end
+        try:
+            pending = self.pending
+            # Копия и удаление - атомарные операции со списком: замеры, дописанные
+            # другими потоками между ними, останутся до следующего переноса
+            batch = pending[:]
+            del pending[:len(batch)]
+            self.sketch.extend(batch)
+            if now >= self.window_end:
+                self._roll(now)
+        except Exception as e:
+            logger.error(f"Ошибка оценки времени выполнения {self.operation}: {e}")
+        finally:
+            self._lock.release()
+        return self.window_end
+
+    def _roll(self, now: float):
+        """Завершение окна: оценка квантилей и уведомления"""
+        self.window_end = now + self.window
+        sketch = self.sketch
+        calls = sketch.count
+        if calls < self.min_samples or not calls:
+            sketch.reset()
+            return
+        warning_value, error_value = sketch.quantiles(self.percentile, self.error_percentile)
+        sketch.reset()
+        self.last = {"calls": calls, _label(self.percentile): warning_value,
+                     _label(self.error_percentile): error_value}
+        self._evaluate(calls, warning_value, error_value, now)
+
+    def _evaluate(self, calls: int, warning_value: float, error_value: float, now: float):
+        error_state = self._error.update(error_value, now) if self._error is not None else None
+        warning_state = self._warning.update(warning_value, now)
+        if error_state == ALARM_RAISED:
+            self._notify(ErrorLevel.ERROR, calls, self.error_percentile, error_value, self.error_budget)
+        elif warning_state == ALARM_RAISED:
+            self._notify(ErrorLevel.WARNING, calls, self.percentile, warning_value, self.budget)
+        elif warning_state == ALARM_CLEARED and self.notify_recovery:
+            ErrorManager.submit(ErrorLevel.INFO, self.category,
+                                f"✅ Время выполнения в норме: {self.operation}",
+                                {_label(self.percentile) + "_ms": _ms(warning_value), "calls": calls})
+
+    def _notify(self, level: ErrorLevel, calls: int, percentile: float, value: float, budget: float):
+        label = _label(percentile)
+        ErrorManager.submit(level, self.category, f"⏱ Медленно выполняется: {self.operation}", {
+            f"{label}_ms": _ms(value),
+            "budget_ms": _ms(budget),
+            "calls": calls,
+            "window_s": self.window,
+        })
+
+
+def _label(percentile: float) -> str:
+    return f"p{percentile * 100:g}"
+
+
+def _ms(value: float) -> float:
+    return round(value * 1000, 2)
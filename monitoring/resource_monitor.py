@@ -0,0 +1,366 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from ..templates.notification_templates import NotificationTemplates
+
+logger = logging.getLogger(__name__)
+
+ALARM_RAISED = "raised"
+ALARM_CLEARED = "cleared"
+
+_MB = 1024 * 1024
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+# Модуль psutil (необязательная зависимость): None - еще не импортирован, False - не установлен
+_psutil = None
+
+
+class Hysteresis:
+    """
+    Порог с гистерезисом и паузой между уведомлениями
+
+    Тревога поднимается, когда значение не ниже threshold sustain проверок
+    подряд, и снимается, только когда оно опустится ниже threshold * clear_ratio:
+    значение у самого порога не порождает серию уведомлений. Повторное
+    уведомление (тревога не снята или снова поднялась) - не раньше чем через
+    cooldown секунд после предыдущего.
+    """
+
+    __slots__ = ("threshold", "clear_ratio", "sustain", "cooldown", "active", "_breaches", "_notified_at")
+
+    def __init__(self, threshold: float, clear_ratio: float = 0.8, sustain: int = 1, cooldown: float = 600.0):
+        self.threshold = threshold
+        self.clear_ratio = clear_ratio
+        self.sustain = sustain
+        self.cooldown = cooldown
+        self.active = False
+        self._breaches = 0
+        self._notified_at: Optional[float] = None
+
+    def update(self, value: float, now: float) -> Optional[str]:
+        """
+        Учет нового значения
+
+        Returns:
+            ALARM_RAISED - нужно уведомление о превышении, ALARM_CLEARED -
+            о возвращении в норму, None - уведомлять не нужно
+        """
+        if value >= self.threshold:
+            self._breaches += 1
+            if self._breaches < self.sustain:
+                return None
+            if self._notified_at is not None and now - self._notified_at < self.cooldown:
+                return None
+            self.active = True
+            self._notified_at = now
+            return ALARM_RAISED
+        self._breaches = 0
+        if self.active and value < self.threshold * self.clear_ratio:
+            self.active = False
+            return ALARM_CLEARED
+        return None
+
+
+class ResourceMonitor:
+    """
+    Фоновая задача, следящая за циклом событий и ресурсами процесса
+
+    Задержка цикла событий измеряется раз в interval секунд по опозданию
+    собственного asyncio.sleep; память (RSS), открытые файловые дескрипторы
+    и число незавершенных задач читаются раз в resource_interval секунд.
+    Превышения отправляются через NotificationTemplates, по тревоге на
+    показатель (см. Hysteresis). Отдельные обратные вызовы замеряются, только
+    если задан slow_callback_threshold.
+
+    Args:
+        interval: Период измерения задержки цикла событий в секундах
+        loop_lag_threshold: Допустимая задержка цикла в секундах (None - не следить)
+        resource_interval: Период чтения памяти, дескрипторов и задач в секундах
+        memory_threshold_mb: Предел RSS в МБ (None - не следить)
+        memory_growth_mb: Допустимый рост RSS от запуска монитора в МБ (None - не следить)
+        fd_threshold_percent: Предел открытых дескрипторов в процентах от
+            RLIMIT_NOFILE (None - не следить)
+        task_threshold: Предел числа незавершенных задач (None - не следить)
+        slow_callback_threshold: Длительность обратного вызова в секундах, после
+            которой он считается блокирующим (None - не замерять)
+        clear_ratio: Доля порога, ниже которой тревога снимается
+        sustain: Сколько измерений подряд значение должно превышать порог
+        cooldown: Минимальный интервал между уведомлениями об одном показателе
+        notify_recovery: Уведомлять ли о возвращении показателя в норму
+    """
+
+    def __init__(self, interval: float = 1.0,
+                 loop_lag_threshold: Optional[float] = 0.1,
+                 resource_interval: float = 10.0,
+                 memory_threshold_mb: Optional[float] = None,
+                 memory_growth_mb: Optional[float] = None,
+                 fd_threshold_percent: Optional[float] = 80.0,
+                 task_threshold: Optional[int] = 10000,
+                 slow_callback_threshold: Optional[float] = None,
+                 clear_ratio: float = 0.8,
+                 sustain: int = 3,
+                 cooldown: float = 600.0,
+                 notify_recovery: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        if interval <= 0 or resource_interval <= 0:
+            raise ValueError("interval and resource_interval must be positive")
+        if not 0 < clear_ratio <= 1:
+            raise ValueError("clear_ratio must be in (0, 1]")
+        if sustain <= 0 or cooldown < 0:
+            raise ValueError("sustain must be positive, cooldown must not be negative")
+        if slow_callback_threshold is not None and slow_callback_threshold <= 0:
+            raise ValueError("slow_callback_threshold must be positive")
+
+        self.interval = interval
+        self.resource_interval = resource_interval
+        self.slow_callback_threshold = slow_callback_threshold
+        self.cooldown = cooldown
+        self.notify_recovery = notify_recovery
+        self._clock = clock
+
+        def alarm(threshold: Optional[float]) -> Optional[Hysteresis]:
+            return Hysteresis(threshold, clear_ratio, sustain, cooldown) if threshold is not None else None
+
+        self._lag_alarm = alarm(loop_lag_threshold)
+        self._memory_alarm = alarm(memory_threshold_mb)
+        self._growth_alarm = alarm(memory_growth_mb)
+        self._fd_alarm = alarm(fd_threshold_percent)
+        self._task_alarm = alarm(task_threshold)
+
+        # Последние измерения
+        self.readings: Dict[str, Optional[float]] = {}
+        self._baseline_rss: Optional[int] = None
+        self._fd_limit: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._slow_count = 0
+        self._slowest = 0.0
+        self._slowest_callback = ""
+        self._slow_notified_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> asyncio.Task:
+        """Запуск мониторинга в текущем цикле событий"""
+        if self.running:
+            return self._task
+        self._loop = asyncio.get_running_loop()
+        if self._memory_alarm is not None or self._growth_alarm is not None:
+            self._baseline_rss = read_rss()
+        if self._fd_alarm is not None:
+            self._fd_limit = _fd_limit()
+        if self.slow_callback_threshold is not None:
+            _add_slow_callback_watcher(self)
+        self._task = self._loop.create_task(self._run(), name="tg_error_notifier.resource_monitor")
+        return self._task
+
+    async def stop(self):
+        """Остановка мониторинга"""
+        _remove_slow_callback_watcher(self)
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        resource_every = max(1, round(self.resource_interval / self.interval))
+        ticks = 0
+        expected = loop.time() + self.interval
+        while True:
+            await asyncio.sleep(self.interval)
+            current = loop.time()
+            lag = max(0.0, current - expected)
+            expected = current + self.interval
+            try:
+                now = self._clock()
+                await self._check_lag(lag, now)
+                await self._check_slow_callbacks(now)
+                if ticks % resource_every == 0:
+                    await self._check_resources(now)
+            except Exception as e:
+                logger.error(f"Ошибка мониторинга ресурсов: {e}")
+            ticks += 1
+
+    async def _check_lag(self, lag: float, now: float):
+        self.readings["loop_lag"] = lag
+        alarm = self._lag_alarm
+        if alarm is None:
+            return
+        state = alarm.update(lag, now)
+        if state == ALARM_RAISED:
+            await NotificationTemplates.event_loop_lag(lag, alarm.threshold)
+        elif state == ALARM_CLEARED and self.notify_recovery:
+            await NotificationTemplates.resource_recovered("Задержка цикла событий", f"{lag * 1000:.1f} мс")
+
+    async def _check_slow_callbacks(self, now: float):
+        if not self._slow_count:
+            return
+        if self._slow_notified_at is not None and now - self._slow_notified_at < self.cooldown:
+            # Замеры копятся до следующего уведомления
+            return
+        count, slowest, callback = self._slow_count, self._slowest, self._slowest_callback
+        self._slow_count, self._slowest, self._slowest_callback = 0, 0.0, ""
+        self._slow_notified_at = now
+        await NotificationTemplates.slow_callbacks(count, slowest, callback)
+
+    async def _check_resources(self, now: float):
+        if self._memory_alarm is not None or self._growth_alarm is not None:
+            rss = read_rss()
+            if rss is not None:
+                await self._check_memory(rss / _MB, now)
+        if self._fd_alarm is not None and self._fd_limit:
+            fds = count_fds()
+            if fds is not None:
+                self.readings["open_fds"] = fds
+                percent = fds * 100 / self._fd_limit
+                state = self._fd_alarm.update(percent, now)
+                if state == ALARM_RAISED:
+                    await NotificationTemplates.high_load_warning("файловые дескрипторы", round(percent))
+                elif state == ALARM_CLEARED and self.notify_recovery:
+                    await NotificationTemplates.resource_recovered("Файловые дескрипторы",
+                                                                   f"{fds} из {self._fd_limit}")
+        if self._task_alarm is not None:
+            tasks = len(asyncio.all_tasks(self._loop))
+            self.readings["tasks"] = tasks
+            state = self._task_alarm.update(tasks, now)
+            if state == ALARM_RAISED:
+                await NotificationTemplates.too_many_tasks(tasks, int(self._task_alarm.threshold))
+            elif state == ALARM_CLEARED and self.notify_recovery:
+                await NotificationTemplates.resource_recovered("Незавершенные задачи", str(tasks))
+
+    async def _check_memory(self, rss_mb: float, now: float):
+        self.readings["rss_mb"] = rss_mb
+        growth = None
+        if self._baseline_rss is not None:
+            growth = rss_mb - self._baseline_rss / _MB
+        alarms = []
+        if self._memory_alarm is not None:
+            alarms.append((self._memory_alarm, rss_mb, self._memory_alarm.threshold))
+        if self._growth_alarm is not None and growth is not None:
+            alarms.append((self._growth_alarm, growth, rss_mb - growth + self._growth_alarm.threshold))
+        for alarm, value, threshold_mb in alarms:
+            state = alarm.update(value, now)
+            if state == ALARM_RAISED:
+                await NotificationTemplates.high_memory_usage(rss_mb, threshold_mb, growth)
+            elif state == ALARM_CLEARED and self.notify_recovery:
+                await NotificationTemplates.resource_recovered("Память", f"{rss_mb:.1f} МБ")
+
+    def _on_slow_callback(self, handle: asyncio.Handle, duration: float):
+        """Вызывается из цикла событий после блокирующего обратного вызова"""
+        if duration < self.slow_callback_threshold or getattr(handle, "_loop", None) is not self._loop:
+            return
+        self._slow_count += 1
+        if duration > self._slowest:
+            self._slowest = duration
+            self._slowest_callback = _describe_callback(getattr(handle, "_callback", None))
+
+
+def read_rss() -> Optional[int]:
+    """Текущий RSS процесса в байтах (None - недоступно на этой платформе)"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    psutil = _import_psutil()
+    return psutil.Process().memory_info().rss if psutil else None
+
+
+def count_fds() -> Optional[int]:
+    """Число открытых файловых дескрипторов (None - недоступно на этой платформе)"""
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            pass
+    psutil = _import_psutil()
+    if psutil and hasattr(psutil.Process, "num_fds"):
+        return psutil.Process().num_fds()
+    return None
+
+
+def _fd_limit() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    return soft if soft > 0 else None
+
+
+def _import_psutil():
+    global _psutil
+    if _psutil is None:
+        try:
+            import psutil
+        except ImportError:
+            psutil = False
+        _psutil = psutil
+    return _psutil
+
+
+def _describe_callback(callback) -> str:
+    """Имя обратного вызова; для шага задачи - имя ее корутины"""
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", None) or repr(coro)
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+# Замер обратных вызовов: Handle._run подменяется, пока есть хотя бы один монитор
+# со slow_callback_threshold. Работает для циклов событий asyncio (не uvloop).
+_slow_watchers: List[ResourceMonitor] = []
+# Наименьший порог среди мониторов: быстрые вызовы отсекаются одним сравнением
+_slow_floor = [0.0]
+_original_handle_run = None
+
+
+def _add_slow_callback_watcher(monitor: ResourceMonitor):
+    global _original_handle_run
+    if monitor in _slow_watchers:
+        return
+    if not _slow_watchers:
+        original = _original_handle_run = asyncio.events.Handle._run
+        perf_counter = time.perf_counter
+        watchers, floor = _slow_watchers, _slow_floor
+
+        def _run(handle):
+            started = perf_counter()
+            try:
+                return original(handle)
+            finally:
+                duration = perf_counter() - started
+                if duration >= floor[0]:
+                    for watcher in watchers:
+                        watcher._on_slow_callback(handle, duration)
+
+        asyncio.events.Handle._run = _run
+    _slow_watchers.append(monitor)
+    _slow_floor[0] = min(watcher.slow_callback_threshold for watcher in _slow_watchers)
+
+
+def _remove_slow_callback_watcher(monitor: ResourceMonitor):
+    global _original_handle_run
+    if monitor not in _slow_watchers:
+        return
+    _slow_watchers.remove(monitor)
+    if _slow_watchers:
+        _slow_floor[0] = min(watcher.slow_callback_threshold for watcher in _slow_watchers)
+    elif _original_handle_run is not None:
+        asyncio.events.Handle._run = _original_handle_run
+        _original_handle_run = None
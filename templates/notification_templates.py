@@ -105,4 +105,52 @@ class NotificationTemplates:
             ErrorCategory.SYSTEM,
             f"📈 Высокая нагрузка на {service}",
             {"load_percent": load_percent}
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    async def event_loop_lag(lag: float, threshold: float):
+        """Уведомление о задержке цикла событий (секунды)"""
+        await ErrorManager.notify_warning(
+            ErrorCategory.SYSTEM,
+            "🐢 Цикл событий не успевает обрабатывать задачи",
+            {"lag_ms": round(lag * 1000, 1), "threshold_ms": round(threshold * 1000, 1)}
+        )
+
+    @staticmethod
+    async def slow_callbacks(count: int, slowest: float, callback: str):
+        """Уведомление о блокирующих обратных вызовах в цикле событий"""
+        await ErrorManager.notify_warning(
+            ErrorCategory.SYSTEM,
+            "🐢 Блокирующий код в цикле событий",
+            {"count": count, "slowest_ms": round(slowest * 1000, 1), "callback": callback}
+        )
+
+    @staticmethod
+    async def high_memory_usage(rss_mb: float, threshold_mb: float, growth_mb: Optional[float] = None):
+        """Уведомление о большом потреблении памяти"""
+        details = {"rss_mb": round(rss_mb, 1), "threshold_mb": round(threshold_mb, 1)}
+        if growth_mb is not None:
+            details["growth_mb"] = round(growth_mb, 1)
+        await ErrorManager.notify_warning(
+            ErrorCategory.SYSTEM,
+            "🧠 Высокое потребление памяти",
+            details
+        )
+
+    @staticmethod
+    async def too_many_tasks(count: int, threshold: int):
+        """Уведомление о большом числе незавершенных задач asyncio"""
+        await ErrorManager.notify_warning(
+            ErrorCategory.SYSTEM,
+            "📚 Слишком много незавершенных задач",
+            {"tasks": count, "threshold": threshold}
+        )
+
+    @staticmethod
+    async def resource_recovered(resource: str, value: str):
+        """Уведомление о возвращении показателя в норму"""
+        await ErrorManager.notify_info(
+            ErrorCategory.SYSTEM,
+            f"✅ {resource}: показатель в норме",
+            {"value": value}
+        )